@@ -0,0 +1,43 @@
+import os
+import sys
+import argparse
+
+from gostop.core.benchmark import BENCHMARKS, run_benchmarks, load_baseline, \
+    save_baseline, compare, format_results
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument('benchmarks', nargs='*',
+                        help='Benchmarks to run, all by default: ' + ', '.join(BENCHMARKS))
+    parser.add_argument('-b', '--baseline', default='benchmarks/baseline.json',
+                        help='Baseline results to compare with')
+    parser.add_argument('-t', '--tolerance', type=float, default=0.2,
+                        help='Slowdown from the baseline reported as a regression')
+    parser.add_argument('--save', action='store_true',
+                        help='Save the results as the new baseline')
+
+    args = parser.parse_args(argv)
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error('Unknown benchmark {0}'.format(name))
+
+    results = run_benchmarks(args.benchmarks)
+    baseline = None
+    if os.path.exists(args.baseline):
+        baseline = load_baseline(args.baseline)
+    print(format_results(results, baseline), end='')
+
+    if args.save:
+        save_baseline(results, args.baseline)
+    elif baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print('Regressions: {0}'.format(', '.join(regressions)))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
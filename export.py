@@ -0,0 +1,26 @@
+import sys
+import argparse
+
+from gostop.core.records import read_records
+from gostop.core.dataset import export_records
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument('records', help='Game record file to export')
+    parser.add_argument('directory', help='Directory of the .npy shards')
+    parser.add_argument('-n', '--rows-per-shard', type=int, default=1 << 20,
+                        help='Number of positions in each shard')
+    parser.add_argument('-p', '--prefix', default='positions',
+                        help='Prefix of the shard file names')
+
+    args = parser.parse_args(argv)
+
+    count = export_records(read_records(args.records), args.directory,
+                           args.rows_per_shard, args.prefix)
+    print('Exported {0} positions'.format(count))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,8 +1,13 @@
 import sys
 import random
+import logging
 import argparse
 
 from gostop import GameState, HumanAgent, RandomAgent
+from gostop.core.deck import Deck
+from gostop.core.render import render_state
+from gostop.core.rng import python_rng
+from gostop.core.records import RecordWriter, record_game
 
 
 def main(argv):
@@ -10,24 +15,40 @@ def main(argv):
 
     parser.add_argument('-f', '--fixed-random-seed', dest='fixed_random_seed',
                         help='Use a fixed random seed to play a predictable game')
+    parser.add_argument('-r', '--record', default=None,
+                        help='Append the game to this game record file')
 
     args = parser.parse_args()
 
-    if args.fixed_random_seed:
-        random.seed(args.fixed_random_seed)
+    # Records keep the seed as a 64 bit int, and an unseeded game draws one
+    # so the recorded seed is the one the game was played with
+    seed = args.fixed_random_seed
+    if seed is None:
+        seed = random.getrandbits(64)
+    elif args.record and not (seed.isdigit() and int(seed) < 1 << 64):
+        parser.error('--record needs a seed from 0 to 2**64-1')
 
-    players = [HumanAgent('Human'), RandomAgent('Deep Pink')]
-    state = GameState.new_game()
+    logging.basicConfig(level=logging.INFO)
+
+    rng = python_rng(seed)
+
+    players = [HumanAgent('Human'), RandomAgent('Deep Pink', rng)]
+    deck = Deck()
+    deck.shuffle(rng)
+    state = GameState.new_game(deck=deck)
+    actions = []
 
     while True:
         current_player = players[state.current_player]
         print('*** {0}'.format(current_player))
         print(state)
+        render_state(state)
 
         possible_actions = state.get_possible_actions()
         if len(possible_actions) == 0:
             raise Exception('No more actions')
         action = current_player.get_action(state, possible_actions)
+        actions.append(possible_actions.index(action))
         print('*** {0} takes action {1}'.format(current_player, str(action)))
 
         last_player = state.current_player
@@ -36,6 +57,10 @@ def main(argv):
             print('*** {0} wins!'.format(players[last_player]))
             break
 
+    if args.record:
+        with RecordWriter(args.record) as writer:
+            writer.write(record_game(int(seed), deck, actions))
+
 
 if __name__ == '__main__':
     main(sys.argv[1:])
@@ -2,8 +2,11 @@ from __future__ import unicode_literals
 
 from .core.card import Card
 from .core.deck import Deck
-from .core.hand import Hand, TakenCards, TableCards
+from .core.hand import Hand, TakenCards, TableCards, LIST_CONTAINERS
+from .core.bitboard import BitHand, BitTakenCards, BitTableCards, \
+    BIT_CONTAINERS
 from .core.gamestate import GameState, GameStatePlay
 
 from .core.humanagent import HumanAgent
 from .core.randomagent import RandomAgent
+from .core.ismctsagent import ISMCTSAgent
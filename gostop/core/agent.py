@@ -1,12 +1,16 @@
+import random
+
 from .hand import Hand, TakenCards
 
 
 class Agent(object):
     """An Agent is a player in the game and may be controlled by a human or
-    by computer.
+    by computer. Its random choices are made with `rng`, a random.Random,
+    or the `random` module by default.
     """
-    def __init__(self, name):
+    def __init__(self, name, rng=None):
         self.name = name
+        self.rng = random if rng is None else rng
 
         self.hand = Hand()
         self.taken_cards = TakenCards()
@@ -28,3 +32,14 @@ class Agent(object):
     def loss(self, state):
         """Notify the Agent of a loss for the purpose of record keeping."""
         pass
+
+
+class AsyncAgent(Agent):
+    """An Agent whose actions are awaited, so that many games can be played
+    in one event loop.
+    """
+    async def get_action(self, state, possible_actions):
+        """The Agent receives a GameState and must return an action from one
+        of `possible_actions`.
+        """
+        raise NotImplementedError()
@@ -0,0 +1,212 @@
+import os
+import json
+import random
+import timeit
+import contextlib
+import tempfile
+import itertools
+import tracemalloc
+from collections import namedtuple
+
+import numpy as np
+
+from .card import ALL_CARDS
+from .deck import Deck
+from .hand import TakenCards
+from .gamestate import GameState
+from .randomagent import RandomAgent
+from .ismctsagent import ISMCTSAgent
+from .rollout import BatchRollout, rollout_uniforms
+from .rng import shuffled_decks
+from .tournament import play_game
+
+
+BenchmarkResult = namedtuple('BenchmarkResult', ['name', 'ops_per_sec', 'peak_bytes'])
+
+
+def _game_states(count):
+    """Returns `count` states from random games, in every phase."""
+    states = []
+    while len(states) < count:
+        state = GameState.new_game()
+        while state.get_possible_actions() and len(states) < count:
+            states.append(state)
+            state = state.generate_successor(
+                random.choice(state.get_possible_actions()))
+    return states
+
+
+# The number of games of an operation of batch_rollout
+ROLLOUT_BATCH = 16384
+
+
+# Each benchmark is a function which prepares its data and returns the
+# operation to measure, which cycles over the data on each call, or a
+# context manager giving the operation for benchmarks which need cleaning
+# up.
+
+def bench_deck_shuffle():
+    deck = Deck()
+    return deck.shuffle
+
+
+def bench_new_game():
+    return GameState.new_game
+
+
+def bench_get_possible_actions():
+    states = itertools.cycle(_game_states(1000))
+    return lambda: next(states).get_possible_actions()
+
+
+def bench_generate_successor():
+    moves = itertools.cycle([(state, random.choice(state.get_possible_actions()))
+                             for state in _game_states(1000)])
+
+    def generate_successor():
+        state, action = next(moves)
+        return state.generate_successor(action)
+    return generate_successor
+
+
+def bench_taken_cards_score():
+    taken = itertools.cycle([TakenCards(*random.sample(ALL_CARDS, 20))
+                             for i in range(100)])
+    return lambda: next(taken).score
+
+
+def bench_copy_and_randomise():
+    states = itertools.cycle(_game_states(1000))
+
+    def copy_and_randomise():
+        state = next(states)
+        return state.copy_and_randomise(state.current_player)
+    return copy_and_randomise
+
+
+def bench_ismcts_decision():
+    # Decisions of the default agent, which should take under 100 ms each
+    states = itertools.cycle([state for state in _game_states(100)
+                              if len(state.get_possible_actions()) > 1])
+    agent = ISMCTSAgent('ismcts', endgame_cards=0)
+
+    def ismcts_decision():
+        state = next(states)
+        return agent.get_action(state, state.get_possible_actions())
+    return ismcts_decision
+
+
+def bench_random_game():
+    agents = [RandomAgent('random'), RandomAgent('random')]
+    return lambda: play_game(agents)
+
+
+def bench_batch_rollout():
+    # ROLLOUT_BATCH random playouts of new games at once, to compare with
+    # the playouts of random_game
+    generator = np.random.default_rng(random.getrandbits(64))
+
+    def batch_rollout():
+        decks = shuffled_decks(generator, ROLLOUT_BATCH)
+        return BatchRollout.new_games(decks).run(
+            rollout_uniforms(ROLLOUT_BATCH, generator))
+    return batch_rollout
+
+
+@contextlib.contextmanager
+def bench_create_image():
+    from .render import create_image
+
+    with tempfile.TemporaryDirectory() as directory:
+        # More hands than the atlas caches, so most rows are composed
+        hands = itertools.cycle([random.sample(ALL_CARDS, 10) for i in range(200)])
+        path = os.path.join(directory, 'hand.png')
+        yield lambda: create_image(next(hands), path, number=True)
+
+
+BENCHMARKS = {
+    'deck_shuffle': bench_deck_shuffle,
+    'new_game': bench_new_game,
+    'get_possible_actions': bench_get_possible_actions,
+    'generate_successor': bench_generate_successor,
+    'taken_cards_score': bench_taken_cards_score,
+    'copy_and_randomise': bench_copy_and_randomise,
+    'ismcts_decision': bench_ismcts_decision,
+    'random_game': bench_random_game,
+    'batch_rollout': bench_batch_rollout,
+    'create_image': bench_create_image,
+}
+
+
+def measure(name, operation, repeat=3):
+    """Returns the operations per second of `operation`, the best of
+    `repeat` runs of at least 0.2 seconds, and the peak memory allocated by
+    one call.
+    """
+    timer = timeit.Timer(operation)
+    number, _ = timer.autorange()
+    ops_per_sec = number / min(timer.repeat(repeat, number))
+
+    tracemalloc.start()
+    try:
+        peaks = []
+        for i in range(10):
+            tracemalloc.reset_peak()
+            start, _ = tracemalloc.get_traced_memory()
+            operation()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - start)
+    finally:
+        tracemalloc.stop()
+    return BenchmarkResult(name, ops_per_sec, sum(peaks) // len(peaks))
+
+
+def run_benchmarks(names=None, seed=0):
+    """Runs the benchmarks of `names`, all of them by default, and returns
+    their results.
+    """
+    results = []
+    for name in names or BENCHMARKS:
+        random.seed(seed)
+        benchmark = BENCHMARKS[name]()
+        if isinstance(benchmark, contextlib.AbstractContextManager):
+            with benchmark as operation:
+                results.append(measure(name, operation))
+        else:
+            results.append(measure(name, benchmark))
+    return results
+
+
+def load_baseline(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(results, path):
+    with open(path, 'w') as f:
+        json.dump({result.name: {'ops_per_sec': result.ops_per_sec,
+                                 'peak_bytes': result.peak_bytes}
+                   for result in results}, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def compare(results, baseline, tolerance=0.2):
+    """Returns the names of the benchmarks more than `tolerance` slower than
+    in `baseline`.
+    """
+    return [result.name for result in results
+            if result.name in baseline and result.ops_per_sec <
+            (1 - tolerance) * baseline[result.name]['ops_per_sec']]
+
+
+def format_results(results, baseline=None):
+    out = '{0:<22} {1:>14} {2:>12} {3:>9}\n'.format(
+        'benchmark', 'ops/sec', 'peak bytes', 'change')
+    for result in results:
+        change = ''
+        if baseline and result.name in baseline:
+            change = '{0:+.1%}'.format(
+                result.ops_per_sec / baseline[result.name]['ops_per_sec'] - 1)
+        out += '{0:<22} {1:>14,.1f} {2:>12,} {3:>9}\n'.format(
+            result.name, result.ops_per_sec, result.peak_bytes, change)
+    return out
@@ -0,0 +1,192 @@
+from .card import ALL_CARDS
+from .hand import CardList, Hand, TakenCards, TableCards, CardContainers
+
+
+# Every card of the deck owns one bit, at its index `card.id` in ALL_CARDS.
+ALL_BITS = (1 << len(ALL_CARDS)) - 1
+
+
+def card_bit(card):
+    """Returns the bitboard holding only `card`."""
+    if card.id is None:
+        raise ValueError('{0!r} is not a card of the deck'.format(card))
+    return 1 << card.id
+
+
+def card_bits(cards):
+    """Returns the bitboard holding `cards`."""
+    bits = 0
+    for card in cards:
+        bit = card_bit(card)
+        if bits & bit:
+            raise ValueError('{0!r} is already in the card list'.format(card))
+        bits |= bit
+    return bits
+
+
+# The cards held in each byte of a bitboard, for each byte value
+_BYTE_CARDS = [[tuple(ALL_CARDS[8*i + j] for j in range(8) if byte >> j & 1)
+                for byte in range(256)]
+               for i in range((len(ALL_CARDS) + 7) // 8)]
+
+
+def iter_bits(bits):
+    """Yields the cards held in `bits`, in deck order."""
+    i = 0
+    while bits:
+        yield from _BYTE_CARDS[i][bits & 0xFF]
+        bits >>= 8
+        i += 1
+
+
+class BitCardList(CardList):
+    """A CardList stored as a 48-bit integer, one bit per card of the deck.
+
+    The public API is that of CardList, but the cards are always iterated in
+    deck order rather than in the order they were added, so `pop` returns
+    the card with the highest deck slot.
+    """
+    def __init__(self, *cards):
+        self.bits = card_bits(cards)
+
+    @classmethod
+    def from_bits(cls, bits):
+        cards = cls()
+        cards.bits = bits
+        return cards
+
+    @property
+    def cards(self):
+        return list(iter_bits(self.bits))
+
+    def __getitem__(self, index):
+        return self.cards[index]
+
+    def __iadd__(self, card):
+        bit = card_bit(card)
+        if self.bits & bit:
+            raise ValueError('{0!r} is already in the card list'.format(card))
+        self.bits |= bit
+        self._version += 1
+        return self
+
+    def __add__(self, other):
+        if isinstance(other, BitCardList):
+            if self.bits & other.bits:
+                raise ValueError('Card lists share cards')
+            return self.from_bits(self.bits | other.bits)
+        return self.__class__(*(self.cards + list(other)))
+
+    def __len__(self):
+        return self.bits.bit_count()
+
+    def __eq__(self, other):
+        if other is None:
+            return False
+        elif isinstance(other, BitCardList):
+            return self.bits == other.bits
+        elif isinstance(other, CardList):
+            return self.bits == card_bits(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.bits)
+
+    def __iter__(self):
+        return iter_bits(self.bits)
+
+    def copy(self):
+        return self.from_bits(self.bits)
+
+    def __contains__(self, card):
+        return card.id is not None and bool(self.bits >> card.id & 1)
+
+    def index(self, card):
+        if card not in self:
+            raise ValueError('{0!r} is not in the card list'.format(card))
+        return (self.bits & ((1 << card.id) - 1)).bit_count()
+
+    def insert(self, index, card):
+        # The position of a card is given by its deck order
+        BitCardList.__iadd__(self, card)
+
+    def remove(self, card):
+        index = self.index(card)
+        self.bits ^= 1 << card.id
+        self._version += 1
+        return index
+
+    def pop(self):
+        if not self.bits:
+            raise IndexError('pop from empty card list')
+        slot = self.bits.bit_length() - 1
+        self.bits ^= 1 << slot
+        self._version += 1
+        return ALL_CARDS[slot]
+
+    def clear(self):
+        self.bits = 0
+        self._version += 1
+
+
+class BitHand(Hand, BitCardList):
+    pass
+
+
+class BitTakenCards(TakenCards, BitCardList):
+    @classmethod
+    def from_bits(cls, bits):
+        cards = super(BitTakenCards, cls).from_bits(bits)
+        cards._recount()
+        return cards
+
+    def copy(self):
+        # The bitboard and the counts are ints, shared until changed
+        copy = self.__class__.__new__(self.__class__)
+        copy.__dict__.update(self.__dict__)
+        return copy
+
+
+class BitTableCards(TableCards, BitCardList):
+    """TableCards whose months are read from the bitboard, where the four
+    cards of a month own four consecutive bits.
+    """
+    def __init__(self, *cards):
+        BitCardList.__init__(self, *cards)
+
+    def _month_bits(self, month):
+        return self.bits >> 4*(month-1) & 0xF
+
+    def __iadd__(self, card):
+        return BitCardList.__iadd__(self, card)
+
+    def insert(self, index, card):
+        BitCardList.insert(self, index, card)
+
+    def remove(self, card):
+        return BitCardList.remove(self, card)
+
+    def pop(self):
+        return BitCardList.pop(self)
+
+    def clear(self):
+        BitCardList.clear(self)
+
+    def copy(self):
+        # The months are read from the bitboard, there is no index to copy
+        return BitCardList.copy(self)
+
+    def get_paired_cards(self, card):
+        return list(iter_bits(self._month_bits(card.month) << 4*(card.month-1)))
+
+    def month_count(self, month):
+        return self._month_bits(month).bit_count()
+
+    def month_cards(self):
+        return [[]] + [self.get_paired_cards(ALL_CARDS[4*(month-1)])
+                       for month in range(1, 13)]
+
+
+# The containers of a game state played on bitboards, see
+# `GameState.new_game`
+BIT_CONTAINERS = CardContainers(BitHand, BitTakenCards, BitTableCards)
@@ -2,6 +2,7 @@
 from PIL import Image, ImageDraw, ImageFont
 import click
 import sys
+from functools import lru_cache
 
 def get_concat_h(im1, im2, overlap_percent):
     overlapping_width = im2.width*overlap_percent//100
@@ -10,6 +11,11 @@ def get_concat_h(im1, im2, overlap_percent):
     dst.paste(im2, (im1.width - overlapping_width, 0))
     return dst
 
+@lru_cache(maxsize=None)
+def load_font(path='tahoma.ttf', size=25):
+    # to find ttf in linux, "locate .ttf"
+    return ImageFont.truetype(path, size)
+
 def add_number(img, num):
     draw = ImageDraw.Draw(img)
 
@@ -17,8 +23,7 @@ def add_number(img, num):
             fill=(205, 200, 240),
             outline=(255, 255, 255))
 
-    # to find ttf in linux, "locate .ttf"
-    font = ImageFont.truetype('tahoma.ttf',25)
+    font = load_font()
     draw.text((5, 5), f"{num}", fill=(0, 0, 255), font=font)
     return img
 
@@ -0,0 +1,182 @@
+import os
+import glob
+
+import numpy as np
+
+from .card import ALL_CARDS
+from .hand import TakenCards
+from .gamestate import GameStateCapture, action_id, NUM_ACTIONS, PHASES
+from .records import replay
+from .rollout import score_counts, COUNTER_BITS
+
+
+_CARDS = len(ALL_CARDS)
+_SHIFTS = np.arange(_CARDS, dtype=np.uint64)
+
+# One row per position in which an action was chosen. The hand and the
+# taken cards are from the point of view of the player to move: `taken[0]`
+# are the cards they took and `taken[1]` those of the other player.
+# `in_play` holds the card turned from the deck and the cards paired with
+# the played card while captures are resolved. `result` is the final
+# `get_result` of the player to move.
+POSITION_DTYPE = np.dtype([
+    ('hand', np.bool_, (_CARDS,)),
+    ('table', np.bool_, (_CARDS,)),
+    ('in_play', np.bool_, (_CARDS,)),
+    ('taken', np.bool_, (2, _CARDS)),
+    ('deck_size', np.uint8),
+    ('phase', np.uint8),
+    ('player', np.uint8),
+    ('go_count', np.uint8),
+    ('counts', np.uint8, (2, len(TakenCards.COUNTERS))),
+    ('points', np.int16, (2,)),
+    ('legal', np.bool_, (NUM_ACTIONS,)),
+    ('action', np.uint16),
+    ('result', np.float32),
+])
+
+
+def _card_bits(cards):
+    # card_bits without its checks, the cards of a state are all different
+    return sum(1 << card.id for card in cards)
+
+
+def _unpack(bits):
+    """Returns the bool array of the cards of an array of bitboards, with
+    one more axis of a flag per card.
+    """
+    return (bits[..., None] >> _SHIFTS & np.uint64(1)).astype(np.bool_)
+
+
+class ShardWriter(object):
+    """Writes positions to `.npy` shards of `rows_per_shard` rows of
+    POSITION_DTYPE in `directory`, named `<prefix>-00000.npy` and on.
+
+    Positions are kept as bitboards until a shard is full, so memory use is
+    bounded by the size of one shard whatever the number of positions.
+    Numbering continues after the shards already in `directory`. Use as a
+    context manager, or call `close`, to write the last shard.
+    """
+    def __init__(self, directory, rows_per_shard=1 << 20, prefix='positions'):
+        if rows_per_shard <= 0:
+            raise ValueError('Rows per shard must be positive')
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.rows_per_shard = rows_per_shard
+        self.prefix = prefix
+        self.shards = len(shard_paths(directory, prefix))
+        self.count = 0
+        self._row = 0
+        self._cards = np.zeros((rows_per_shard, 5), dtype=np.uint64)
+        self._small = np.zeros((rows_per_shard, 4), dtype=np.uint8)
+        self._legal = np.zeros((rows_per_shard, NUM_ACTIONS), dtype=np.bool_)
+        self._action = np.zeros(rows_per_shard, dtype=np.uint16)
+        self._result = np.zeros(rows_per_shard, dtype=np.float32)
+
+    def write_game(self, states, actions):
+        """Writes the positions of a game, where `actions[i]` was played in
+        `states[i]` and the last state is the end of the game.
+        """
+        if len(states) != len(actions) + 1:
+            raise ValueError('A game has one more state than actions')
+        self._write_game([(state, state.get_possible_actions(), action)
+                          for state, action in zip(states, actions)], states[-1])
+
+    def write_record(self, record):
+        """Writes the positions of the game of a `GameRecord`."""
+        states = list(replay(record))
+        positions = []
+        for state, index in zip(states, record.actions):
+            possible_actions = state.get_possible_actions()
+            positions.append((state, possible_actions, possible_actions[index]))
+        self._write_game(positions, states[-1])
+
+    def _write_game(self, positions, final):
+        for state, possible_actions, action in positions:
+            self._write(state, possible_actions, action,
+                        final.get_result(state.current_player))
+
+    def _write(self, state, possible_actions, action, result):
+        row = self._row
+        player = state.current_player
+        in_play = []
+        if isinstance(state, GameStateCapture):
+            in_play.append(state.top_card)
+            paired_cards = state.paired_cards
+            if paired_cards is not None and paired_cards.paired_card is not None:
+                in_play += [paired_cards.card, paired_cards.paired_card]
+        cards = self._cards[row]
+        cards[0] = _card_bits(state.player_hands[player])
+        cards[1] = _card_bits(state.table_cards)
+        cards[2] = _card_bits(in_play)
+        cards[3] = _card_bits(state.taken_cards[player])
+        cards[4] = _card_bits(state.taken_cards[1 - player])
+        self._small[row] = (len(state.deck), PHASES.index(state.__class__),
+                            player, min(state.go_count, 255))
+        self._legal[row] = False
+        self._legal[row, [action_id(possible_action)
+                          for possible_action in possible_actions]] = True
+        self._action[row] = action_id(action)
+        self._result[row] = result
+        self._row += 1
+        self.count += 1
+        if self._row == self.rows_per_shard:
+            self.flush()
+
+    def flush(self):
+        """Writes the positions written since the last shard to a shard."""
+        n = self._row
+        if n == 0:
+            return
+        rows = np.zeros(n, dtype=POSITION_DTYPE)
+        cards = self._cards[:n]
+        rows['hand'] = _unpack(cards[:, 0])
+        rows['table'] = _unpack(cards[:, 1])
+        rows['in_play'] = _unpack(cards[:, 2])
+        rows['taken'] = _unpack(cards[:, 3:5])
+        counts = np.bitwise_count(cards[None, :, 3:5] & COUNTER_BITS[:, None, None])
+        rows['counts'] = counts.transpose(1, 2, 0)
+        rows['points'] = score_counts(counts.astype(np.intp))
+        rows['deck_size'] = self._small[:n, 0]
+        rows['phase'] = self._small[:n, 1]
+        rows['player'] = self._small[:n, 2]
+        rows['go_count'] = self._small[:n, 3]
+        rows['legal'] = self._legal[:n]
+        rows['action'] = self._action[:n]
+        rows['result'] = self._result[:n]
+        path = os.path.join(self.directory,
+                            '{0}-{1:05d}.npy'.format(self.prefix, self.shards))
+        np.save(path, rows)
+        self.shards += 1
+        self._row = 0
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def export_records(records, directory, rows_per_shard=1 << 20, prefix='positions'):
+    """Writes the positions of the games of `records` to shards in
+    `directory` and returns the number of positions written.
+    """
+    with ShardWriter(directory, rows_per_shard, prefix) as writer:
+        for record in records:
+            writer.write_record(record)
+    return writer.count
+
+
+def shard_paths(directory, prefix='positions'):
+    return sorted(glob.glob(os.path.join(glob.escape(directory),
+                                         glob.escape(prefix) + '-*.npy')))
+
+
+def load_shards(directory, prefix='positions'):
+    """Returns the shards of `directory` as read-only memory maps, so they
+    can be sliced without reading them into memory.
+    """
+    return [np.load(path, mmap_mode='r') for path in shard_paths(directory, prefix)]
@@ -7,8 +7,11 @@ class Deck(list):
     def __init__(self, cards=ALL_CARDS):
         super(Deck, self).__init__(cards)
 
-    def shuffle(self):
-        random.shuffle(self)
+    def shuffle(self, rng=random):
+        rng.shuffle(self)
+
+    def copy(self):
+        return Deck(cards=self)
 
     def __hash__(self):
         return hash(tuple(self))
@@ -0,0 +1,121 @@
+import math
+import itertools
+
+from .bitboard import iter_bits
+from .gamestate import action_id, capture_order
+from .transposition import TranspositionTable, Bound
+
+
+def cards_left(state):
+    """Returns the number of cards still to be played, in the deck and in
+    the hands.
+    """
+    return len(state.deck) + sum(len(hand) for hand in state.player_hands)
+
+
+def determinization_count(state, observer):
+    """Returns the number of ways the cards `observer` can't see can be
+    dealt to the other hands and the deck.
+    """
+    count = math.factorial(state.unseen_cards(observer).bit_count())
+    for player, hand in enumerate(state.player_hands):
+        if player != observer:
+            count //= math.factorial(len(hand))
+    return count
+
+
+def determinizations(state, observer):
+    """Yields every determinization of `state` for `observer`, each once."""
+    sizes = [len(hand) for player, hand in enumerate(state.player_hands)
+             if player != observer]
+
+    def deal(cards, sizes):
+        if not sizes:
+            for deck in itertools.permutations(cards):
+                yield list(deck)
+            return
+        for hand in itertools.combinations(cards, sizes[0]):
+            rest = [card for card in cards if card not in hand]
+            for dealt in deal(rest, sizes[1:]):
+                yield list(hand) + dealt
+
+    for cards in deal(list(iter_bits(state.unseen_cards(observer))), sizes):
+        yield state.determinize(observer, cards)
+
+
+class EndgameSolver(object):
+    """Finds the result of a game with every card known, with both players
+    playing their best, by alpha-beta search to the end of the game.
+
+    Positions are remembered in a TranspositionTable by their Zobrist key.
+    The key doesn't hold the order of the deck, but within one game the deck
+    is always a prefix of the same deck, so the table is cleared for each
+    new position solved.
+    """
+    def __init__(self, table_size=1 << 14):
+        self.table = TranspositionTable(table_size)
+        self.nodes = 0
+
+    def solve(self, state, player):
+        """Returns the result of `player` in `state`: 1 for a win, 0 for a
+        loss and 0.5 for a draw.
+        """
+        self.table.clear()
+        return self._search(state, player, 0.0, 1.0)
+
+    def action_values(self, state, possible_actions):
+        """Returns the result of the player to move after each of
+        `possible_actions`.
+        """
+        player = state.current_player
+        self.table.clear()
+        return [self._search(state.generate_successor(action), player, 0.0, 1.0)
+                for action in possible_actions]
+
+    def _search(self, state, player, alpha, beta):
+        self.nodes += 1
+        possible_actions = state.get_possible_actions()
+        if not possible_actions:
+            return state.get_result(player)
+
+        key = state.zobrist_key()
+        entry = self.table.lookup(key)
+        best_id = None
+        if entry is not None:
+            if entry.flag == Bound.EXACT:
+                return entry.value
+            elif entry.flag == Bound.LOWER:
+                alpha = max(alpha, entry.value)
+            else:
+                beta = min(beta, entry.value)
+            if alpha >= beta:
+                return entry.value
+            best_id = entry.move
+
+        possible_actions.sort(key=capture_order)
+        if best_id is not None:
+            possible_actions.sort(key=lambda action: action_id(action) != best_id)
+
+        original_alpha, original_beta = alpha, beta
+        maximizing = state.current_player == player
+        value = -1.0 if maximizing else 2.0
+        best = None
+        for action in possible_actions:
+            result = self._search(state.generate_successor(action), player, alpha, beta)
+            if maximizing and result > value:
+                value, best = result, action
+                alpha = max(alpha, value)
+            elif not maximizing and result < value:
+                value, best = result, action
+                beta = min(beta, value)
+            if alpha >= beta:
+                break
+
+        if value <= original_alpha:
+            flag = Bound.UPPER
+        elif value >= original_beta:
+            flag = Bound.LOWER
+        else:
+            flag = Bound.EXACT
+        self.table.store(key, cards_left(state), value, flag, action_id(best))
+        return value
@@ -0,0 +1,314 @@
+import random
+import multiprocessing
+
+import numpy as np
+
+from .card import ALL_CARDS
+from .deck import Deck
+from .gamestate import GameState, GameStateCapture, GameStateException, \
+    GameAction, action_id, action_from_id, NUM_ACTIONS, PHASES
+from .tournament import load_agent_class, game_seed
+from .rng import python_rng
+
+
+_CARDS = len(ALL_CARDS)
+_FLAG_BYTES = 6*_CARDS // 8
+_MASK_BYTES = (NUM_ACTIONS + 7) // 8
+
+# An observation is a row of bytes, from the point of view of the observer:
+# flags of the cards of their hand, the table, the cards in play, the cards
+# they took, the cards the other player took and the cards they can't see
+# (the deck and the other hand, as in `copy_and_randomise`), then the deck
+# size, the phase, the number of Go calls and the size of the other hand.
+HAND, TABLE, IN_PLAY, TAKEN, OTHER_TAKEN, UNSEEN = \
+    (slice(i*_CARDS, (i+1)*_CARDS) for i in range(6))
+DECK_SIZE = 6*_CARDS
+PHASE = DECK_SIZE + 1
+GO_COUNT = DECK_SIZE + 2
+OTHER_HAND_SIZE = DECK_SIZE + 3
+OBSERVATION_SIZE = DECK_SIZE + 4
+
+
+def _card_bits(cards):
+    return sum(1 << card.id for card in cards)
+
+
+def observe(state, observer, out):
+    """Writes the observation of `state` by the player `observer` into the
+    uint8 array `out` of OBSERVATION_SIZE.
+    """
+    other = 1 - observer
+    in_play = []
+    if isinstance(state, GameStateCapture):
+        in_play.append(state.top_card)
+        paired_cards = state.paired_cards
+        if paired_cards is not None and paired_cards.paired_card is not None:
+            in_play += [paired_cards.card, paired_cards.paired_card]
+    bits = _card_bits(state.player_hands[observer]) | \
+        _card_bits(state.table_cards) << _CARDS | \
+        _card_bits(in_play) << 2*_CARDS | \
+        _card_bits(state.taken_cards[observer]) << 3*_CARDS | \
+        _card_bits(state.taken_cards[other]) << 4*_CARDS | \
+        state.unseen_cards(observer) << 5*_CARDS
+    out[:DECK_SIZE] = np.unpackbits(
+        np.frombuffer(bits.to_bytes(_FLAG_BYTES, 'little'), dtype=np.uint8),
+        bitorder='little')
+    out[DECK_SIZE] = len(state.deck)
+    out[PHASE] = PHASES.index(state.__class__)
+    out[GO_COUNT] = min(state.go_count, 255)
+    out[OTHER_HAND_SIZE] = len(state.player_hands[other])
+
+
+def unpack_mask(mask, out):
+    """Writes the bitmask of action ids `mask` into the bool array `out` of
+    NUM_ACTIONS.
+    """
+    out[:] = np.unpackbits(
+        np.frombuffer(mask.to_bytes(_MASK_BYTES, 'little'), dtype=np.uint8),
+        count=NUM_ACTIONS, bitorder='little')
+
+
+class GoStopEnv(object):
+    """A game as an environment stepped one action id at a time.
+
+    Without an `opponent` the caller plays both players, and each step is
+    observed by the player to move next. With an `opponent` Agent, the
+    caller plays `player` and the turns of the opponent are played within
+    `step`. The reward is the `get_result` at the end of the game of the
+    player who took the action, or of `player` with an opponent, and 0
+    before the end.
+
+    `reset` and `step` return the observation and the mask of the legal
+    action ids, written into `observation` and `mask`, which may be given
+    as views of larger buffers. Decks are shuffled with `rng`, the `random`
+    module by default.
+    """
+    def __init__(self, opponent=None, player=0, observation=None, mask=None,
+                 rng=None):
+        self.opponent = opponent
+        self.player = player
+        self.rng = random if rng is None else rng
+        self.state = None
+        self.observation = np.zeros(OBSERVATION_SIZE, dtype=np.uint8) \
+            if observation is None else observation
+        self.mask = np.zeros(NUM_ACTIONS, dtype=np.bool_) if mask is None else mask
+        self._legal = 0
+
+    @property
+    def done(self):
+        return self._legal == 0
+
+    def reset(self, seed=None):
+        """Deals a new game. If `seed` is given, the deck and the opponent
+        are given new random streams of `seed` first.
+        """
+        if seed is not None:
+            self.rng = python_rng(seed, 0)
+            if self.opponent is not None:
+                self.opponent.rng = python_rng(seed, 1)
+        deck = Deck()
+        deck.shuffle(self.rng)
+        self.state = GameState.new_game(deck=deck)
+        self._play_opponent()
+        self._legal = self.state.legal_action_mask()
+        self._observe(self.state.current_player)
+        return self.observation, self.mask
+
+    def step(self, action):
+        """Takes `action`, an action id or a GameAction, for the player to
+        move and returns the observation, the reward, whether the game is
+        over and the legal action mask.
+        """
+        if self.done:
+            raise GameStateException('The game is over, call reset')
+        if isinstance(action, GameAction):
+            action = action_id(action)
+        if not 0 <= action < NUM_ACTIONS or not self._legal >> action & 1:
+            raise ValueError('Illegal action {0}'.format(action))
+
+        player = self.state.current_player
+        self.state = self.state.generate_successor(action_from_id(action))
+        self._play_opponent()
+        if self.opponent is not None:
+            player = self.player
+        self._legal = self.state.legal_action_mask()
+        if self.done:
+            self._observe(player)
+            return self.observation, float(self.state.get_result(player)), \
+                True, self.mask
+        self._observe(self.state.current_player)
+        return self.observation, 0.0, False, self.mask
+
+    def _play_opponent(self):
+        if self.opponent is None:
+            return
+        state = self.state
+        while state.current_player != self.player:
+            possible_actions = state.get_possible_actions()
+            if not possible_actions:
+                break
+            state = state.generate_successor(
+                self.opponent.get_action(state, possible_actions))
+        self.state = state
+
+    def _observe(self, observer):
+        observe(self.state, observer, self.observation)
+        unpack_mask(self._legal, self.mask)
+
+
+def _buffers(shared, num_envs):
+    """Returns the observations, masks, rewards, dones and actions of
+    `num_envs` environments as views of the shared bytes `shared`.
+    """
+    data = np.frombuffer(shared, dtype=np.uint8)
+    rewards = data[:4*num_envs].view(np.float32)
+    actions = data[4*num_envs:8*num_envs].view(np.int32)
+    offset = 8*num_envs
+    observations = data[offset:offset + num_envs*OBSERVATION_SIZE]
+    offset += observations.size
+    masks = data[offset:offset + num_envs*NUM_ACTIONS]
+    offset += masks.size
+    dones = data[offset:offset + num_envs]
+    return (observations.reshape(num_envs, OBSERVATION_SIZE),
+            masks.view(np.bool_).reshape(num_envs, NUM_ACTIONS),
+            rewards, dones.view(np.bool_), actions)
+
+
+def _buffer_size(num_envs):
+    return num_envs*(8 + OBSERVATION_SIZE + NUM_ACTIONS + 1)
+
+
+def _make_envs(buffers, start, end, opponent, player):
+    observations, masks = buffers[:2]
+    return [GoStopEnv(load_agent_class(opponent)(opponent) if opponent else None,
+                      player, observations[i], masks[i])
+            for i in range(start, end)]
+
+
+def _reset(envs, start, seeds):
+    for i, env in enumerate(envs, start):
+        env.reset(None if seeds is None else seeds[i])
+
+
+def _step(envs, start, buffers):
+    """Steps each environment with its action of the shared actions,
+    resetting those whose game is over after recording their reward.
+    """
+    observations, masks, rewards, dones, actions = buffers
+    for i, env in enumerate(envs, start):
+        _, reward, done, _ = env.step(int(actions[i]))
+        rewards[i] = reward
+        dones[i] = done
+        if done:
+            env.reset()
+
+
+def _worker(connection, shared, num_envs, start, end, opponent, player):
+    buffers = _buffers(shared, num_envs)
+    envs = _make_envs(buffers, start, end, opponent, player)
+    while True:
+        command, argument = connection.recv()
+        try:
+            if command == 'reset':
+                _reset(envs, start, argument)
+            elif command == 'step':
+                _step(envs, start, buffers)
+            else:
+                break
+        except Exception as e:
+            connection.send(e)
+        else:
+            connection.send(None)
+    connection.close()
+
+
+class VectorEnv(object):
+    """`num_envs` environments stepped together, in this process or spread
+    over `processes` worker processes.
+
+    The opponent, if any, is given as an agent spec of `load_agent_class`.
+    Once reset with a seed, each environment has its own random streams,
+    so runs are the same whatever the number of processes. A game which
+    ends in `step` is reset at once, so the observation
+    returned for it is of the next game. The actions, observations, masks,
+    rewards and dones are kept in one block of shared memory which the
+    workers read and write, and the arrays returned are views of it,
+    overwritten by the next call.
+    """
+    def __init__(self, num_envs, opponent=None, player=0, processes=0):
+        if num_envs <= 0:
+            raise ValueError('Number of environments must be positive')
+        self.num_envs = num_envs
+        self._shared = multiprocessing.RawArray('B', _buffer_size(num_envs))
+        self._views = _buffers(self._shared, num_envs)
+        self.observations, self.masks, self.rewards, self.dones, \
+            self._actions = self._views
+        self.workers = []
+        if processes == 0:
+            self.envs = _make_envs(self._views, 0, num_envs, opponent, player)
+            return
+        self.envs = None
+        processes = min(processes or multiprocessing.cpu_count(), num_envs)
+        bounds = [num_envs*i // processes for i in range(processes + 1)]
+        for start, end in zip(bounds, bounds[1:]):
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_worker, daemon=True,
+                args=(worker_connection, self._shared, num_envs, start, end,
+                      opponent, player))
+            process.start()
+            worker_connection.close()
+            self.workers.append((process, connection))
+
+    def __len__(self):
+        return self.num_envs
+
+    def _call(self, command, argument):
+        for process, connection in self.workers:
+            connection.send((command, argument))
+        errors = [connection.recv() for process, connection in self.workers]
+        for error in errors:
+            if error is not None:
+                raise error
+
+    def reset(self, seed=None):
+        """Deals a new game in every environment, game i seeded from
+        `seed` and i if `seed` is given, and returns the observations and
+        the masks.
+        """
+        seeds = None
+        if seed is not None:
+            seeds = [game_seed(seed, i) for i in range(self.num_envs)]
+        if self.envs is not None:
+            _reset(self.envs, 0, seeds)
+        else:
+            self._call('reset', seeds)
+        return self.observations, self.masks
+
+    def step(self, actions):
+        """Takes the action id `actions[i]` in environment i and returns the
+        observations, rewards, dones and masks.
+        """
+        actions = np.asarray(actions)
+        if actions.shape != (self.num_envs,):
+            raise ValueError('One action per environment is needed')
+        self._actions[:] = actions
+        if self.envs is not None:
+            _step(self.envs, 0, self._views)
+        else:
+            self._call('step', None)
+        return self.observations, self.rewards, self.dones, self.masks
+
+    def close(self):
+        for process, connection in self.workers:
+            connection.send(('close', None))
+            connection.close()
+        for process, connection in self.workers:
+            process.join()
+        self.workers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,36 +1,81 @@
-import copy
 import random
-import logging
-from PIL import Image
-from .build_a_image import get_concat_h, add_number
 
-
-from .hand import TableCards, TakenCards, Hand
+from .card import Card, ALL_CARDS
+from .hand import TableCards, TakenCards, Hand, LIST_CONTAINERS
 from .deck import Deck
+from .bitboard import card_bits, iter_bits
+from . import zobrist
+
+# Byte standing for no card or no player in encoded states
+_NONE = 255
 
-logging.basicConfig(level=logging.INFO)
 
 class GameStateException(Exception):
     pass
 
 
+class _Container(object):
+    """A card container attribute of GameState. The descriptor has no
+    `__get__`, so reading the attribute is a plain instance attribute read,
+    but assigning it forgets the unseen cards and the Zobrist key cached
+    from the previous container. Changes made in place through the methods
+    of the card lists are noticed from their versions instead, see
+    `GameState._check_caches`.
+    """
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __set__(self, state, value):
+        state.__dict__[self.name] = value
+        state._unseen = None
+        state._cards_key = None
+
+
 class GameState(object):
     """The GameState specifies the complete state of the game, including the
     player's hands, cards on the table and scoring.
+
+    A state created from `prev_state` shares the deck and the card lists
+    with it, and copies a container only when it is changed through
+    `_writable`. Containers of a state which has successors must not be
+    changed in place.
+
+    Each state also keeps, for each player, the bitboard of the cards that
+    player can't see, updated as cards are revealed, and the Zobrist key of
+    the locations of the cards, updated as cards move. Both are recomputed
+    from the cards once the deck, the table cards, the hands or the taken
+    cards are assigned by hand. They are also recomputed once a card list is
+    changed in place through its methods, such as
+    `state.player_hands[0].pop()`; a hand or taken cards replaced within the
+    `player_hands` or `taken_cards` lists, or `cards` changed directly, is
+    not noticed, so assign the whole list again.
     """
+    deck = _Container()
+    table_cards = _Container()
+    player_hands = _Container()
+    taken_cards = _Container()
+
     def __init__(self, prev_state=None):
         self.number_of_players = 2
         self.winner = None
 
         if prev_state is not None:
+            self.go_count = prev_state.go_count
             self.current_player = prev_state.current_player
-            self.deck = Deck(cards=prev_state.deck)
-            self.table_cards = TableCards(*prev_state.table_cards)
-            self.player_hands = \
-                [Hand(*cards) for cards in prev_state.player_hands]
-            self.taken_cards = \
-                [TakenCards(*cards) for cards in prev_state.taken_cards]
+            self.deck = prev_state.deck
+            self.table_cards = prev_state.table_cards
+            self.player_hands = list(prev_state.player_hands)
+            self.taken_cards = list(prev_state.taken_cards)
+            # The containers hold the same cards, so the caches still hold
+            prev_state._check_caches()
+            self._unseen = prev_state._unseen
+            self._cards_key = prev_state._cards_key
+            self._cache_version = prev_state._cache_version
+            # One bit per container still shared with `prev_state`, in the
+            # order deck, table cards, player hands, taken cards
+            self._shared = (1 << (2 + 2*self.number_of_players)) - 1
         else:
+            self.go_count = 0
             self.current_player = 0
             self.deck = Deck()
             self.table_cards = TableCards()
@@ -38,12 +83,76 @@ class GameState(object):
             [Hand() for i in range(0, self.number_of_players)]
             self.taken_cards = \
                 [TakenCards() for i in range(0, self.number_of_players)]
+            self._shared = 0
+            self._unseen = None
+            self._cards_key = None
+            self._cache_version = None
+
+    def _writable(self, name, player=None):
+        """Returns the container `name` (of `player` for `player_hands` and
+        `taken_cards`), copying it first if it is still shared with the
+        previous state.
+        """
+        if name == 'deck':
+            bit = 1
+        elif name == 'table_cards':
+            bit = 2
+        elif name == 'player_hands':
+            bit = 4 << player
+        else:
+            bit = 4 << (self.number_of_players + player)
+
+        if player is None:
+            if self._shared & bit:
+                self._shared ^= bit
+                # A copy of the same cards, which keeps the caches
+                self.__dict__[name] = self.__dict__[name].copy()
+            return self.__dict__[name]
+
+        containers = getattr(self, name)
+        if self._shared & bit:
+            self._shared ^= bit
+            containers[player] = containers[player].copy()
+        return containers[player]
+
+    def _container_version(self):
+        """Returns the number of cards in the deck and the sum of the
+        versions of the card lists, which changes with every change made in
+        place through their methods.
+        """
+        containers = self.__dict__
+        version = containers['table_cards']._version
+        for cards in containers['player_hands']:
+            version += cards._version
+        for cards in containers['taken_cards']:
+            version += cards._version
+        return len(containers['deck']), version
+
+    def _check_caches(self):
+        """Forgets the cached unseen cards and Zobrist key if a card list
+        was changed in place since they were cached.
+        """
+        version = self._container_version()
+        if version != self._cache_version:
+            self._unseen = None
+            self._cards_key = None
+            self._cache_version = version
+
+    def _cards_changed(self):
+        """Records that the caches were updated along with the changes made
+        to the card lists by `generate_successor`.
+        """
+        self._cache_version = self._container_version()
 
     def __eq__(self, other):
         if other is None:
             return False
+        if not self.__class__ == other.__class__:
+            return False
         if not self.current_player == other.current_player:
             return False
+        if not self.go_count == other.go_count:
+            return False
         if not self.deck == other.deck:
             return False
         if not self.table_cards == other.table_cards:
@@ -56,28 +165,125 @@ class GameState(object):
         return True
 
     def __hash__(self):
-        return hash((self.current_player, self.deck, self.table_cards,
-                     zip(self.player_hands), zip(self.taken_cards)))
+        return hash(self.zobrist_key())
+
+    def zobrist_key(self):
+        """Returns the 64-bit Zobrist key of the location of every card, the
+        current player, the phase and the number of Go calls. The order of
+        the deck is not part of the key.
+        """
+        self._check_caches()
+        if self._cards_key is None:
+            key = zobrist.cards_key(self.deck, zobrist.DECK) ^ \
+                zobrist.cards_key(self.table_cards, zobrist.TABLE)
+            for player in range(self.number_of_players):
+                key ^= zobrist.cards_key(self.player_hands[player],
+                                         zobrist.hand(player)) ^ \
+                    zobrist.cards_key(self.taken_cards[player],
+                                      zobrist.taken(player))
+            if getattr(self, 'top_card', None) is not None:
+                key ^= zobrist.CARD_KEYS[self.top_card.id][zobrist.IN_PLAY]
+            paired_cards = getattr(self, 'paired_cards', None)
+            if paired_cards is not None and paired_cards.paired_card is not None:
+                key ^= zobrist.cards_key(
+                    [paired_cards.card, paired_cards.paired_card],
+                    zobrist.IN_PLAY)
+            self._cards_key = key
+        return self._cards_key ^ \
+            zobrist.PLAYER_KEYS[self.current_player] ^ \
+            zobrist.PHASE_KEYS[PHASES.index(self.__class__)] ^ \
+            zobrist.GO_KEYS[min(self.go_count, zobrist.MAX_GO_COUNT)]
+
+    def _move(self, card, source, destination):
+        """Records in the Zobrist key that `card` moved from the location
+        `source` to `destination`.
+        """
+        if self._cards_key is not None:
+            keys = zobrist.CARD_KEYS[card.id]
+            self._cards_key ^= keys[source] ^ keys[destination]
 
     def __str__(self):
         out = 'Table: {0}\n'.format(str(self.table_cards))
-        create_image(self.table_cards, 'html/table.png', overlap=0)
         for i in range(0, self.number_of_players):
             out += 'Hand: {0}\n'.format(str(self.player_hands[i]))
             out += 'Taken cards: {0}\n'.format(str(self.taken_cards[i]))
             out += 'Score: {0}\n'.format(self.taken_cards[i].score)
-            create_image(self.player_hands[i], f'html/hand{i}.png', number=True)
-            create_image(self.taken_cards[i], f'html/taken{i}.png')
-        
         return out
 
+    def encode(self):
+        """Returns the state as a compact byte string of card ids, which
+        `GameState.decode` turns back into an equal state.
+        """
+        paired_cards = getattr(self, 'paired_cards', None)
+        top_card = getattr(self, 'top_card', None)
+        data = bytearray((
+            PHASES.index(self.__class__),
+            self.current_player,
+            _NONE if self.winner is None else self.winner,
+            _NONE if top_card is None else top_card.id,
+            _NONE if paired_cards is None else paired_cards.card.id,
+            _NONE if paired_cards is None or paired_cards.paired_card is None
+            else paired_cards.paired_card.id,
+            self.go_count))
+        for cards in [self.deck, self.table_cards] + \
+                self.player_hands + self.taken_cards:
+            data.append(len(cards))
+            data.extend(card.id for card in cards)
+        return bytes(data)
+
     @staticmethod
-    def new_game(number_of_players=2):
+    def decode(data, containers=LIST_CONTAINERS):
+        """Returns the state encoded in `data` by `GameState.encode`, with
+        card lists of the classes of `containers`.
+        """
+        def card(card_id):
+            return None if card_id == _NONE else Card.from_id(card_id)
+
+        state = PHASES[data[0]]()
+        state.current_player = data[1]
+        state.winner = None if data[2] == _NONE else data[2]
+        if isinstance(state, GameStateCapture):
+            state.top_card = card(data[3])
+            state.paired_cards = None if data[4] == _NONE else \
+                GameActionPlayCard(card(data[4]), card(data[5]))
+
+        state.go_count = data[6]
+
+        lists = []
+        i = 7
+        while i < len(data):
+            lists.append([Card.from_id(card_id)
+                          for card_id in data[i+1:i+1+data[i]]])
+            i += 1 + data[i]
+        n = state.number_of_players
+        state.deck = Deck(cards=lists[0])
+        state.table_cards = containers.table_cards(*lists[1])
+        state.player_hands = [containers.hand(*cards)
+                              for cards in lists[2:2+n]]
+        state.taken_cards = [containers.taken_cards(*cards)
+                             for cards in lists[2+n:2+2*n]]
+        return state
+
+    @staticmethod
+    def new_game(number_of_players=2, deck=None, rng=random,
+                 containers=LIST_CONTAINERS):
         """Reset the game state for the beginning of a new game, and deal
-        cards to each player.
+        cards to each player from `deck`, or from a deck shuffled with `rng`.
+        Cards are dealt from the end of the deck. The hands, taken cards
+        and table cards are of the classes of `containers`, such as
+        `bitboard.BIT_CONTAINERS`, and so are those of every successor.
         """
         state = GameStatePlay()
-        state.deck.shuffle()
+        if containers is not LIST_CONTAINERS:
+            state.table_cards = containers.table_cards()
+            state.player_hands = [containers.hand()
+                                  for player in range(state.number_of_players)]
+            state.taken_cards = [containers.taken_cards()
+                                 for player in range(state.number_of_players)]
+        if deck is None:
+            state.deck.shuffle(rng)
+        else:
+            state.deck = Deck(cards=deck)
 
         for i in range(0, 2):
             for p in range(0, state.number_of_players):
@@ -91,30 +297,88 @@ class GameState(object):
             state.table_cards += state.deck.pop()
             state.table_cards += state.deck.pop()
 
+        state.unseen_cards(0)
+        state.zobrist_key()
         return state
 
-    def copy_and_randomise(self, observer):
-        """Returns a deep copy of the game state, randomising any information
-        which is not visible to the specified observing player.
+    def unseen_cards(self, observer):
+        """Returns the bitboard of the cards `observer` can't see: the hands
+        of the other players and the deck.
+        """
+        self._check_caches()
+        if self._unseen is None:
+            deck = card_bits(self.deck)
+            hands = [card_bits(hand) for hand in self.player_hands]
+            all_hands = 0
+            for hand in hands:
+                all_hands |= hand
+            self._unseen = tuple(deck | all_hands & ~hand for hand in hands)
+        return self._unseen[observer]
+
+    def _reveal(self, card):
+        """Records that `card` is now seen by every player."""
+        if self._unseen is not None:
+            bit = 1 << card.id
+            self._unseen = tuple(unseen & ~bit for unseen in self._unseen)
+
+    def _clone(self):
+        return self.__class__(prev_state=self)
+
+    def copy_and_randomise(self, observer, rng=random, containers=None):
+        """Returns a copy of the game state, randomising with `rng` any
+        information which is not visible to the specified observing player.
         """
-        state = self.__class__(prev_state=self)
-
-        # The observer can see his own hand, the cards on the table, and any
-        # cards captured by other players
-        seen_cards = [card for card in state.player_hands[observer]] + \
-                     [card for card in state.table_cards] + \
-                     [card for tc in state.taken_cards for card in tc]
-        unseen_cards = [card for card in Deck()
-                        if card not in seen_cards or seen_cards.remove(card)]
-
-        # Randomly deal the unseen cards to the other players
-        random.shuffle(unseen_cards)
+        return self.copy_and_randomise_batch(observer, 1, rng, containers)[0]
+
+    def copy_and_randomise_batch(self, observer, count, rng=random,
+                                 containers=None):
+        """Returns `count` copies of the game state, each randomising with
+        `rng` the hands of the other players and the order of the deck,
+        which are not visible to the specified observing player. The copies
+        have card lists of the classes of `containers`, see `determinize`.
+        """
+        # The observer can see his own hand, the cards on the table, the top
+        # and paired cards and any cards captured by other players
+        unseen_cards = list(iter_bits(self.unseen_cards(observer)))
+
+        states = []
+        for i in range(count):
+            # Sorting by random keys shuffles in C, twice as fast as shuffle
+            unseen_cards.sort(key=lambda card: rng.random())
+            states.append(self.determinize(observer, unseen_cards,
+                                           containers))
+
+        return states
+
+    def determinize(self, observer, cards, containers=None):
+        """Returns a copy of the game state in which the cards the observing
+        player can't see are `cards`: the hands of the other players in
+        turn, then the deck, whose last card is drawn first. The card lists
+        of the copy are of the classes of `containers`, or of the classes of
+        the card lists of this state by default.
+        """
+        state = self._clone()
+        if containers is not None:
+            state.table_cards = containers.table_cards(*self.table_cards)
+            state.taken_cards = [containers.taken_cards(*cards)
+                                 for cards in self.taken_cards]
+            state.player_hands[observer] = \
+                containers.hand(*self.player_hands[observer])
+            state._shared = 0
+        start = 0
         for player in range(0, self.number_of_players):
             if player != observer:
-                num_cards = len(state.player_hands[player])
-                state.player_hands[player] = Hand(*unseen_cards[:num_cards])
-                unseen_cards = unseen_cards[num_cards:]
-
+                hand = self.player_hands[player]
+                end = start + len(hand)
+                hand_class = hand.__class__ if containers is None \
+                    else containers.hand
+                state.player_hands[player] = hand_class(*cards[start:end])
+                state._shared &= ~(4 << player)
+                start = end
+        state.deck = Deck(cards=cards[start:])
+        state._shared &= ~1
+        state._unseen = None
+        state._cards_key = None
         return state
 
     def get_result(self, player):
@@ -130,6 +394,30 @@ class GameState(object):
         """Returns a list of possible actions for the current agent."""
         raise NotImplementedError()
 
+    def legal_action_mask(self):
+        """Returns the bitmask of the ids of the possible actions, see
+        `action_id`.
+        """
+        raise NotImplementedError()
+
+    def iter_actions(self, key=None):
+        """Yields the possible actions for the current agent one at a time,
+        or all of them in the order of `key`, such as `capture_order`.
+        """
+        if key is not None:
+            return iter(sorted(self.get_possible_actions(), key=key))
+        return self._iter_actions()
+
+    def _iter_actions(self):
+        raise NotImplementedError()
+
+    def sample_action(self, rng=random):
+        """Returns a possible action chosen uniformly with `rng` without
+        listing them, the same one as `rng.choice(get_possible_actions())`,
+        or None if there is none.
+        """
+        raise NotImplementedError()
+
     def generate_successor(self, action):
         """Returns the successor state after the current agent takes `action`.
         """
@@ -150,15 +438,22 @@ class GameStatePlay(GameState):
 
     def get_possible_actions(self):
         """Returns a list of possible actions for the current agent."""
-        possible_actions = []
+        return _play_actions(self.player_hands[self.current_player],
+                             self.table_cards)
+
+    def legal_action_mask(self):
+        mask = 0
         for card in self.player_hands[self.current_player]:
-            paired_cards = self.table_cards.get_paired_cards(card)
-            if paired_cards == []:
-                possible_actions.append(GameActionPlayCard(card))
-            else:
-                for paired_card in paired_cards:
-                    possible_actions.append(GameActionPlayCard(card, paired_card))
-        return possible_actions
+            mask |= _play_action_mask(card, self.table_cards)
+        return mask
+
+    def _iter_actions(self):
+        for card in self.player_hands[self.current_player]:
+            yield from _iter_play_actions(card, self.table_cards)
+
+    def sample_action(self, rng=random):
+        return _sample_play_action(rng, self.player_hands[self.current_player],
+                                   self.table_cards)
 
     def generate_successor(self, action):
         """Returns the successor state after the current agent takes `action`.
@@ -167,19 +462,28 @@ class GameStatePlay(GameState):
 
         if action is not None:
             # Remove the played card from the player's hand
-            state.player_hands[state.current_player].remove(action.card)
+            state._writable('player_hands', state.current_player).remove(action.card)
 
             if action.paired_card is not None:
                 # Remove paired card from the table
-                state.table_cards.remove(action.paired_card)
+                state._writable('table_cards').remove(action.paired_card)
+                state._move(action.card, zobrist.hand(state.current_player),
+                            zobrist.IN_PLAY)
+                state._move(action.paired_card, zobrist.TABLE, zobrist.IN_PLAY)
             else:
                 # No match; add the card to the table
-                state.table_cards += action.card
+                table_cards = state._writable('table_cards')
+                table_cards += action.card
+                state._move(action.card, zobrist.hand(state.current_player),
+                            zobrist.TABLE)
 
         state.paired_cards = action
-        state.top_card = state.deck.pop()
-        print(state.top_card.month, state.top_card.order_in_month)
-        create_image([state.top_card], 'html/top_card.png')
+        state.top_card = state._writable('deck').pop()
+        state._move(state.top_card, zobrist.DECK, zobrist.IN_PLAY)
+        if action is not None:
+            state._reveal(action.card)
+        state._reveal(state.top_card)
+        state._cards_changed()
         return state
 
 
@@ -192,14 +496,20 @@ class GameActionPlayCard(GameAction):
         super(GameActionPlayCard, self).__init__()
         self.card = card
         self.paired_card = paired_card
+        self._hash = hash((card, paired_card))
 
     def __eq__(self, other):
-        if other is None:
+        if self is other:
+            return True
+        if not isinstance(other, GameActionPlayCard):
             return False
         else:
             return self.card == other.card and \
                    self.paired_card == other.paired_card
 
+    def __hash__(self):
+        return self._hash
+
     def __str__(self):
         if self.paired_card:
             out = '{}, {}'.format(str(self.card), str(self.paired_card))
@@ -215,6 +525,9 @@ class GameActionGo(GameAction):
         else:
             return False
 
+    def __hash__(self):
+        return hash(GameActionGo)
+
     def __str__(self):
         return 'Go'
 
@@ -226,10 +539,142 @@ class GameActionStop(GameAction):
         else:
             return False
 
+    def __hash__(self):
+        return hash(GameActionStop)
+
     def __str__(self):
         return 'Stop'
 
 
+# Canonical action ids: a card played alone is `5*card.id`, a card played
+# on a table card is `5*card.id + 1 + k` where k is the slot of the table
+# card in its month, and Go and Stop come last. Actions are interned, so
+# the possible actions of every state are taken from `ACTIONS`.
+GO_ACTION_ID = 5*len(ALL_CARDS)
+STOP_ACTION_ID = GO_ACTION_ID + 1
+NUM_ACTIONS = STOP_ACTION_ID + 1
+
+
+def _make_actions():
+    actions = []
+    for card in ALL_CARDS:
+        actions.append(GameActionPlayCard(card))
+        # A card is never paired with itself in a game, but states set up
+        # by hand may hold a card twice
+        for paired_card in ALL_CARDS[card.id - card.id % 4:][:4]:
+            actions.append(GameActionPlayCard(card, paired_card))
+    actions += [GameActionGo(), GameActionStop()]
+    return tuple(actions)
+
+
+# The action of each id
+ACTIONS = _make_actions()
+_GO = ACTIONS[GO_ACTION_ID]
+# The actions playing each card with each card of its month, by card id
+# and then by the position of the paired card in the month
+_PAIR_ACTIONS = tuple(ACTIONS[5*card_id + 1:5*card_id + 5]
+                      for card_id in range(len(ALL_CARDS)))
+_STOP = ACTIONS[STOP_ACTION_ID]
+
+
+def action_id(action):
+    """Returns the canonical id of `action`."""
+    if isinstance(action, GameActionPlayCard):
+        if action.paired_card is None:
+            return 5*action.card.id
+        return 5*action.card.id + 1 + action.paired_card.id % 4
+    elif isinstance(action, GameActionGo):
+        return GO_ACTION_ID
+    elif isinstance(action, GameActionStop):
+        return STOP_ACTION_ID
+    raise ValueError('Unknown action {0!r}'.format(action))
+
+
+def action_from_id(action_id):
+    """Returns the interned action of the id `action_id`."""
+    if not 0 <= action_id < NUM_ACTIONS:
+        raise ValueError('Invalid action id {0}'.format(action_id))
+    return ACTIONS[action_id]
+
+
+def actions_from_mask(mask):
+    """Returns the actions of the ids set in the bitmask `mask`, by id."""
+    actions = []
+    while mask:
+        low = mask & -mask
+        actions.append(action_from_id(low.bit_length() - 1))
+        mask ^= low
+    return actions
+
+
+def _play_actions(cards, table_cards):
+    possible_actions = []
+    months = table_cards.month_cards()
+    for card in cards:
+        paired_cards = months[card.month]
+        if not paired_cards:
+            possible_actions.append(ACTIONS[5*card.id])
+        else:
+            actions = _PAIR_ACTIONS[card.id]
+            possible_actions += [actions[paired_card.id % 4]
+                                 for paired_card in paired_cards]
+    return possible_actions
+
+
+def _iter_play_actions(card, table_cards):
+    if table_cards.month_count(card.month) == 0:
+        yield ACTIONS[5*card.id]
+    else:
+        for paired_card in table_cards.get_paired_cards(card):
+            yield ACTIONS[5*card.id + 1 + paired_card.id % 4]
+
+
+def _sample_play_action(rng, cards, table_cards):
+    if not cards:
+        return None
+    months = table_cards.month_cards()
+    # A card pairing with nothing is one action
+    counts = [len(months[card.month]) or 1 for card in cards]
+    index = rng.randrange(sum(counts))
+    for card, count in zip(cards, counts):
+        if index < count:
+            break
+        index -= count
+    paired_cards = months[card.month]
+    if not paired_cards:
+        return ACTIONS[5*card.id]
+    return _PAIR_ACTIONS[card.id][paired_cards[index].id % 4]
+
+
+# The rank of the best group of the cards each action captures, Stop first
+# since it wins the game and Go last, for `iter_actions` to try the most
+# valuable captures first.
+_CAPTURE_ORDER = tuple(
+    0 if action.__class__ == GameActionStop else
+    7 if action.__class__ == GameActionGo else
+    6 if action.paired_card is None else
+    min(action.card.groups + action.paired_card.groups)
+    for action in ACTIONS)
+
+
+def capture_order(action):
+    """The key ordering actions by the most valuable card they capture:
+    brights, then animals, ribbons and junk, and actions capturing nothing
+    last.
+    """
+    return _CAPTURE_ORDER[action_id(action)]
+
+
+def _play_action_mask(card, table_cards):
+    paired_cards = table_cards.get_paired_cards(card)
+    if paired_cards == []:
+        return 1 << 5*card.id
+    mask = 0
+    for paired_card in paired_cards:
+        mask |= 1 << 5*card.id + 1 + paired_card.id % 4
+    return mask
+
+
 class GameStateCapture(GameState):
     def __str__(self):
         out = super().__str__()
@@ -237,42 +682,24 @@ class GameStateCapture(GameState):
         out += 'Paired cards: {0}\n'.format(self.paired_cards)
         return out
 
-    def copy_and_randomise(self, observer):
-        """Returns a deep copy of the game state, randomising any information
-        which is not visible to the specified observing player.
-        """
-        state = self.__class__(prev_state=self)
+    def _clone(self):
+        state = super(GameStateCapture, self)._clone()
         state.top_card = self.top_card
         state.paired_cards = self.paired_cards
-
-        # The observer can see his own hand, the cards on the table, and any
-        # cards captured by other players
-        seen_cards = [card for card in state.player_hands[observer]] + \
-                     [card for card in state.table_cards] + \
-                     [card for tc in state.taken_cards for card in tc]
-        unseen_cards = [card for card in Deck()
-                        if card not in seen_cards or seen_cards.remove(card)]
-
-        # Randomly deal the unseen cards to the other players
-        random.shuffle(unseen_cards)
-        for player in range(0, self.number_of_players):
-            if player != observer:
-                num_cards = len(state.player_hands[player])
-                state.player_hands[player] = Hand(*unseen_cards[:num_cards])
-                unseen_cards = unseen_cards[num_cards:]
-
         return state
 
     def get_possible_actions(self):
         """Returns a list of possible actions for the current agent."""
-        possible_actions = []
-        paired_cards = self.table_cards.get_paired_cards(self.top_card)
-        if paired_cards == []:
-            possible_actions.append(GameActionPlayCard(self.top_card))
-        else:
-            for paired_card in paired_cards:
-                possible_actions.append(GameActionPlayCard(self.top_card, paired_card))
-        return possible_actions
+        return _play_actions((self.top_card,), self.table_cards)
+
+    def legal_action_mask(self):
+        return _play_action_mask(self.top_card, self.table_cards)
+
+    def _iter_actions(self):
+        return _iter_play_actions(self.top_card, self.table_cards)
+
+    def sample_action(self, rng=random):
+        return _sample_play_action(rng, (self.top_card,), self.table_cards)
 
     def generate_successor(self, action):
         """Returns the successor state after the current agent takes `action`.
@@ -287,27 +714,34 @@ class GameStateCapture(GameState):
 
         # If the card is paired with one from the table, add cards to captures
         # Otherwise just add the played card to the table
+        taken = zobrist.taken(state.current_player)
         if self.paired_cards.paired_card is not None:
-            state.taken_cards[state.current_player] += self.paired_cards.card
-            state.taken_cards[state.current_player] += self.paired_cards.paired_card
+            taken_cards = state._writable('taken_cards', state.current_player)
+            taken_cards += self.paired_cards.card
+            taken_cards += self.paired_cards.paired_card
+            state._move(self.paired_cards.card, zobrist.IN_PLAY, taken)
+            state._move(self.paired_cards.paired_card, zobrist.IN_PLAY, taken)
 
         # Deck card and table cards
         if action is not None:
             if action.paired_card is not None:
                 # Remove paired card from the table
-                state.table_cards.remove(action.paired_card)
+                state._writable('table_cards').remove(action.paired_card)
 
                 # Add matching cards to captures
-                state.taken_cards[state.current_player] += action.card
-                state.taken_cards[state.current_player] += action.paired_card
+                taken_cards = state._writable('taken_cards', state.current_player)
+                taken_cards += action.card
+                taken_cards += action.paired_card
+                state._move(action.card, zobrist.IN_PLAY, taken)
+                state._move(action.paired_card, zobrist.TABLE, taken)
             else:
                 # Add the card to the table
-                state.table_cards += action.card
+                table_cards = state._writable('table_cards')
+                table_cards += action.card
+                state._move(action.card, zobrist.IN_PLAY, zobrist.TABLE)
+        state._cards_changed()
 
-        total_score = 0
-        for i, s in state.taken_cards[state.current_player].score:
-            total_score += s
-        if total_score >= 5:
+        if state.taken_cards[state.current_player].points >= 5:
             state = GameStateGoStop(prev_state=state)
         else:
             # Next player's turn
@@ -319,15 +753,31 @@ class GameStateGoStop(GameState):
     def get_possible_actions(self):
         """Returns a list of possible actions for the current agent."""
         if len(self.deck) > 0:
-            return [GameActionGo(), GameActionStop()]
+            return [_GO, _STOP]
         else:
-            return [GameActionStop()]
+            return [_STOP]
+
+    def legal_action_mask(self):
+        if len(self.deck) > 0:
+            return 1 << GO_ACTION_ID | 1 << STOP_ACTION_ID
+        return 1 << STOP_ACTION_ID
+
+    def _iter_actions(self):
+        return iter(self.get_possible_actions())
+
+    def sample_action(self, rng=random):
+        if len(self.deck) > 0:
+            return (_GO, _STOP)[rng.randrange(2)]
+        # Draw as random.choice does from one action, to keep seeded games the same
+        rng.randrange(1)
+        return _STOP
 
     def generate_successor(self, action):
         """Returns the successor state after the current agent takes `action`.
         """
         if type(action) == GameActionGo:
             state = GameStatePlay(prev_state=self)
+            state.go_count += 1
             state.current_player = (state.current_player+1) % state.number_of_players
         else:
             state = GameStateEnd(prev_state=self)
@@ -340,25 +790,21 @@ class GameStateEnd(GameState):
         """Returns a list of possible actions for the current agent."""
         return []
 
+    def legal_action_mask(self):
+        return 0
+
+    def _iter_actions(self):
+        return iter(())
+
+    def sample_action(self, rng=random):
+        return None
+
     def generate_successor(self, action):
         """Returns the successor state after the current agent takes `action`.
         """
         return None
 
-def create_image(card_list, image_name="html/gostop.png", number=False, overlap=50):
-    images = []
-    for i, card in enumerate(card_list):
-        img = Image.open(f"images/{card.month-1:x}{card.order_in_month}.png")
-        if number:
-            img = add_number(img, i) 
-        images.append(img)
-    
-    if len(images) == 0:
-        logging.warning("Empty image")
-        dst_image = Image.new('RGB', (1,1))
-    else:
-        dst_image = images.pop(0)
-        for i in images:
-            dst_image = get_concat_h(dst_image, i, overlap)
 
-    dst_image.save(image_name)
\ No newline at end of file
+# The phases of the game, numbered by their index in encoded states, keys
+# and observations
+PHASES = (GameStatePlay, GameStateCapture, GameStateGoStop, GameStateEnd)
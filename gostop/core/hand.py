@@ -1,7 +1,7 @@
-from collections import defaultdict, Counter
+from collections import defaultdict, Counter, namedtuple
 
 from .utils import _
-from .card import Group, \
+from .card import Group, ALL_CARDS, \
     BUSH_WARBLER, CUCKOO, GEESE, PINE_RED_POEM, PLUM_RED_POEM, \
     CHERRY_RED_POEM, PEONY_BLUE_POEM, CHRYSANTHEMUM_BLUE_PEOM, MAPLE_BLUE_POEM, \
     WISTERIA_RED, IRIS_RED, BUSH_CLOVER_RED, \
@@ -9,6 +9,10 @@ from .card import Group, \
 
 
 class CardList(object):
+    # The number of changes made through the methods below, for a game
+    # state to notice its card lists were changed in place
+    _version = 0
+
     def __init__(self, *cards):
         self.cards = list(cards)
 
@@ -25,6 +29,7 @@ class CardList(object):
 
     def __iadd__(self, card):
         self.cards.append(card)
+        self._version += 1
         return self
 
     def __add__(self, other):
@@ -45,20 +50,36 @@ class CardList(object):
         return NotImplemented
 
     def __hash__(self):
-        return hash(tuple(sorted(self.cards)))
+        return hash(frozenset(self.cards))
 
     def __iter__(self):
         return iter(self.cards)
 
+    def copy(self):
+        return self.__class__(*self.cards)
+
+    def index(self, card):
+        return self.cards.index(card)
+
+    def insert(self, index, card):
+        self.cards.insert(index, card)
+        self._version += 1
+
     def remove(self, card):
-        self.cards.remove(card)
+        """Removes `card` and returns the index it had."""
+        index = self.cards.index(card)
+        del self.cards[index]
+        self._version += 1
+        return index
 
     def pop(self):
+        self._version += 1
         return self.cards.pop()
 
     def clear(self):
         while len(self.cards) > 0:
             self.cards.pop()
+        self._version += 1
 
     def split_by_month(self):
         month_cards = defaultdict(list)
@@ -69,11 +90,8 @@ class CardList(object):
     def split_by_group(self):
         group_cards = defaultdict(list)
         for card in self.cards:
-            if isinstance(card.group, tuple):
-                for group in card.group:
-                    group_cards[group].append(card)
-            else:
-                group_cards[card.group].append(card)
+            for group in card.groups:
+                group_cards[group].append(card)
         return group_cards
 
 
@@ -92,89 +110,277 @@ class Hand(CardList):
         return scores
 
 
+_BIRDS = (BUSH_WARBLER, CUCKOO, GEESE)
+_RED_POEM_RIBBONS = (PINE_RED_POEM, PLUM_RED_POEM, CHERRY_RED_POEM)
+_BLUE_POEM_RIBBONS = (PEONY_BLUE_POEM, CHRYSANTHEMUM_BLUE_PEOM, MAPLE_BLUE_POEM)
+_RED_RIBBONS = (WISTERIA_RED, IRIS_RED, BUSH_CLOVER_RED)
+
+
+def _card_counters(card):
+    """Returns the counts of TakenCards which `card` adds one to."""
+    counters = []
+    for group in card.groups:
+        if group == Group.JUNK:
+            counters.append('junk')
+        elif group == Group.JUNK_2:
+            counters.append('junk_2')
+        elif group == Group.RIBBON:
+            counters.append('ribbons')
+            if card in _RED_POEM_RIBBONS:
+                counters.append('red_poem_ribbons')
+            elif card in _BLUE_POEM_RIBBONS:
+                counters.append('blue_poem_ribbons')
+            elif card in _RED_RIBBONS:
+                counters.append('red_ribbons')
+        elif group == Group.ANIMAL:
+            counters.append('animals')
+            if card in _BIRDS:
+                counters.append('birds')
+        elif group == Group.BRIGHT:
+            counters.append('brights')
+    if card is RAIN:
+        counters.append('has_rain')
+    elif card is CUP:
+        counters.append('has_cup')
+    return tuple(counters)
+
+
+# The counts each card adds one to, by card id
+_CARD_COUNTERS = tuple(_card_counters(card) for card in ALL_CARDS)
+
+
 class TakenCards(CardList):
+    """The cards captured by a player.
+
+    The counts the score depends on are updated as cards are added and
+    removed, so reading `score` does not go through the cards; `has_rain`
+    and `has_cup` count 0 or 1. Changing `cards` directly bypasses the
+    counts.
+    """
+    # The counts the score depends on
+    COUNTERS = ('brights', 'has_rain', 'animals', 'birds', 'ribbons',
+                'red_poem_ribbons', 'blue_poem_ribbons', 'red_ribbons',
+                'junk', 'junk_2', 'has_cup')
+
+    def __init__(self, *cards):
+        super(TakenCards, self).__init__(*cards)
+        self._recount()
+
+    def _recount(self):
+        for counter in self.COUNTERS:
+            setattr(self, counter, 0)
+        for card in self:
+            self._count(card, 1)
+
+    def _count(self, card, n):
+        counts = self.__dict__
+        for counter in _CARD_COUNTERS[card.id]:
+            counts[counter] += n
+
+    def __iadd__(self, card):
+        super(TakenCards, self).__iadd__(card)
+        # _count inlined, as cards are taken on every capture of a rollout
+        counts = self.__dict__
+        for counter in _CARD_COUNTERS[card.id]:
+            counts[counter] += 1
+        return self
+
+    def insert(self, index, card):
+        super(TakenCards, self).insert(index, card)
+        self._count(card, 1)
+
+    def remove(self, card):
+        index = super(TakenCards, self).remove(card)
+        self._count(card, -1)
+        return index
+
+    def pop(self):
+        card = super(TakenCards, self).pop()
+        self._count(card, -1)
+        return card
+
+    def clear(self):
+        super(TakenCards, self).clear()
+        self._recount()
+
+    def copy(self):
+        # The counts are copied rather than counted again from the cards
+        copy = self.__class__.__new__(self.__class__)
+        copy.__dict__.update(self.__dict__)
+        copy.cards = list(self.cards)
+        return copy
+
     @property
     def score(self):
-        self.scores = []
-        self.month_cards = self.split_by_month()
-        self.group_cards = self.split_by_group()
-
-        self.score_junk()
-        self.score_brights()
-        self.score_animals()
-        self.score_ribbons()
-
-        return self.scores
-
-    def score_brights(self):
-        bright_cards = self.group_cards[Group.BRIGHT]
-        has_rain = RAIN in bright_cards
-
-        if len(bright_cards) == 5:
-            self.scores.append((_('Five brights'), 15))
-        elif len(bright_cards) == 4:
-            self.scores.append((_('Four brights'), 4))
-        elif len(bright_cards) == 3:
-            if has_rain:
-                self.scores.append((_('Three brights with rain'), 2))
-            else:
-                self.scores.append((_('Three brights without rain'), 3))
-
-    def score_animals(self):
-        animal_cards = self.group_cards[Group.ANIMAL]
-
-        if len(animal_cards) >= 5:
-            self.scores.append(
-                (str(len(animal_cards)) + _(' animals'), len(animal_cards)-4))
-
-        if all(bird_card in animal_cards
-               for bird_card in [BUSH_WARBLER, CUCKOO, GEESE]):
-            self.scores.append((_('Godori'), 5))
-
-    def score_ribbons(self):
-        ribbon_cards = self.group_cards[Group.RIBBON]
-
-        has_red_poem = all(
-            card in ribbon_cards
-            for card in [PINE_RED_POEM, PLUM_RED_POEM, CHERRY_RED_POEM])
-        has_blue_poem = all(
-            card in ribbon_cards
-            for card in [PEONY_BLUE_POEM, CHRYSANTHEMUM_BLUE_PEOM, MAPLE_BLUE_POEM])
-        has_red = all(
-            card in ribbon_cards
-            for card in [WISTERIA_RED, IRIS_RED, BUSH_CLOVER_RED])
-
-        if len(ribbon_cards) >= 5:
-            self.scores.append(
-                (str(len(ribbon_cards)) + _(' ribbons'), len(ribbon_cards)-4))
-
-        if has_red_poem:
-            self.scores.append((_('Three red ribbons with poem'), 3))
-        if has_blue_poem:
-            self.scores.append((_('Three blue ribbons with poem'), 3))
-        if has_red:
-            self.scores.append((_('Three red ribbons'), 3))
-
-    def score_junk(self):
-        junk_cards = self.group_cards[Group.JUNK]
-        junk_2_cards = self.group_cards[Group.JUNK_2]
-
-        total_junk = len(junk_cards) + 2*len(junk_2_cards)
-
-        if CUP in self.group_cards[Group.ANIMAL] and total_junk >= 10:
-            self.group_cards[Group.ANIMAL].remove(CUP)
-
-        if total_junk >= 10:
-            self.scores.append(
-                (str(len(junk_cards)+len(junk_2_cards)) + _(' junk cards'),
-                 total_junk-9))
+        """Returns the list of (label, points) scored by the cards."""
+        junk = self.junk + 2*self.junk_2
+        # The cup counts as double junk instead once there are 10 junk
+        animals = self.animals - (self.has_cup and junk >= 10)
+        return list(_JUNK_SCORES[self.junk][self.junk_2] +
+                    _BRIGHT_SCORES[2*self.brights + self.has_rain] +
+                    _ANIMAL_SCORES[animals] +
+                    _GODORI_SCORES[self.birds] +
+                    _RIBBON_SCORES[self.ribbons] +
+                    _RIBBON_SET_SCORES[self.red_poem_ribbons + 4*self.blue_poem_ribbons +
+                                       16*self.red_ribbons])
+
+    @property
+    def points(self):
+        """Returns the total points of `score`."""
+        junk = self.junk + 2*self.junk_2
+        animals = self.animals - (self.has_cup and junk >= 10)
+        return (_JUNK_POINTS[self.junk][self.junk_2] +
+                _BRIGHT_POINTS[2*self.brights + self.has_rain] +
+                _ANIMAL_POINTS[animals] +
+                _GODORI_POINTS[self.birds] +
+                _RIBBON_POINTS[self.ribbons] +
+                _RIBBON_SET_POINTS[self.red_poem_ribbons + 4*self.blue_poem_ribbons +
+                                   16*self.red_ribbons])
+
+
+# The scores of each part of the rules, indexed by the counts of TakenCards
+# they depend on, so a score is a few table reads. Each entry is a tuple of
+# (label, points), empty if nothing is scored.
+def _junk_score(junk, junk_2):
+    total_junk = junk + 2*junk_2
+    if total_junk >= 10:
+        return ((str(junk+junk_2) + _(' junk cards'), total_junk-9),)
+    return ()
+
+
+def _bright_score(brights, has_rain):
+    if brights == 5:
+        return ((_('Five brights'), 15),)
+    elif brights == 4:
+        return ((_('Four brights'), 4),)
+    elif brights == 3:
+        if has_rain:
+            return ((_('Three brights with rain'), 2),)
+        return ((_('Three brights without rain'), 3),)
+    return ()
+
+
+def _count_score(count, label):
+    if count >= 5:
+        return ((str(count) + label, count-4),)
+    return ()
+
+
+def _ribbon_set_score(red_poem_ribbons, blue_poem_ribbons, red_ribbons):
+    scores = ()
+    if red_poem_ribbons == len(_RED_POEM_RIBBONS):
+        scores += ((_('Three red ribbons with poem'), 3),)
+    if blue_poem_ribbons == len(_BLUE_POEM_RIBBONS):
+        scores += ((_('Three blue ribbons with poem'), 3),)
+    if red_ribbons == len(_RED_RIBBONS):
+        scores += ((_('Three red ribbons'), 3),)
+    return scores
+
+
+def _points(scores):
+    return sum(points for label, points in scores)
+
+
+_MAX_COUNTS = TakenCards(*ALL_CARDS)
+
+_JUNK_SCORES = tuple(tuple(_junk_score(junk, junk_2)
+                           for junk_2 in range(_MAX_COUNTS.junk_2 + 1))
+                     for junk in range(_MAX_COUNTS.junk + 1))
+# Indexed by 2*brights + has_rain
+_BRIGHT_SCORES = tuple(_bright_score(brights, has_rain)
+                       for brights in range(_MAX_COUNTS.brights + 1)
+                       for has_rain in (False, True))
+_ANIMAL_SCORES = tuple(_count_score(animals, _(' animals'))
+                       for animals in range(_MAX_COUNTS.animals + 1))
+_GODORI_SCORES = tuple(((_('Godori'), 5),) if birds == len(_BIRDS) else ()
+                       for birds in range(len(_BIRDS) + 1))
+_RIBBON_SCORES = tuple(_count_score(ribbons, _(' ribbons'))
+                       for ribbons in range(_MAX_COUNTS.ribbons + 1))
+# Indexed by red_poem_ribbons + 4*blue_poem_ribbons + 16*red_ribbons
+_RIBBON_SET_SCORES = tuple(_ribbon_set_score(red_poem_ribbons, blue_poem_ribbons,
+                                             red_ribbons)
+                           for red_ribbons in range(4)
+                           for blue_poem_ribbons in range(4)
+                           for red_poem_ribbons in range(4))
+
+_JUNK_POINTS = tuple(tuple(_points(scores) for scores in row) for row in _JUNK_SCORES)
+_BRIGHT_POINTS = tuple(_points(scores) for scores in _BRIGHT_SCORES)
+_ANIMAL_POINTS = tuple(_points(scores) for scores in _ANIMAL_SCORES)
+_GODORI_POINTS = tuple(_points(scores) for scores in _GODORI_SCORES)
+_RIBBON_POINTS = tuple(_points(scores) for scores in _RIBBON_SCORES)
+_RIBBON_SET_POINTS = tuple(_points(scores) for scores in _RIBBON_SET_SCORES)
 
 
 class TableCards(CardList):
+    """The cards face up on the table.
+
+    The cards of each month are indexed as cards are added and removed, so
+    finding the cards a card pairs with does not go through the table.
+    Changing `cards` directly bypasses the index.
+    """
+    def __init__(self, *cards):
+        super(TableCards, self).__init__(*cards)
+        self._reindex()
+
+    def _reindex(self):
+        self._months = [[] for month in range(13)]
+        for card in self:
+            self._months[card.month].append(card)
+
+    def __iadd__(self, card):
+        super(TableCards, self).__iadd__(card)
+        self._months[card.month].append(card)
+        return self
+
+    def insert(self, index, card):
+        super(TableCards, self).insert(index, card)
+        # Keep the cards of the month in table order
+        month_index = sum(1 for other in self.cards[:index]
+                          if other.month == card.month)
+        self._months[card.month].insert(month_index, card)
+
+    def remove(self, card):
+        index = super(TableCards, self).remove(card)
+        self._months[card.month].remove(card)
+        return index
+
+    def pop(self):
+        card = super(TableCards, self).pop()
+        self._months[card.month].remove(card)
+        return card
+
+    def clear(self):
+        super(TableCards, self).clear()
+        self._reindex()
+
+    def copy(self):
+        # The index is copied rather than built again from the cards
+        copy = self.__class__.__new__(self.__class__)
+        copy.cards = list(self.cards)
+        copy._months = [list(cards) for cards in self._months]
+        return copy
+
     def get_paired_cards(self, card):
-        paired_cards = []
-        for match_card in self.cards:
-            if match_card.month == card.month:
-                paired_cards.append(match_card)
+        return list(self._months[card.month])
+
+    def month_count(self, month):
+        """Returns the number of cards of `month` on the table: 3 for a
+        stack, 4 for the whole month.
+        """
+        return len(self._months[month])
+
+    def month_cards(self):
+        """Returns the list of the cards of each month, indexed by month,
+        in table order. The lists are the index itself and must not be
+        changed.
+        """
+        return self._months
+
+
+# The classes of the card containers of a game state: the hands, the taken
+# cards and the table cards. The deck is always a Deck, as its order is
+# the order of the draws.
+CardContainers = namedtuple('CardContainers',
+                            ['hand', 'taken_cards', 'table_cards'])
 
-        return paired_cards
+LIST_CONTAINERS = CardContainers(Hand, TakenCards, TableCards)
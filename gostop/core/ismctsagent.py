@@ -0,0 +1,247 @@
+import math
+import time
+
+from .agent import Agent
+from .gamestate import GameStateCapture, GameStateGoStop
+from .mutablestate import MutableGameState
+from .bitboard import iter_bits
+from .endgame import EndgameSolver, cards_left, determinization_count, \
+    determinizations
+
+
+class Node(object):
+    """A node of the information set search tree, reached by `action` of
+    `player_just_moved`.
+    """
+    __slots__ = ('parent', 'action', 'player_just_moved', 'children',
+                 'visits', 'wins', 'avails')
+
+    def __init__(self, parent=None, action=None, player_just_moved=None):
+        self.parent = parent
+        self.action = action
+        self.player_just_moved = player_just_moved
+        self.children = {}
+        self.visits = 0
+        self.wins = 0.0
+        self.avails = 1
+
+    def untried_actions(self, possible_actions):
+        children = self.children
+        return [action for action in possible_actions
+                if action not in children]
+
+    def select_child(self, possible_actions, exploration):
+        """Returns the child maximising the UCT value among the children of
+        `possible_actions`, counting each of them as available once more.
+        """
+        children = self.children
+        log = math.log
+        sqrt = math.sqrt
+        best_child = None
+        best_value = -1.0
+        for action in possible_actions:
+            child = children[action]
+            visits = child.visits
+            value = child.wins / visits + \
+                exploration * sqrt(log(child.avails) / visits)
+            if value > best_value:
+                best_child = child
+                best_value = value
+            child.avails += 1
+        return best_child
+
+    def add_child(self, action, player):
+        child = Node(self, action, player)
+        self.children[action] = child
+        return child
+
+    def update(self, results):
+        self.visits += 1
+        if self.player_just_moved is not None:
+            self.wins += results[self.player_just_moved]
+
+
+def estimate_results(state):
+    """Returns an estimate of the result of each player of an unfinished
+    game, from the difference between the points they have taken.
+    """
+    points = [taken_cards.points for taken_cards in state.taken_cards]
+    return [0.5 + 0.5*math.tanh((2*points[player] - sum(points)) / 5.0)
+            for player in range(state.number_of_players)]
+
+
+# The default number of rollout actions from a new leaf
+ROLLOUT_DEPTH = 2
+
+
+class ISMCTSAgent(Agent):
+    """Agent which chooses actions with single observer information set
+    Monte Carlo tree search, running `iterations` iterations or, if
+    `time_budget` is set, as many as fit in `time_budget` seconds.
+
+    Each iteration searches a determinization of the state, dealt as
+    `GameState.copy_and_randomise` deals it, and evaluates the new leaf
+    with a random rollout of at most `rollout_depth` actions followed by an
+    estimate from the points taken, or to the end of the game if
+    `rollout_depth` is None. The default rollout of two actions, about a
+    turn, keeps a decision of 1000 iterations under 100 ms (see the
+    `ismcts_decision` benchmark); `rollout_depth=0` estimates the leaf
+    from the points alone.
+    The subtree of the chosen action is reused for the next decision when
+    it belongs to the same turn of the same game.
+
+    Once at most `endgame_cards` cards are left in the deck and the hands,
+    the search is replaced by `solve_endgame`, which solves the rest of the
+    game exactly for each determinization.
+    """
+    def __init__(self, name, iterations=1000, time_budget=None,
+                 exploration=0.7, rollout_depth=ROLLOUT_DEPTH,
+                 endgame_cards=6, endgame_determinizations=64, rng=None):
+        super(ISMCTSAgent, self).__init__(name, rng)
+        self.iterations = iterations
+        self.time_budget = time_budget
+        self.exploration = exploration
+        self.rollout_depth = rollout_depth
+        self.endgame_cards = endgame_cards
+        self.endgame_determinizations = endgame_determinizations
+        self.solver = EndgameSolver()
+        self._next_root = None
+        self._next_state = None
+
+    def get_action(self, state, possible_actions):
+        if len(possible_actions) == 1:
+            self._next_root = None
+            return possible_actions[0]
+
+        if self.in_endgame(state):
+            self._next_root = None
+            return self.solve_endgame(state, possible_actions)
+
+        root = self._reusable_root(state)
+        self.search(root, state)
+
+        if not any(action in root.children for action in possible_actions):
+            # No iteration ran, as with a tiny time budget
+            return self.rng.choice(possible_actions)
+        child = max((root.children[action] for action in possible_actions
+                     if action in root.children),
+                    key=lambda child: child.visits)
+        child.parent = None
+        self._next_root = child
+        self._next_state = state.generate_successor(child.action)
+        for action in possible_actions:
+            if action == child.action:
+                return action
+
+    def in_endgame(self, state):
+        return cards_left(state) <= self.endgame_cards
+
+    def solve_endgame(self, state, possible_actions):
+        """Returns the action with the best average exact result over every
+        determinization of `state`, or over `endgame_determinizations`
+        random ones if there are more. A position in which at most one card
+        is unseen has a single determinization and is solved exactly.
+        """
+        observer = state.current_player
+        if determinization_count(state, observer) <= self.endgame_determinizations:
+            states = determinizations(state, observer)
+        else:
+            states = state.copy_and_randomise_batch(
+                observer, self.endgame_determinizations, self.rng)
+        totals = [0.0] * len(possible_actions)
+        for determinization in states:
+            values = self.solver.action_values(determinization, possible_actions)
+            totals = [total + value for total, value in zip(totals, values)]
+        return possible_actions[totals.index(max(totals))]
+
+    def _reusable_root(self, state):
+        # Only the capture and the Go/Stop decisions that follow a card we
+        # played can reuse the tree of the previous decision, and only in
+        # the game it was searched for, as an agent may play several games
+        root = self._next_root
+        next_state = self._next_state
+        self._next_root = None
+        self._next_state = None
+        if root is not None and \
+                isinstance(state, (GameStateCapture, GameStateGoStop)) and \
+                root.player_just_moved == state.current_player and \
+                state == next_state:
+            return root
+        return Node()
+
+    def search(self, root, state):
+        observer = state.current_player
+        mutable = MutableGameState(state)
+        unseen_cards = list(iter_bits(state.unseen_cards(observer)))
+        root_actions = mutable.get_possible_actions()
+        if self.time_budget is not None:
+            deadline = time.perf_counter() + self.time_budget
+            while time.perf_counter() < deadline:
+                self.iterate(root, mutable, observer, unseen_cards,
+                             root_actions)
+        else:
+            for i in range(self.iterations):
+                self.iterate(root, mutable, observer, unseen_cards,
+                             root_actions)
+
+    def iterate(self, root, mutable, observer, unseen_cards,
+                root_actions=None):
+        node, mutable = self.select(root, mutable, observer, unseen_cards,
+                                    root_actions)
+        self.backpropagate(node, self.simulate(mutable))
+
+    def select(self, root, mutable, observer, unseen_cards,
+               root_actions=None):
+        """Selects and expands a node of the tree from `root` for a new
+        determinization of `mutable`, dealing `unseen_cards` in a random
+        order, and returns it with the determinization advanced to it.
+        The observer sees every card of their own decision, so the possible
+        actions of `mutable` are the same in every determinization and can
+        be given once as `root_actions`.
+        """
+        node = root
+        # Sorting by random keys shuffles in C, as copy_and_randomise does
+        rng = self.rng
+        unseen_cards.sort(key=lambda card: rng.random())
+        mutable = mutable.determinize(observer, unseen_cards)
+
+        if root_actions is None:
+            root_actions = mutable.get_possible_actions()
+        possible_actions = root_actions
+        while possible_actions:
+            untried_actions = node.untried_actions(possible_actions)
+            if untried_actions:
+                action = rng.choice(untried_actions)
+                player = mutable.current_player
+                mutable.make(action)
+                return node.add_child(action, player), mutable
+            node = node.select_child(possible_actions, self.exploration)
+            mutable.make(node.action)
+            possible_actions = mutable.get_possible_actions()
+
+        return node, mutable
+
+    def simulate(self, mutable):
+        """Plays random actions from `mutable` and returns the result of
+        each player.
+        """
+        sample_action = mutable.sample_action
+        make = mutable.make
+        rng = self.rng
+        rollout_depth = self.rollout_depth
+        depth = 0
+        action = sample_action(rng)
+        while action is not None and depth != rollout_depth:
+            make(action)
+            action = sample_action(rng)
+            depth += 1
+
+        if action is not None:
+            return estimate_results(mutable)
+        return [mutable.get_result(player)
+                for player in range(mutable.number_of_players)]
+
+    def backpropagate(self, node, results):
+        while node is not None:
+            node.update(results)
+            node = node.parent
@@ -0,0 +1,275 @@
+import random
+
+from .gamestate import GameStateException, GameStatePlay, GameStateCapture, \
+    GameStateGoStop, GameStateEnd, GameActionGo, ACTIONS, GO_ACTION_ID, \
+    STOP_ACTION_ID, _play_actions, _iter_play_actions, \
+    _sample_play_action, _play_action_mask
+from .deck import Deck
+
+
+class Phase(object):
+    PLAY = 1
+    CAPTURE = 2
+    GO_STOP = 3
+    END = 4
+
+
+_PHASE_CLASSES = {
+    Phase.PLAY: GameStatePlay,
+    Phase.CAPTURE: GameStateCapture,
+    Phase.GO_STOP: GameStateGoStop,
+    Phase.END: GameStateEnd,
+}
+
+
+def phase_of(state):
+    """Returns the Phase of `state`, a GameState or a MutableGameState."""
+    if isinstance(state, MutableGameState):
+        return state.phase
+    for phase, cls in _PHASE_CLASSES.items():
+        if isinstance(state, cls):
+            return phase
+    raise GameStateException('Unknown phase {0}'.format(
+        state.__class__.__name__))
+
+
+class MutableGameState(object):
+    """A game state which is changed in place by `make` and restored by
+    `unmake`, for depth-first search and rollouts.
+
+    The phase of the turn is the `phase` field rather than the class of the
+    state. `make` follows the rules of `GameState.generate_successor` and
+    returns an undo token which `unmake` uses to restore the state exactly,
+    including the order of the cards in each card list. Tokens must be
+    unmade in the reverse order they were made.
+    """
+    def __init__(self, state):
+        self.phase = phase_of(state)
+        self.number_of_players = state.number_of_players
+        self.current_player = state.current_player
+        self.winner = state.winner
+        self.go_count = state.go_count
+        self.deck = state.deck.copy()
+        self.table_cards = state.table_cards.copy()
+        self.player_hands = [cards.copy() for cards in state.player_hands]
+        self.taken_cards = [cards.copy() for cards in state.taken_cards]
+        self.top_card = getattr(state, 'top_card', None)
+        self.paired_cards = getattr(state, 'paired_cards', None)
+
+    def to_game_state(self):
+        """Returns a GameState of the class matching the phase, holding
+        copies of the cards of this state.
+        """
+        state = _PHASE_CLASSES[self.phase]()
+        state.current_player = self.current_player
+        state.winner = self.winner
+        state.go_count = self.go_count
+        state.deck = self.deck.copy()
+        state.table_cards = self.table_cards.copy()
+        state.player_hands = [cards.copy() for cards in self.player_hands]
+        state.taken_cards = [cards.copy() for cards in self.taken_cards]
+        if self.phase == Phase.CAPTURE:
+            state.top_card = self.top_card
+            state.paired_cards = self.paired_cards
+        return state
+
+    def determinize(self, observer, cards, containers=None):
+        """Returns a copy of the state in which the cards the observing
+        player can't see are `cards`, dealt as `GameState.determinize`
+        deals them, with card lists of the classes of `containers` or of
+        this state. Copying this state is cheaper than copying a GameState
+        and building a MutableGameState from the copy.
+        """
+        state = self.__class__.__new__(self.__class__)
+        state.__dict__.update(self.__dict__)
+        if containers is None:
+            state.table_cards = self.table_cards.copy()
+            state.taken_cards = [taken.copy() for taken in self.taken_cards]
+        else:
+            state.table_cards = containers.table_cards(*self.table_cards)
+            state.taken_cards = [containers.taken_cards(*taken)
+                                 for taken in self.taken_cards]
+        state.player_hands = []
+        start = 0
+        for player, hand in enumerate(self.player_hands):
+            hand_class = hand.__class__ if containers is None \
+                else containers.hand
+            if player == observer:
+                state.player_hands.append(hand.copy() if containers is None
+                                          else hand_class(*hand))
+            else:
+                end = start + len(hand)
+                state.player_hands.append(hand_class(*cards[start:end]))
+                start = end
+        state.deck = Deck(cards=cards[start:])
+        return state
+
+    def get_result(self, player):
+        if self.winner == player:
+            return 1
+        elif self.winner is not None:
+            return 0
+        elif self.get_possible_actions() == []:
+            return 0.5
+        return 0
+
+    def get_possible_actions(self):
+        """Returns a list of possible actions for the current agent."""
+        if self.phase == Phase.PLAY:
+            return _play_actions(self.player_hands[self.current_player],
+                                 self.table_cards)
+        elif self.phase == Phase.CAPTURE:
+            return _play_actions((self.top_card,), self.table_cards)
+        possible_actions = []
+        if self.phase == Phase.GO_STOP:
+            if len(self.deck) > 0:
+                possible_actions.append(ACTIONS[GO_ACTION_ID])
+            possible_actions.append(ACTIONS[STOP_ACTION_ID])
+        return possible_actions
+
+    def iter_actions(self, key=None):
+        """Yields the possible actions for the current agent one at a time,
+        or all of them in the order of `key`, such as `capture_order`.
+        """
+        if key is not None:
+            return iter(sorted(self.get_possible_actions(), key=key))
+        if self.phase == Phase.PLAY:
+            return (action for card in self.player_hands[self.current_player]
+                    for action in _iter_play_actions(card, self.table_cards))
+        elif self.phase == Phase.CAPTURE:
+            return _iter_play_actions(self.top_card, self.table_cards)
+        return iter(self.get_possible_actions())
+
+    def sample_action(self, rng=random):
+        """Returns a possible action chosen uniformly with `rng` without
+        listing them, the same one as `rng.choice(get_possible_actions())`,
+        or None if there is none.
+        """
+        if self.phase == Phase.PLAY:
+            return _sample_play_action(rng, self.player_hands[self.current_player],
+                                       self.table_cards)
+        elif self.phase == Phase.CAPTURE:
+            return _sample_play_action(rng, (self.top_card,), self.table_cards)
+        elif self.phase == Phase.GO_STOP:
+            if len(self.deck) > 0:
+                return ACTIONS[(GO_ACTION_ID, STOP_ACTION_ID)[rng.randrange(2)]]
+            # Draw as random.choice does from one action, to keep seeded games the same
+            rng.randrange(1)
+            return ACTIONS[STOP_ACTION_ID]
+        return None
+
+    def legal_action_mask(self):
+        """Returns the bitmask of the ids of the possible actions, see
+        `action_id`.
+        """
+        mask = 0
+        if self.phase == Phase.PLAY:
+            for card in self.player_hands[self.current_player]:
+                mask |= _play_action_mask(card, self.table_cards)
+        elif self.phase == Phase.CAPTURE:
+            mask = _play_action_mask(self.top_card, self.table_cards)
+        elif self.phase == Phase.GO_STOP:
+            if len(self.deck) > 0:
+                mask |= 1 << GO_ACTION_ID
+            mask |= 1 << STOP_ACTION_ID
+        return mask
+
+    def make(self, action):
+        """Applies `action` of the current agent to this state and returns
+        the token to undo it with `unmake`.
+        """
+        if action is None:
+            raise GameStateException("No action from this turn")
+
+        token = (self.phase, self.current_player, self.winner,
+                 self.top_card, self.paired_cards, action)
+
+        if self.phase == Phase.PLAY:
+            hand_index = self.player_hands[self.current_player].remove(action.card)
+
+            if action.paired_card is not None:
+                # Remove paired card from the table
+                table_index = self.table_cards.remove(action.paired_card)
+            else:
+                # No match; add the card to the table
+                table_index = None
+                self.table_cards += action.card
+
+            self.paired_cards = action
+            self.top_card = self.deck.pop()
+            self.phase = Phase.CAPTURE
+            return token + (hand_index, table_index)
+
+        elif self.phase == Phase.CAPTURE:
+            taken_cards = self.taken_cards[self.current_player]
+
+            # Capture from last turn
+            if self.paired_cards is None:
+                raise GameStateException("No action from last turn")
+            if self.paired_cards.paired_card is not None:
+                taken_cards += self.paired_cards.card
+                taken_cards += self.paired_cards.paired_card
+
+            # Deck card and table cards
+            if action.paired_card is not None:
+                table_index = self.table_cards.remove(action.paired_card)
+                taken_cards += action.card
+                taken_cards += action.paired_card
+            else:
+                table_index = None
+                self.table_cards += action.card
+
+            if taken_cards.points >= 5:
+                self.phase = Phase.GO_STOP
+            else:
+                # Next player's turn
+                self.phase = Phase.PLAY
+                self.current_player = (self.current_player+1) % self.number_of_players
+            return token + (None, table_index)
+
+        elif self.phase == Phase.GO_STOP:
+            if type(action) == GameActionGo:
+                self.phase = Phase.PLAY
+                self.go_count += 1
+                self.current_player = (self.current_player+1) % self.number_of_players
+            else:
+                self.phase = Phase.END
+                self.winner = self.current_player
+            return token + (None, None)
+
+        raise GameStateException("No action after the end of the game")
+
+    def unmake(self, token):
+        """Restores the state from before the `make` which returned `token`.
+        """
+        phase, current_player, winner, top_card, paired_cards, action, \
+            hand_index, table_index = token
+
+        if phase == Phase.PLAY:
+            self.deck.append(self.top_card)
+            if table_index is not None:
+                self.table_cards.insert(table_index, action.paired_card)
+            else:
+                self.table_cards.remove(action.card)
+            self.player_hands[current_player].insert(hand_index, action.card)
+
+        elif phase == Phase.CAPTURE:
+            taken_cards = self.taken_cards[current_player]
+            if table_index is not None:
+                taken_cards.remove(action.paired_card)
+                taken_cards.remove(action.card)
+                self.table_cards.insert(table_index, action.paired_card)
+            else:
+                self.table_cards.remove(action.card)
+            if paired_cards.paired_card is not None:
+                taken_cards.remove(paired_cards.paired_card)
+                taken_cards.remove(paired_cards.card)
+
+        if phase == Phase.GO_STOP and type(action) == GameActionGo:
+            self.go_count -= 1
+
+        self.phase = phase
+        self.current_player = current_player
+        self.winner = winner
+        self.top_card = top_card
+        self.paired_cards = paired_cards
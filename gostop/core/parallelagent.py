@@ -0,0 +1,134 @@
+import time
+import multiprocessing
+
+from .gamestate import GameState, action_id
+from .ismctsagent import ISMCTSAgent, Node, ROLLOUT_DEPTH
+from .mutablestate import MutableGameState
+from .rng import python_rng
+from .bitboard import iter_bits
+
+
+def _search_root(args):
+    """Runs an independent search of an encoded state in a worker, with the
+    random stream `worker` of `seed`, and returns the visits and wins of
+    each root action.
+    """
+    data, iterations, time_budget, exploration, rollout_depth, seed, worker = args
+    state = GameState.decode(data)
+    agent = ISMCTSAgent('worker', iterations, time_budget, exploration,
+                        rollout_depth, rng=python_rng(seed, worker))
+    root = Node()
+    agent.search(root, state)
+    return [(action_id(action), child.visits, child.wins)
+            for action, child in root.children.items()]
+
+
+def _rollout(args):
+    """Plays a random rollout of an encoded state in a worker, with the
+    random stream `leaf` of `seed`, and returns the result of each player.
+    """
+    data, rollout_depth, seed, leaf = args
+    agent = ISMCTSAgent('worker', rollout_depth=rollout_depth,
+                        rng=python_rng(seed, leaf))
+    return agent.simulate(MutableGameState(GameState.decode(data)))
+
+
+class ParallelISMCTSAgent(ISMCTSAgent):
+    """ISMCTSAgent which searches with a pool of `workers` processes.
+
+    With `mode='root'` each worker searches its own tree over its own
+    determinizations for the whole budget, and the visits of the root
+    actions are summed. With `mode='leaf'` this process grows one tree and
+    sends batches of `batch_size` leaves to the workers for the rollouts,
+    using virtual losses to spread each batch over the tree.
+
+    States are sent to the workers as `GameState.encode` byte strings. The
+    pool is started on the first decision and stopped by `close`; it can't
+    be used from daemonic processes such as the tournament workers. Each
+    worker search and rollout has its own random stream, seeded from `rng`.
+    """
+    def __init__(self, name, iterations=1000, time_budget=None,
+                 exploration=0.7, rollout_depth=ROLLOUT_DEPTH, workers=None,
+                 mode='root', batch_size=32, endgame_cards=6,
+                 endgame_determinizations=64, rng=None):
+        super(ParallelISMCTSAgent, self).__init__(
+            name, iterations, time_budget, exploration, rollout_depth,
+            endgame_cards, endgame_determinizations, rng)
+        if mode not in ('root', 'leaf'):
+            raise ValueError('Unknown mode {0}'.format(mode))
+        self.workers = workers or multiprocessing.cpu_count()
+        self.mode = mode
+        self.batch_size = batch_size
+        self._pool = None
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(self.workers)
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def get_action(self, state, possible_actions):
+        if len(possible_actions) == 1 or self.mode == 'leaf' or \
+                self.in_endgame(state):
+            return super(ParallelISMCTSAgent, self).get_action(
+                state, possible_actions)
+
+        data = state.encode()
+        seed = self.rng.getrandbits(64)
+        tasks = [(data, self.iterations, self.time_budget, self.exploration,
+                  self.rollout_depth, seed, worker)
+                 for worker in range(self.workers)]
+        visits = {}
+        for children in self.pool.map(_search_root, tasks):
+            for key, child_visits, child_wins in children:
+                visits[key] = visits.get(key, 0) + child_visits
+
+        self._next_root = None
+        return max(possible_actions,
+                   key=lambda action: visits.get(action_id(action), 0))
+
+    def search(self, root, state):
+        if self.mode == 'root':
+            return super(ParallelISMCTSAgent, self).search(root, state)
+
+        observer = state.current_player
+        mutable = MutableGameState(state)
+        unseen_cards = list(iter_bits(state.unseen_cards(observer)))
+        root_actions = mutable.get_possible_actions()
+        iterations = 0
+        if self.time_budget is not None:
+            deadline = time.perf_counter() + self.time_budget
+
+        while True:
+            if self.time_budget is not None:
+                if time.perf_counter() >= deadline:
+                    break
+            elif iterations >= self.iterations:
+                break
+
+            leaves = []
+            tasks = []
+            seed = self.rng.getrandbits(64)
+            for i in range(self.batch_size):
+                node, leaf = self.select(root, mutable, observer,
+                                         unseen_cards, root_actions)
+                # Virtual loss: count the visit now, the result comes later
+                path = node
+                while path is not None:
+                    path.visits += 1
+                    path = path.parent
+                leaves.append(node)
+                tasks.append((leaf.to_game_state().encode(),
+                              self.rollout_depth, seed, i))
+            for node, results in zip(leaves, self.pool.map(_rollout, tasks)):
+                while node is not None:
+                    if node.player_just_moved is not None:
+                        node.wins += results[node.player_just_moved]
+                    node = node.parent
+            iterations += len(leaves)
@@ -0,0 +1,168 @@
+import time
+import inspect
+import functools
+import threading
+from collections import defaultdict
+
+from .agent import Agent
+from .hand import TakenCards
+from .gamestate import GameState, GameStatePlay, GameStateCapture, GameStateGoStop
+from .mutablestate import MutableGameState
+from .ismctsagent import Node
+
+
+# Instrumentation wraps the methods below when it is enabled and puts the
+# originals back when it is disabled, so the engine runs unchanged code
+# while it is off. Times are inclusive: the time of `generate_successor`
+# counts the time of the `points` it reads.
+_PHASE_CLASSES = [('play', GameStatePlay), ('capture', GameStateCapture),
+                  ('go_stop', GameStateGoStop)]
+
+# Each thread counts into its own calls and nanoseconds, so threads don't
+# lose each other's updates, and `snapshot` sums the counters of all the
+# threads which counted.
+_local = threading.local()
+_lock = threading.Lock()
+_thread_counters = []
+_patches = []
+
+
+def _counters():
+    try:
+        return _local.counters
+    except AttributeError:
+        counters = _local.counters = (defaultdict(int), defaultdict(int))
+        with _lock:
+            _thread_counters.append(counters)
+        return counters
+
+
+def _timed(name, function):
+    if inspect.iscoroutinefunction(function):
+        @functools.wraps(function)
+        async def timed(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return await function(*args, **kwargs)
+            finally:
+                calls, ns = _counters()
+                calls[name] += 1
+                ns[name] += time.perf_counter_ns() - start
+        return timed
+
+    @functools.wraps(function)
+    def timed(*args, **kwargs):
+        start = time.perf_counter_ns()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            calls, ns = _counters()
+            calls[name] += 1
+            ns[name] += time.perf_counter_ns() - start
+    return timed
+
+
+def _counted(name, function):
+    @functools.wraps(function)
+    def counted(*args, **kwargs):
+        _counters()[0][name] += 1
+        return function(*args, **kwargs)
+    return counted
+
+
+def _patch(owner, attribute, wrapper):
+    original = owner.__dict__[attribute]
+    _patches.append((owner, attribute, original))
+    setattr(owner, attribute, wrapper)
+
+
+def _agent_classes(cls=Agent):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from _agent_classes(subclass)
+
+
+def enabled():
+    return bool(_patches)
+
+
+def enable():
+    """Starts counting the calls and the time of the phases of the game,
+    the moves of MutableGameState, the score of TakenCards and the `get_action`
+    of every Agent class defined so far, and the states and search nodes
+    allocated, in this process.
+    """
+    if enabled():
+        return
+    for phase, cls in _PHASE_CLASSES:
+        for method in ['get_possible_actions', 'generate_successor']:
+            _patch(cls, method, _timed('{0}.{1}'.format(phase, method),
+                                       cls.__dict__[method]))
+    for method in ['get_possible_actions', 'make', 'unmake']:
+        _patch(MutableGameState, method, _timed('mutable.{0}'.format(method),
+                                                MutableGameState.__dict__[method]))
+    for method in ['score', 'points']:
+        _patch(TakenCards, method, property(_timed('taken_cards.{0}'.format(method),
+                                                   TakenCards.__dict__[method].fget)))
+    _patch(GameState, '__init__', _counted('states', GameState.__dict__['__init__']))
+    _patch(Node, '__init__', _counted('nodes', Node.__dict__['__init__']))
+    for cls in set(_agent_classes()):
+        if 'get_action' in cls.__dict__:
+            _patch(cls, 'get_action', _timed('agent.{0}.get_action'.format(cls.__name__),
+                                             cls.__dict__['get_action']))
+
+
+def disable():
+    """Stops counting and restores the original methods. The counters are
+    kept until `reset`.
+    """
+    while _patches:
+        owner, attribute, original = _patches.pop()
+        setattr(owner, attribute, original)
+
+
+def reset():
+    with _lock:
+        for calls, ns in _thread_counters:
+            calls.clear()
+            ns.clear()
+
+
+def snapshot():
+    """Returns the counters of all the threads of this process as a dict of
+    the number of calls and of nanoseconds for each name, allocations
+    having no time.
+    """
+    with _lock:
+        counters = [{name: {'calls': calls, 'ns': ns.get(name, 0)}
+                     for name, calls in dict(thread_calls).items()}
+                    for thread_calls, ns in _thread_counters]
+    return merge(counters)
+
+
+def merge(snapshots):
+    """Returns the sum of `snapshots`, such as those of several processes."""
+    total = {}
+    for counters in snapshots:
+        for name, counter in counters.items():
+            entry = total.setdefault(name, {'calls': 0, 'ns': 0})
+            entry['calls'] += counter['calls']
+            entry['ns'] += counter['ns']
+    return dict(sorted(total.items()))
+
+
+def prometheus(counters=None):
+    """Returns the counters of `counters`, those of this process by default,
+    in the Prometheus text format.
+    """
+    if counters is None:
+        counters = snapshot()
+    out = '# TYPE gostop_calls_total counter\n'
+    for name, counter in counters.items():
+        out += 'gostop_calls_total{{name="{0}"}} {1}\n'.format(name, counter['calls'])
+    out += '# TYPE gostop_seconds_total counter\n'
+    for name, counter in counters.items():
+        if counter['ns']:
+            out += 'gostop_seconds_total{{name="{0}"}} {1:.9f}\n'.format(
+                name, counter['ns'] / 1e9)
+    return out
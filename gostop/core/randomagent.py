@@ -1,5 +1,3 @@
-import random
-
 from .agent import Agent
 
 
@@ -7,4 +5,4 @@ class RandomAgent(Agent):
     """Agent which returns a random action at each decision point"""
 
     def get_action(self, state, possible_actions):
-        return random.choice(possible_actions)
+        return self.rng.choice(possible_actions)
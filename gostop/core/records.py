@@ -0,0 +1,100 @@
+import io
+import mmap
+import struct
+from collections import namedtuple
+
+from .card import ALL_CARDS
+from .gamestate import GameState
+
+
+# A record file is the magic and then one record per game: the seed, the
+# number of actions, the ids of the cards of the deck before the deal, and
+# the index of each action in `get_possible_actions` of its state.
+MAGIC = b'GOSTOP\x00\x01'
+_HEADER = struct.Struct('<QB')
+_DECK_SIZE = len(ALL_CARDS)
+
+GameRecord = namedtuple('GameRecord', ['seed', 'deck', 'actions'])
+
+
+class RecordError(Exception):
+    pass
+
+
+def record_game(seed, deck, actions):
+    """Returns the record of a game dealt from the cards `deck` in which the
+    actions of `actions` were played, given by their index in
+    `get_possible_actions`.
+    """
+    return GameRecord(seed, bytes(card.id for card in deck), bytes(actions))
+
+
+def replay(record):
+    """Yields the states of the game of `record`, from the deal to the last
+    action.
+    """
+    state = GameState.new_game(deck=[ALL_CARDS[card_id] for card_id in record.deck])
+    yield state
+    for index in record.actions:
+        state = state.generate_successor(state.get_possible_actions()[index])
+        yield state
+
+
+class RecordWriter(object):
+    """Appends game records to the file `path`, creating it if needed.
+
+    Records are buffered and written in order; use as a context manager, or
+    call `close`, to flush them.
+    """
+    def __init__(self, path, buffer_size=1 << 20):
+        self.file = open(path, 'ab', buffering=buffer_size)
+        if self.file.tell() == 0:
+            self.file.write(MAGIC)
+        self.count = 0
+
+    def write(self, record):
+        if len(record.deck) != _DECK_SIZE:
+            raise ValueError('A deck has {0} cards'.format(_DECK_SIZE))
+        if len(record.actions) > 255:
+            raise ValueError('Too many actions in a game')
+        self.file.write(_HEADER.pack(record.seed, len(record.actions)))
+        self.file.write(record.deck)
+        self.file.write(record.actions)
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def iter_records(data):
+    """Yields the records of the bytes-like `data` of a record file."""
+    if bytes(data[:len(MAGIC)]) != MAGIC:
+        raise RecordError('Not a game record file')
+    i = len(MAGIC)
+    while i < len(data):
+        if i + _HEADER.size + _DECK_SIZE > len(data):
+            raise RecordError('Truncated record at byte {0}'.format(i))
+        seed, count = _HEADER.unpack_from(data, i)
+        i += _HEADER.size
+        deck = bytes(data[i:i+_DECK_SIZE])
+        i += _DECK_SIZE
+        if i + count > len(data):
+            raise RecordError('Truncated record at byte {0}'.format(i))
+        actions = bytes(data[i:i+count])
+        i += count
+        yield GameRecord(seed, deck, actions)
+
+
+def read_records(path):
+    """Yields the records of the file `path` lazily from a memory map."""
+    with open(path, 'rb') as f:
+        if f.seek(0, io.SEEK_END) == 0:
+            raise RecordError('Not a game record file')
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield from iter_records(data)
@@ -0,0 +1,143 @@
+import os
+import logging
+from collections import OrderedDict
+
+from PIL import Image, ImageDraw, ImageFont
+
+from .card import ALL_CARDS
+
+
+class SpriteAtlas(object):
+    """The decoded card sprites and numbering font, loaded once, with an LRU
+    cache of rendered rows of cards.
+
+    Rows returned by `row` are shared through the cache and must not be
+    changed.
+    """
+    def __init__(self, image_dir='images', font_path='tahoma.ttf', cache_size=64):
+        self.image_dir = image_dir
+        self.font_path = font_path
+        self.cache_size = cache_size
+        self._sprites = None
+        self._font = None
+        self._rows = OrderedDict()
+
+    @property
+    def sprites(self):
+        if self._sprites is None:
+            sprites = []
+            for card in ALL_CARDS:
+                path = os.path.join(
+                    self.image_dir,
+                    f"{card.month-1:x}{card.order_in_month}.png")
+                with Image.open(path) as img:
+                    img.load()
+                    sprites.append(img)
+            self._sprites = sprites
+        return self._sprites
+
+    @property
+    def font(self):
+        if self._font is None:
+            # to find ttf in linux, "locate .ttf"
+            self._font = ImageFont.truetype(self.font_path, 25)
+        return self._font
+
+    def row(self, cards, number=False, overlap=50):
+        """Returns the image of `cards` side by side, each overlapping the
+        previous one by `overlap` percent of its width, and numbered from 0
+        if `number` is set.
+        """
+        key = (tuple(card.id for card in cards), number, overlap)
+        img = self._rows.get(key)
+        if img is not None:
+            self._rows.move_to_end(key)
+            return img
+
+        img = self._compose([self.sprites[card_id] for card_id in key[0]],
+                            number, overlap)
+        self._rows[key] = img
+        if len(self._rows) > self.cache_size:
+            self._rows.popitem(last=False)
+        return img
+
+    def _compose(self, sprites, number, overlap):
+        if len(sprites) == 0:
+            return Image.new('RGB', (1, 1))
+
+        # Each card is pasted over the right edge of the previous one
+        offsets = [0]
+        for previous, sprite in zip(sprites, sprites[1:]):
+            offsets.append(offsets[-1] + previous.width
+                           - sprite.width*overlap//100)
+        width = offsets[-1] + sprites[-1].width
+
+        dst = Image.new('RGB', (width, sprites[0].height))
+        draw = ImageDraw.Draw(dst) if number else None
+        for i, (sprite, x) in enumerate(zip(sprites, offsets)):
+            dst.paste(sprite, (x, 0))
+            if number:
+                draw.rectangle((x+1, 1, x+25, 30),
+                               fill=(205, 200, 240),
+                               outline=(255, 255, 255))
+                draw.text((x+5, 5), f"{i}", fill=(0, 0, 255), font=self.font)
+        return dst
+
+
+_atlas = None
+
+
+def get_atlas():
+    """Returns the shared SpriteAtlas of the process."""
+    global _atlas
+    if _atlas is None:
+        _atlas = SpriteAtlas()
+    return _atlas
+
+
+def create_image(card_list, image_name="html/gostop.png", number=False, overlap=50):
+    if len(card_list) == 0:
+        logging.warning("Empty image")
+    get_atlas().row(list(card_list), number, overlap).save(image_name)
+
+
+class StateRenderer(object):
+    """Writes the HTML view images of game states to `directory`, rewriting
+    only the images whose cards changed since the last render.
+    """
+    def __init__(self, directory='html', atlas=None):
+        self.directory = directory
+        self.atlas = atlas or get_atlas()
+        self._rendered = {}
+
+    def _render(self, cards, name, number=False, overlap=50):
+        path = os.path.join(self.directory, name)
+        key = (tuple(card.id for card in cards), number, overlap)
+        if self._rendered.get(path) == key:
+            return
+        self.atlas.row(list(cards), number, overlap).save(path)
+        self._rendered[path] = key
+
+    def render(self, state):
+        self._render(state.table_cards, 'table.png', overlap=0)
+        for i in range(0, state.number_of_players):
+            self._render(state.player_hands[i], f'hand{i}.png', number=True)
+            self._render(state.taken_cards[i], f'taken{i}.png')
+        if getattr(state, 'top_card', None) is not None:
+            self._render([state.top_card], 'top_card.png')
+
+
+_renderers = {}
+
+
+def render_state(state, directory='html'):
+    """Writes the images of the table, hands and taken cards of `state`, and
+    the top card if one was drawn, for the HTML view in `directory`.
+
+    The game states never render themselves; a viewer calls this when it
+    shows a state.
+    """
+    renderer = _renderers.get(directory)
+    if renderer is None:
+        renderer = _renderers[directory] = StateRenderer(directory)
+    renderer.render(state)
@@ -0,0 +1,83 @@
+import random
+import hashlib
+import functools
+
+import numpy as np
+
+from .card import ALL_CARDS
+from .deck import Deck
+
+
+# Every random stream is named by a root seed and a path of keys, such as
+# the index of a game and the seat of a player, and is seeded from the
+# NumPy SeedSequence of that path. Streams are independent of each other
+# and don't depend on which process or thread uses them, so a run can be
+# replayed exactly however it is spread over workers.
+
+# The first key of the paths of a run
+DECKS = 0
+GAMES = 1
+
+# Decks are shuffled in blocks of games at once by a NumPy Generator
+DECK_BLOCK = 4096
+
+
+def _entropy(seed):
+    # SeedSequence only takes non-negative ints, so other seeds are hashed
+    if seed is None or isinstance(seed, int) and seed >= 0:
+        return seed
+    seed = str(seed)
+    if seed.isdigit():
+        return int(seed)
+    return int.from_bytes(hashlib.sha256(seed.encode()).digest(), 'little')
+
+
+def seed_sequence(seed, *keys):
+    """Returns the SeedSequence of the stream `keys` of the root `seed`, an
+    int or a string, or fresh entropy if `seed` is None.
+    """
+    return np.random.SeedSequence(_entropy(seed), spawn_key=keys)
+
+
+def stream_seed(seed, *keys):
+    """Returns a 64 bit int seed of the stream `keys` of `seed`."""
+    return int(seed_sequence(seed, *keys).generate_state(1, np.uint64)[0])
+
+
+def python_rng(seed, *keys):
+    """Returns a random.Random of the stream `keys` of `seed`, for the
+    engine and the agents.
+    """
+    state = seed_sequence(seed, *keys).generate_state(4, np.uint64)
+    return random.Random(int.from_bytes(state.tobytes(), 'little'))
+
+
+def numpy_rng(seed, *keys):
+    """Returns a NumPy Generator of the stream `keys` of `seed`, for work
+    done in batches.
+    """
+    return np.random.default_rng(seed_sequence(seed, *keys))
+
+
+def shuffled_decks(generator, count):
+    """Returns `count` decks shuffled by the NumPy Generator `generator`,
+    as rows of card ids.
+    """
+    decks = np.tile(np.arange(len(ALL_CARDS), dtype=np.uint8), (count, 1))
+    return generator.permuted(decks, axis=1, out=decks)
+
+
+@functools.lru_cache(maxsize=4)
+def _deck_block(seed, block):
+    decks = shuffled_decks(numpy_rng(seed, DECKS, block), DECK_BLOCK)
+    decks.flags.writeable = False
+    return decks
+
+
+def game_deck(seed, index):
+    """Returns the shuffled deck of game `index` of the run of root `seed`.
+    The decks of DECK_BLOCK games are shuffled together, but the deck of a
+    game depends only on `seed` and `index`.
+    """
+    row = _deck_block(seed, index // DECK_BLOCK)[index % DECK_BLOCK]
+    return Deck(cards=[ALL_CARDS[card] for card in row])
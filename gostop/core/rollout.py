@@ -0,0 +1,437 @@
+from collections import namedtuple
+
+import numpy as np
+
+from .card import ALL_CARDS
+from .hand import TakenCards
+from .bitboard import card_bits
+from .gamestate import action_id, GO_ACTION_ID, STOP_ACTION_ID, NUM_ACTIONS
+from .mutablestate import MutableGameState, Phase, phase_of
+from .zobrist import DECK, TABLE, IN_PLAY, hand, taken
+
+
+# Random playouts choose among the possible actions sorted by their id, see
+# `action_id`, so both engines agree.
+GO = GO_ACTION_ID
+STOP = STOP_ACTION_ID
+
+# A game has at most one turn per card in the hands, each of a card played,
+# a card drawn and a Go or Stop decision.
+MAX_PLIES = 3*len(ALL_CARDS)
+
+_NONE = -1
+_ONE = np.uint64(1)
+
+# The bitboard of the cards counted by each of the counts TakenCards keeps,
+# so the counts of the cards taken are popcounts.
+COUNTER_BITS = np.array(
+    [card_bits(card for card in ALL_CARDS
+               if getattr(TakenCards(card), counter))
+     for counter in TakenCards.COUNTERS], dtype=np.uint64)
+
+# The cards of a month own four consecutive bits, two months to a byte
+_MONTHS = len(ALL_CARDS) // 4
+
+
+def _month_actions(playable, table):
+    """Returns the mask of the 20 actions of a month given the masks of the
+    cards of the month which can be played and which are on the table.
+    """
+    actions = np.zeros(20, dtype=bool)
+    for i in range(4):
+        if playable >> i & 1:
+            if table == 0:
+                actions[5*i] = True
+            for k in range(4):
+                if table >> k & 1:
+                    actions[5*i + 1 + k] = True
+    return actions
+
+
+# The actions of a month indexed by 16*playable + table, and the number of
+# actions and their offsets in id order
+_MONTH_ACTIONS = np.array([_month_actions(playable, table)
+                           for playable in range(16) for table in range(16)])
+_MONTH_COUNTS = _MONTH_ACTIONS.sum(axis=1).astype(np.int8)
+_MONTH_ACTION_LIST = np.zeros((256, 20), dtype=np.int32)
+for _index, _actions in enumerate(_MONTH_ACTIONS):
+    _offsets = np.flatnonzero(_actions)
+    _MONTH_ACTION_LIST[_index, :len(_offsets)] = _offsets
+
+
+def _month_index(playable, table):
+    """Returns 16 times the mask of the cards of each month which can be
+    played plus the mask of the cards of the month on the table, one row per
+    month and one column per bitboard of `playable` and `table`.
+    """
+    playable = playable.view(np.uint8).reshape(-1, 8).T[:_MONTHS // 2].copy()
+    table = table.view(np.uint8).reshape(-1, 8).T[:_MONTHS // 2].copy()
+    index = np.empty((_MONTHS // 2, 2, playable.shape[1]), dtype=np.uint8)
+    np.left_shift(playable, 4, out=index[:, 0])
+    index[:, 0] |= table & 0xF
+    np.bitwise_and(playable, 0xF0, out=index[:, 1])
+    index[:, 1] |= table >> 4
+    return index.reshape(_MONTHS, -1)
+
+
+def _bits(cards):
+    return _ONE << cards.astype(np.uint64)
+
+
+def rollout_uniforms(games, seed=None):
+    """Returns the uniform numbers in [0, 1) which choose the action of each
+    ply of `games` playouts, one row per ply.
+    """
+    return np.random.default_rng(seed).random((MAX_PLIES, games))
+
+
+def reference_rollout(state, uniforms):
+    """Plays the playout of `state` with the action of ply t chosen by
+    `uniforms[t]`, one game at a time, and returns the winner or None, the
+    points of each player and the number of actions played.
+    """
+    mutable = MutableGameState(state)
+    plies = 0
+    possible_actions = mutable.get_possible_actions()
+    while possible_actions:
+        possible_actions.sort(key=action_id)
+        mutable.make(possible_actions[
+            int(uniforms[plies] * len(possible_actions))])
+        plies += 1
+        possible_actions = mutable.get_possible_actions()
+    scores = [cards.points for cards in mutable.taken_cards]
+    return mutable.winner, scores, plies
+
+
+# The points of the counts of TakenCards, by the rules of `TakenCards.score`
+_JUNK_POINTS = np.array([max(total_junk - 9, 0)
+                         for total_junk in range(2*len(ALL_CARDS) + 1)],
+                        dtype=np.int8)
+_BRIGHT_POINTS = np.array([0, 0, 0, 0, 0, 0, 3, 2, 4, 4, 15, 15], dtype=np.int8)
+_COUNT_POINTS = np.array([count - 4 if count >= 5 else 0
+                          for count in range(len(ALL_CARDS) + 1)],
+                         dtype=np.int8)
+_GODORI_POINTS = np.array([0, 0, 0, 5], dtype=np.int8)
+_RIBBON_SET_POINTS = np.array([0, 0, 0, 3], dtype=np.int8)
+
+
+def score_counts(counts):
+    """Returns the points of TakenCards counts, one row per counter of
+    `TakenCards.COUNTERS`, with the rules of `TakenCards.score`.
+    """
+    brights, has_rain, animals, birds, ribbons, red_poem_ribbons, \
+        blue_poem_ribbons, red_ribbons, junk, junk_2, has_cup = counts
+    total_junk = junk + 2*junk_2
+    points = np.take(_JUNK_POINTS, total_junk)
+    # The index of brights with rain is one more than without
+    points += np.take(_BRIGHT_POINTS, 2*brights + has_rain)
+    # The cup counts as double junk instead once there are 10 junk
+    points += np.take(_COUNT_POINTS, animals - (has_cup & (total_junk >= 10)))
+    points += np.take(_GODORI_POINTS, birds)
+    points += np.take(_COUNT_POINTS, ribbons)
+    points += np.take(_RIBBON_SET_POINTS, red_poem_ribbons)
+    points += np.take(_RIBBON_SET_POINTS, blue_poem_ribbons)
+    points += np.take(_RIBBON_SET_POINTS, red_ribbons)
+    return points
+
+
+def score_bits(bits):
+    """Returns the points of an array of bitboards of taken cards."""
+    return score_counts(np.bitwise_count(bits & COUNTER_BITS[:, None]))
+
+
+# The arrays of BatchRollout holding the games along their last axis, which
+# are all but the deck
+_GAME_FIELDS = ('table_cards', 'player_hands', 'taken_cards', 'deck_size',
+                'phase', 'current_player', 'winner', 'go_count', 'top_card',
+                'played_card', 'paired_card', 'plies')
+
+
+RolloutResult = namedtuple('RolloutResult', ['winner', 'scores', 'plies'])
+
+
+class BatchRollout(object):
+    """Random playouts of many games advanced in lockstep, one ply of every
+    unfinished game per step.
+
+    Each game is stored as rows of arrays: bitboards of the table and of the
+    hand and the taken cards of each player, the deck in drawing order, the
+    phase, the current player, and the cards in play during the capture
+    phase. Move generation, captures and scoring are array operations over
+    all the games at once.
+
+    The games are built from GameState or MutableGameState `states`, or
+    dealt straight into the arrays from shuffled decks by `new_games`.
+    Given the same uniforms the playouts are the same as `reference_rollout`.
+    """
+    def __init__(self, states):
+        states = list(states)
+        number_of_players = states[0].number_of_players
+        if any(state.number_of_players != number_of_players
+               for state in states):
+            raise ValueError('States have different numbers of players')
+        self._allocate(len(states), number_of_players)
+
+        # The fields of every game are gathered into lists and stored at
+        # once, which is several times faster than storing them one game at
+        # a time
+        self.table_cards[:] = [card_bits(state.table_cards) for state in states]
+        for player in range(number_of_players):
+            self.player_hands[player] = [card_bits(state.player_hands[player])
+                                         for state in states]
+            self.taken_cards[player] = [card_bits(state.taken_cards[player])
+                                        for state in states]
+        self.deck_size[:] = [len(state.deck) for state in states]
+        cards = [card.id for state in states for card in state.deck]
+        games = np.repeat(np.arange(len(states)), self.deck_size)
+        offsets = np.cumsum(self.deck_size) - self.deck_size
+        self.deck[games, np.arange(len(cards)) - offsets[games]] = cards
+        self.phase[:] = [phase_of(state) for state in states]
+        self.current_player[:] = [state.current_player for state in states]
+        self.winner[:] = [_NONE if state.winner is None else state.winner
+                          for state in states]
+        self.go_count[:] = [state.go_count for state in states]
+        for g in np.flatnonzero(self.phase == Phase.CAPTURE):
+            state = states[g]
+            self.top_card[g] = state.top_card.id
+            self.played_card[g] = state.paired_cards.card.id
+            if state.paired_cards.paired_card is not None:
+                self.paired_card[g] = state.paired_cards.paired_card.id
+
+    def _allocate(self, games, number_of_players):
+        self.number_of_players = number_of_players
+        self.table_cards = np.zeros(games, dtype=np.uint64)
+        self.player_hands = np.zeros((number_of_players, games), dtype=np.uint64)
+        self.taken_cards = np.zeros((number_of_players, games), dtype=np.uint64)
+        self.deck = np.zeros((games, len(ALL_CARDS)), dtype=np.int8)
+        self.deck_size = np.zeros(games, dtype=np.int32)
+        self.phase = np.full(games, Phase.PLAY, dtype=np.int8)
+        self.current_player = np.zeros(games, dtype=np.intp)
+        self.winner = np.full(games, _NONE, dtype=np.int8)
+        self.go_count = np.zeros(games, dtype=np.int32)
+        self.top_card = np.full(games, _NONE, dtype=np.int8)
+        self.played_card = np.full(games, _NONE, dtype=np.int8)
+        self.paired_card = np.full(games, _NONE, dtype=np.int8)
+        self.plies = np.zeros(games, dtype=np.int32)
+
+    @staticmethod
+    def new_games(decks, number_of_players=2):
+        """Returns the playouts of new games dealt from `decks`, rows of card
+        ids such as `shuffled_decks` returns, the same games as
+        `GameState.new_game` deals from each deck, without building them.
+        """
+        decks = np.asarray(decks, dtype=np.int8)
+        rollout = BatchRollout.__new__(BatchRollout)
+        rollout._allocate(len(decks), number_of_players)
+
+        # Cards are dealt from the end of the deck: five to each player then
+        # four to the table, twice
+        end = len(ALL_CARDS)
+        for i in range(2):
+            for player in range(number_of_players):
+                rollout.player_hands[player] |= np.bitwise_or.reduce(
+                    _bits(decks[:, end-5:end]), axis=1)
+                end -= 5
+            rollout.table_cards |= np.bitwise_or.reduce(
+                _bits(decks[:, end-4:end]), axis=1)
+            end -= 4
+        rollout.deck[:, :end] = decks[:, :end]
+        rollout.deck_size[:] = end
+        return rollout
+
+    def _take(self, games):
+        """Returns the playouts of `games`, with copies of their rows."""
+        rollout = BatchRollout.__new__(BatchRollout)
+        rollout.number_of_players = self.number_of_players
+        for name in _GAME_FIELDS:
+            setattr(rollout, name, getattr(self, name)[..., games])
+        rollout.deck = self.deck[games]
+        return rollout
+
+    def _put(self, games, rollout):
+        """Stores the rows of `rollout`, taken by `_take`, back as `games`."""
+        for name in _GAME_FIELDS:
+            getattr(self, name)[..., games] = getattr(rollout, name)
+        self.deck[games] = rollout.deck
+
+    def __len__(self):
+        return len(self.phase)
+
+    def locations(self):
+        """Returns the location of each card of each game, with the location
+        codes of `zobrist`.
+        """
+        games = np.arange(len(self))
+        location = np.full((len(self), len(ALL_CARDS)), DECK, dtype=np.int8)
+        cards = np.arange(len(ALL_CARDS), dtype=np.uint64)
+
+        def place(bits, code):
+            location[((bits[:, None] >> cards) & _ONE).astype(bool)] = code
+
+        place(self.table_cards, TABLE)
+        for player in range(self.number_of_players):
+            place(self.player_hands[player], hand(player))
+            place(self.taken_cards[player], taken(player))
+        capture = self.phase == Phase.CAPTURE
+        location[games[capture], self.top_card[capture]] = IN_PLAY
+        paired = capture & (self.paired_card != _NONE)
+        location[games[paired], self.played_card[paired]] = IN_PLAY
+        location[games[paired], self.paired_card[paired]] = IN_PLAY
+        return location
+
+    def _playable(self, games):
+        """Returns the bitboards of the cards `games` can play: the hand in
+        the play phase and the top card in the capture phase.
+        """
+        return np.where(
+            self.phase[games] == Phase.PLAY,
+            self.player_hands[self.current_player[games], games],
+            _bits(np.maximum(self.top_card[games], 0)))
+
+    def legal_actions(self, games):
+        """Returns the mask of the possible actions of `games`, one row of
+        NUM_ACTIONS per game.
+        """
+        legal = np.zeros((len(games), NUM_ACTIONS), dtype=bool)
+        phase = self.phase[games]
+        index = _month_index(self._playable(games), self.table_cards[games])
+        legal[:, :GO] = _MONTH_ACTIONS[index.T].reshape(-1, GO)
+        legal[(phase != Phase.PLAY) & (phase != Phase.CAPTURE), :GO] = False
+        go_stop = phase == Phase.GO_STOP
+        legal[:, GO] = go_stop & (self.deck_size[games] > 0)
+        legal[:, STOP] = go_stop
+        return legal
+
+    def step(self, uniforms):
+        """Plays one action in each unfinished game, chosen by `uniforms`,
+        and returns whether any game was unfinished.
+
+        Every game is updated with the same array operations, masked by its
+        phase, which is faster than gathering the games of each phase.
+        """
+        phase = self.phase
+        games = np.arange(len(self))
+        player = self.current_player
+
+        # Pick the month of the action, then the action within the month
+        index = _month_index(self._playable(games), self.table_cards)
+        counts = np.take(_MONTH_COUNTS, index)
+        cumulative = np.empty_like(counts)
+        cumulative[0] = counts[0]
+        for month in range(1, _MONTHS):
+            np.add(cumulative[month-1], counts[month], out=cumulative[month])
+        go_stop = phase == Phase.GO_STOP
+        count = np.where(go_stop, 1 + (self.deck_size > 0), cumulative[-1])
+        count[phase == Phase.END] = 0
+        # A game without possible actions is over
+        playing = count > 0
+        if not playing.any():
+            phase[:] = Phase.END
+            return False
+        choice = (uniforms * count).astype(np.int8)
+        month = np.minimum((cumulative <= choice).sum(axis=0, dtype=np.int8),
+                           _MONTHS - 1)
+        chosen = month.astype(np.intp)*len(games) + games
+        rank = choice - np.take(cumulative, chosen) + np.take(counts, chosen)
+        action = 20*month.astype(np.int32) + _MONTH_ACTION_LIST[
+            np.take(index, chosen), np.clip(rank, 0, 19)]
+        play = playing & (phase == Phase.PLAY)
+        capture = playing & (phase == Phase.CAPTURE)
+        go_stop &= playing
+        go = go_stop & (self.deck_size > 0) & (choice == 0)
+
+        card = action // 5
+        slot = action % 5
+        pairs = slot > 0
+        paired = card // 4 * 4 + slot - 1
+        card_bit = _bits(card)
+        paired_bit = _bits(np.maximum(paired, 0))
+
+        # The card is played from the hand
+        played_bit = np.where(play, card_bit, 0)
+        for hand_player, cards in enumerate(self.player_hands):
+            cards ^= np.where(player == hand_player, played_bit, 0)
+        # The paired card leaves the table, or the card is added to it
+        self.table_cards ^= np.where(play | capture,
+                                     np.where(pairs, paired_bit, card_bit), 0)
+
+        # Captures of last turn and of the top card
+        taken_bits = np.where(
+            capture & (self.paired_card != _NONE),
+            _bits(np.maximum(self.played_card, 0)) |
+            _bits(np.maximum(self.paired_card, 0)), 0)
+        taken_bits |= np.where(capture & pairs, card_bit | paired_bit, 0)
+        taken_cards = np.zeros_like(taken_bits)
+        for taken_player, cards in enumerate(self.taken_cards):
+            mine = player == taken_player
+            cards |= np.where(mine, taken_bits, 0)
+            taken_cards |= np.where(mine, cards, 0)
+        scored = np.flatnonzero(capture)
+        score_go_stop = np.zeros_like(capture)
+        score_go_stop[scored] = score_bits(taken_cards[scored]) >= 5
+
+        # The top card is drawn after a card is played
+        self.deck_size -= play
+        top_card = self.deck[games, np.maximum(self.deck_size, 0)]
+        self.top_card = np.where(play, top_card,
+                                 np.where(capture, _NONE, self.top_card))
+        self.played_card = np.where(play, card,
+                                    np.where(capture, _NONE, self.played_card))
+        self.paired_card = np.where(
+            play & pairs, paired,
+            np.where(play | capture, _NONE, self.paired_card))
+
+        phase[play] = Phase.CAPTURE
+        phase[capture] = Phase.PLAY
+        phase[score_go_stop] = Phase.GO_STOP
+        phase[go_stop] = Phase.END
+        phase[go] = Phase.PLAY
+        phase[~playing] = Phase.END
+        self.winner = np.where(go_stop & ~go, player, self.winner) \
+            .astype(np.int8)
+        self.go_count += go
+        next_player = (capture & ~score_go_stop) | go
+        self.current_player = np.where(
+            next_player, (player + 1) % self.number_of_players, player)
+        self.plies += playing
+        return True
+
+    def scores(self):
+        """Returns the points of the cards taken by each player of each game.
+        """
+        return np.stack([score_bits(self.taken_cards[player])
+                         for player in range(self.number_of_players)],
+                        axis=1).astype(np.int32)
+
+    def run(self, uniforms):
+        """Plays every game to the end, choosing the action of ply t with
+        `uniforms[t]`, one column per game, and returns the winner of each
+        game, -1 for a draw, the points of each player and the number of
+        actions played.
+        """
+        start = self.plies.copy()
+        games = np.arange(len(self))
+        rollout = self
+        for ply in range(len(uniforms)):
+            if not rollout.step(uniforms[ply][games]):
+                break
+            # Finished games are left behind once they are a quarter of the
+            # games stepped, so the steps only work on unfinished games
+            playing = np.flatnonzero(rollout.phase != Phase.END)
+            if 4*len(playing) <= 3*len(games):
+                if rollout is not self:
+                    self._put(games, rollout)
+                rollout = rollout._take(playing)
+                games = games[playing]
+        if rollout is not self:
+            self._put(games, rollout)
+        return RolloutResult(self.winner.copy(), self.scores(),
+                             self.plies - start)
+
+    def results(self):
+        """Returns the result of each player of each finished game: 1 for a
+        win, 0 for a loss and 0.5 for a draw.
+        """
+        players = np.arange(self.number_of_players)
+        return np.where(self.winner[:, None] == _NONE, 0.5,
+                        (self.winner[:, None] == players).astype(float))
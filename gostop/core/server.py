@@ -0,0 +1,325 @@
+import json
+import time
+import random
+import asyncio
+import itertools
+import threading
+import concurrent.futures
+from collections import deque
+
+from . import profiling
+from .agent import AsyncAgent
+from .gamestate import GameState, action_id, action_from_id
+from .tournament import load_agent_class, score_points, game_seed
+from .rng import python_rng, game_deck
+
+
+_local = threading.local()
+_worker_profile = False
+
+
+def _init_worker(profile=False):
+    global _worker_profile
+    _worker_profile = profile
+    if profile:
+        profiling.enable()
+
+
+def process_executor(processes=None, profile=False):
+    """Returns a pool of `processes` processes for the bots of a GameServer,
+    which profile the agents and the engine if `profile` is set.
+    """
+    return concurrent.futures.ProcessPoolExecutor(
+        processes, initializer=_init_worker, initargs=(profile,))
+
+
+def _pool_action(spec, data, seed):
+    """Returns the id of the action the agent `spec` chooses in the encoded
+    state `data`, and the profiling counters of the call in a profiled
+    worker process or else None. Runs in a worker thread or process, which
+    keeps one agent of each spec for all the tables. The agent chooses with
+    the random stream of `seed`, so the action doesn't depend on the worker
+    which chooses it. The search agents only reuse a tree for the state
+    which continues the game it was searched for, so decisions of other
+    tables don't mix.
+    """
+    agents = getattr(_local, 'agents', None)
+    if agents is None:
+        agents = _local.agents = {}
+    if spec not in agents:
+        agents[spec] = load_agent_class(spec)(spec)
+    agents[spec].rng = python_rng(seed)
+    state = GameState.decode(data)
+    possible_actions = state.get_possible_actions()
+    action = action_id(agents[spec].get_action(state, possible_actions))
+    profile = None
+    if _worker_profile:
+        profile = profiling.snapshot()
+        profiling.reset()
+    return action, profile
+
+
+class PoolAgent(AsyncAgent):
+    """The agent of the spec `spec`, see `load_agent_class`, choosing its
+    actions in `executor`, a thread or process pool, or the default thread
+    pool of the event loop, so it never blocks the loop. Each decision is
+    made with a random stream seeded from `rng`. The counters of profiled
+    worker processes are added to the dict `profile` if given.
+    """
+    def __init__(self, spec, executor=None, profile=None):
+        super(PoolAgent, self).__init__(spec)
+        self.spec = spec
+        self.executor = executor
+        self.profile = profile
+
+    async def get_action(self, state, possible_actions):
+        loop = asyncio.get_running_loop()
+        action, profile = await loop.run_in_executor(
+            self.executor, _pool_action, self.spec, state.encode(),
+            self.rng.getrandbits(64))
+        if profile and self.profile is not None:
+            self.profile.update(profiling.merge([self.profile, profile]))
+        return action_from_id(action)
+
+
+class Connection(object):
+    """A client connection exchanging one JSON object per line."""
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def send(self, message):
+        self.writer.write(json.dumps(message).encode() + b'\n')
+        await self.writer.drain()
+
+    async def receive(self):
+        """Returns the next message, an empty one if it isn't a JSON object,
+        or None once the client is gone.
+        """
+        line = await self.reader.readline()
+        if not line:
+            return None
+        try:
+            message = json.loads(line)
+        except ValueError:
+            return {}
+        return message if isinstance(message, dict) else {}
+
+
+def state_view(state, player, possible_actions):
+    """Returns the message showing `state` to `player`, without the cards
+    they can't see.
+    """
+    top_card = getattr(state, 'top_card', None)
+    return {
+        'type': 'state',
+        'player': player,
+        'hand': [str(card) for card in state.player_hands[player]],
+        'table': [str(card) for card in state.table_cards],
+        'taken': [[str(card) for card in cards] for cards in state.taken_cards],
+        'deck': len(state.deck),
+        'top_card': None if top_card is None else str(top_card),
+        'actions': [str(action) for action in possible_actions],
+    }
+
+
+class RemoteAgent(AsyncAgent):
+    """A player connected to the server, who is sent the state and answers
+    with the index of an action: `{"action": 0}`.
+    """
+    def __init__(self, name, connection):
+        super(RemoteAgent, self).__init__(name)
+        self.connection = connection
+
+    async def get_action(self, state, possible_actions):
+        await self.connection.send(
+            state_view(state, state.current_player, possible_actions))
+        while True:
+            message = await self.connection.receive()
+            if message is None:
+                raise ConnectionError('{0} left the game'.format(self.name))
+            index = message.get('action')
+            if type(index) == int and 0 <= index < len(possible_actions):
+                return possible_actions[index]
+            await self.connection.send({'type': 'error', 'message': 'Invalid action'})
+
+
+class TableMetrics(object):
+    """The number of actions, the time each player took to choose them and
+    the actions per second of a table.
+    """
+    def __init__(self, number_of_players=2):
+        self.started = time.perf_counter()
+        self.finished = None
+        self.actions = 0
+        self.decisions = [0] * number_of_players
+        self.total_latency = [0.0] * number_of_players
+        self.max_latency = [0.0] * number_of_players
+
+    def record(self, player, seconds):
+        self.actions += 1
+        self.decisions[player] += 1
+        self.total_latency[player] += seconds
+        self.max_latency[player] = max(self.max_latency[player], seconds)
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def as_dict(self):
+        return {
+            'actions': self.actions,
+            'elapsed': self.elapsed,
+            'actions_per_sec': self.actions / self.elapsed if self.elapsed > 0 else 0.0,
+            'mean_latency': [total / count if count else 0.0 for total, count
+                             in zip(self.total_latency, self.decisions)],
+            'max_latency': list(self.max_latency),
+            'finished': self.finished is not None,
+        }
+
+
+class GameTable(object):
+    """A game between AsyncAgents, played by awaiting `play`, dealt from
+    `deck` or from a deck shuffled by the random module.
+    """
+    def __init__(self, table_id, agents, deck=None):
+        self.id = table_id
+        self.agents = agents
+        self.state = GameState.new_game(len(agents), deck)
+        self.metrics = TableMetrics(len(agents))
+        self.winner = None
+        self.scores = None
+
+    async def play(self):
+        """Plays the game and returns the winner, or None for a draw, and
+        the points of each player.
+        """
+        state = self.state
+        while True:
+            possible_actions = state.get_possible_actions()
+            if len(possible_actions) == 0:
+                winner = None
+                break
+            player = state.current_player
+            start = time.perf_counter()
+            action = await self.agents[player].get_action(state, possible_actions)
+            self.metrics.record(player, time.perf_counter() - start)
+            state = self.state = state.generate_successor(action)
+            if state.get_result(player) == 1:
+                winner = player
+                break
+        self.metrics.finished = time.perf_counter()
+
+        for i, agent in enumerate(self.agents):
+            if winner == i:
+                agent.win(state)
+            elif winner is not None:
+                agent.loss(state)
+        self.winner = winner
+        self.scores = [score_points(cards) for cards in state.taken_cards]
+        return self.winner, self.scores
+
+
+class GameServer(object):
+    """Hosts many tables in one event loop, with players connected over TCP
+    and bots of the spec `bot` choosing their actions in `executor`.
+
+    A client sends one JSON object per line:
+    `{"type": "play", "seat": 0}` starts a game against a bot, in which the
+    client is sent the state and answers with an action until it is sent
+    the result, and `{"type": "metrics"}` returns the metrics of the tables
+    being played and of the last `history` tables played, and the profiling
+    counters of the server process and of the worker processes of
+    `process_executor` if profiling is enabled.
+
+    Table `id` is dealt the deck of game `id` of `seed`, and the bots of
+    the table choose with random streams of the seed of that game, as the
+    agents of a tournament do, so a seeded server replays its tables. The
+    seed is drawn from the random module if it is None.
+    """
+    def __init__(self, bot='random', executor=None, history=1000, seed=None):
+        self.bot = bot
+        self.executor = executor
+        self.seed = random.getrandbits(64) if seed is None else seed
+        self.tables = {}
+        self.finished_tables = deque(maxlen=history)
+        self.server = None
+        self.worker_profile = {}
+        self._ids = itertools.count(1)
+
+    def create_table(self, agents):
+        table_id = next(self._ids)
+        seed = game_seed(self.seed, table_id)
+        for player, agent in enumerate(agents):
+            if isinstance(agent, PoolAgent):
+                agent.rng = python_rng(seed, player)
+        table = GameTable(table_id, agents, game_deck(self.seed, table_id))
+        self.tables[table.id] = table
+        return table
+
+    async def play(self, agents):
+        """Plays a game between `agents` at a new table and returns it."""
+        table = self.create_table(agents)
+        try:
+            await table.play()
+        finally:
+            del self.tables[table.id]
+            self.finished_tables.append(table)
+        return table
+
+    async def play_bots(self, specs):
+        """Plays a game between bots of the agent specs `specs`."""
+        return await self.play([PoolAgent(spec, self.executor, self.worker_profile)
+                                for spec in specs])
+
+    def metrics(self):
+        tables = list(self.finished_tables) + list(self.tables.values())
+        return {str(table.id): table.metrics.as_dict() for table in tables}
+
+    def profile(self):
+        """Returns the profiling counters of the server process and its
+        worker processes, or None if profiling is disabled.
+        """
+        if not profiling.enabled() and not self.worker_profile:
+            return None
+        return profiling.merge([profiling.snapshot(), self.worker_profile])
+
+    async def start(self, host='127.0.0.1', port=0):
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def _handle(self, reader, writer):
+        connection = Connection(reader, writer)
+        try:
+            while True:
+                message = await connection.receive()
+                if message is None:
+                    break
+                kind = message.get('type')
+                if kind == 'play':
+                    seat = message.get('seat', 0)
+                    if seat not in (0, 1):
+                        await connection.send({'type': 'error', 'message': 'Invalid seat'})
+                        continue
+                    agents = [PoolAgent(self.bot, self.executor, self.worker_profile)]
+                    agents.insert(seat, RemoteAgent(message.get('name', 'Human'),
+                                                    connection))
+                    table = await self.play(agents)
+                    await connection.send({'type': 'end', 'table': table.id,
+                                           'winner': table.winner,
+                                           'scores': table.scores})
+                elif kind == 'metrics':
+                    await connection.send({'type': 'metrics', 'tables': self.metrics(),
+                                           'profile': self.profile()})
+                else:
+                    await connection.send({'type': 'error', 'message': 'Unknown message'})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,228 @@
+import math
+import time
+import random
+import importlib
+import multiprocessing
+from collections import namedtuple
+
+from . import profiling
+from .gamestate import GameState
+from .records import RecordWriter, record_game
+from .randomagent import RandomAgent
+from .ismctsagent import ISMCTSAgent
+from .rng import GAMES, stream_seed, python_rng, game_deck
+
+
+AGENTS = {
+    'random': RandomAgent,
+    'ismcts': ISMCTSAgent,
+}
+
+
+GameResult = namedtuple('GameResult',
+                        ['index', 'seed', 'winner', 'scores', 'plies', 'record',
+                         'profile'],
+                        defaults=[None, None])
+
+
+def load_agent_class(spec):
+    """Returns the Agent subclass named by `spec`, either a name from
+    `AGENTS` or a path such as `gostop.core.randomagent:RandomAgent`.
+    """
+    if spec in AGENTS:
+        return AGENTS[spec]
+    module_name, _, class_name = spec.replace(':', '.').rpartition('.')
+    if not module_name:
+        raise ValueError('Unknown agent {0}'.format(spec))
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def game_seed(master_seed, index):
+    """Returns the seed of game `index`, which depends only on the master
+    seed and the index so results don't depend on how games are spread over
+    the workers.
+    """
+    return stream_seed(master_seed, GAMES, index)
+
+
+def score_points(taken_cards):
+    return taken_cards.points
+
+
+def play_game(agents, state=None, actions=None):
+    """Plays a game between `agents` without any output and returns the
+    winner, or None for a draw, the points of each player and the number of
+    actions played. The index of each action in the possible actions is
+    appended to the list `actions` if given.
+    """
+    if state is None:
+        state = GameState.new_game()
+    plies = 0
+    while True:
+        possible_actions = state.get_possible_actions()
+        if len(possible_actions) == 0:
+            winner = None
+            break
+        action = agents[state.current_player].get_action(state, possible_actions)
+        if actions is not None:
+            actions.append(possible_actions.index(action))
+        last_player = state.current_player
+        state = state.generate_successor(action)
+        plies += 1
+        if state.get_result(last_player) == 1:
+            winner = last_player
+            break
+
+    for i, agent in enumerate(agents):
+        if winner == i:
+            agent.win(state)
+        elif winner is not None:
+            agent.loss(state)
+    return winner, [score_points(cards) for cards in state.taken_cards], plies
+
+
+_worker_agents = None
+_worker_profile = False
+
+
+def _init_worker(agent_specs, profile=False):
+    global _worker_agents, _worker_profile
+    _worker_agents = [load_agent_class(spec)(spec) for spec in agent_specs]
+    _worker_profile = profile
+    if profile:
+        profiling.enable()
+
+
+def _play(args):
+    """Plays game `index`, with the agents swapping seats every game, and
+    returns the result with the players numbered as in the tournament.
+
+    The deck is the deck of game `index` of the master seed, and each agent
+    has its own random stream of the seed of the game.
+    """
+    index, master_seed, record = args
+    seed = game_seed(master_seed, index)
+    # For agents which use the random module rather than their rng
+    random.seed(seed)
+    for player, agent in enumerate(_worker_agents):
+        agent.rng = python_rng(seed, player)
+    if index % 2 == 0:
+        agents = _worker_agents
+    else:
+        agents = _worker_agents[::-1]
+    deck = game_deck(master_seed, index)
+    actions = [] if record else None
+    winner, scores, plies = play_game(agents, GameState.new_game(deck=deck), actions)
+    if index % 2 == 1:
+        scores = scores[::-1]
+        if winner is not None:
+            winner = 1 - winner
+    if record:
+        record = record_game(seed, deck, actions)
+    profile = None
+    if _worker_profile:
+        profile = profiling.snapshot()
+        profiling.reset()
+    return GameResult(index, seed, winner, scores, plies, record or None, profile)
+
+
+def wilson_interval(wins, games, z=1.96):
+    """Returns the Wilson score interval of a win rate."""
+    if games == 0:
+        return 0.0, 1.0
+    p = wins / games
+    denominator = 1 + z*z/games
+    centre = (p + z*z/(2*games)) / denominator
+    margin = z*math.sqrt(p*(1-p)/games + z*z/(4*games*games)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+class TournamentResult(object):
+    def __init__(self, agent_specs, results, elapsed):
+        self.agent_specs = agent_specs
+        self.results = sorted(results, key=lambda result: result.index)
+        self.elapsed = elapsed
+
+    @property
+    def games(self):
+        return len(self.results)
+
+    @property
+    def draws(self):
+        return sum(1 for result in self.results if result.winner is None)
+
+    def wins(self, player):
+        return sum(1 for result in self.results if result.winner == player)
+
+    def win_rate(self, player):
+        return self.wins(player) / self.games if self.games else 0.0
+
+    @property
+    def profile(self):
+        """The profiling counters of all the games, if they were profiled."""
+        profiles = [result.profile for result in self.results
+                    if result.profile is not None]
+        return profiling.merge(profiles) if profiles else None
+
+    def average_score(self, player):
+        """The average points of `player` in the games they won."""
+        scores = [result.scores[player] for result in self.results
+                  if result.winner == player]
+        return sum(scores) / len(scores) if scores else 0.0
+
+    @property
+    def games_per_second(self):
+        return self.games / self.elapsed if self.elapsed > 0 else float('inf')
+
+    def __str__(self):
+        out = 'Games: {0} ({1:.1f} games/sec), draws: {2}\n'.format(
+            self.games, self.games_per_second, self.draws)
+        for player, spec in enumerate(self.agent_specs):
+            low, high = wilson_interval(self.wins(player), self.games)
+            out += '{0}: win rate {1:.3f} (95% CI {2:.3f}-{3:.3f}), ' \
+                   'average winning score {4:.2f}\n'.format(
+                       spec, self.win_rate(player), low, high,
+                       self.average_score(player))
+        return out
+
+
+def run_tournament(agent_specs, games, master_seed=0, processes=None,
+                   chunksize=64, record_path=None, profile=False):
+    """Plays `games` games between the two agents named by `agent_specs`
+    over a pool of `processes` worker processes, all cores by default, or
+    in this process if `processes` is 0. The games are appended to the
+    record file `record_path` if given, as they finish. With `profile`,
+    each game is profiled in its process, see `TournamentResult.profile`.
+    """
+    tasks = [(index, master_seed, record_path is not None)
+             for index in range(games)]
+    start = time.perf_counter()
+    writer = RecordWriter(record_path) if record_path is not None else None
+    try:
+        if processes == 0:
+            was_enabled = profiling.enabled()
+            _init_worker(agent_specs, profile)
+            try:
+                results = _collect(map(_play, tasks), writer)
+            finally:
+                if profile and not was_enabled:
+                    profiling.disable()
+        else:
+            with multiprocessing.Pool(processes, initializer=_init_worker,
+                                      initargs=(agent_specs, profile)) as pool:
+                results = _collect(pool.imap_unordered(_play, tasks, chunksize),
+                                   writer)
+    finally:
+        if writer is not None:
+            writer.close()
+    return TournamentResult(agent_specs, results, time.perf_counter() - start)
+
+
+def _collect(played, writer):
+    results = []
+    for result in played:
+        if writer is not None:
+            writer.write(result.record)
+            result = result._replace(record=None)
+        results.append(result)
+    return results
@@ -0,0 +1,73 @@
+from collections import namedtuple
+
+
+class Bound(object):
+    EXACT = 0
+    LOWER = 1
+    UPPER = 2
+
+
+Entry = namedtuple('Entry', ['key', 'depth', 'value', 'flag', 'move', 'generation'])
+
+
+class TranspositionTable(object):
+    """A table of `size` search results indexed by `GameState.zobrist_key`,
+    so positions reached through different move orders are searched once.
+
+    Each key maps to a single slot. A new result replaces the stored one if
+    it is for the same position, was searched at least as deep, or the
+    stored one is from an earlier search (see `new_search`). The table can
+    be shared by several agents in the same process.
+    """
+    def __init__(self, size=1 << 16):
+        if size <= 0:
+            raise ValueError('Size must be positive')
+        self.size = size
+        self.entries = [None] * size
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.replacements = 0
+
+    def new_search(self):
+        """Marks the entries stored so far as older than the ones stored
+        from now on, which makes them the first to be replaced.
+        """
+        self.generation += 1
+
+    def lookup(self, key):
+        """Returns the entry of `key`, or None if it isn't in the table."""
+        entry = self.entries[key % self.size]
+        if entry is not None and entry.key == key:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, value, flag=Bound.EXACT, move=None):
+        """Stores the result of searching the position `key` to `depth`,
+        returning whether it was stored.
+        """
+        index = key % self.size
+        entry = self.entries[index]
+        if entry is not None and entry.key != key and \
+                entry.generation == self.generation and entry.depth > depth:
+            return False
+        if entry is not None and entry.key != key:
+            self.replacements += 1
+        self.entries[index] = Entry(key, depth, value, flag, move, self.generation)
+        self.stores += 1
+        return True
+
+    def clear(self):
+        self.entries = [None] * self.size
+        self.generation = 0
+        self.hits = self.misses = self.stores = self.replacements = 0
+
+    def __len__(self):
+        return sum(1 for entry in self.entries if entry is not None)
+
+    def __contains__(self, key):
+        entry = self.entries[key % self.size]
+        return entry is not None and entry.key == key
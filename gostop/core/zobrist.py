@@ -0,0 +1,38 @@
+import random
+
+from .card import ALL_CARDS
+
+
+# Locations of a card. The top card and the cards paired during the play
+# phase are in play until the capture phase resolves them.
+DECK = 0
+TABLE = 1
+IN_PLAY = 2
+MAX_PLAYERS = 4
+MAX_GO_COUNT = 15
+
+
+def hand(player):
+    return 3 + 2*player
+
+
+def taken(player):
+    return 4 + 2*player
+
+
+# Fixed seed, so keys agree between processes sharing a table
+_rng = random.Random(0x60570b)
+
+CARD_KEYS = tuple(
+    tuple(_rng.getrandbits(64) for location in range(3 + 2*MAX_PLAYERS))
+    for card in ALL_CARDS)
+PLAYER_KEYS = tuple(_rng.getrandbits(64) for player in range(MAX_PLAYERS))
+PHASE_KEYS = tuple(_rng.getrandbits(64) for phase in range(4))
+GO_KEYS = tuple(_rng.getrandbits(64) for count in range(MAX_GO_COUNT + 1))
+
+
+def cards_key(cards, location):
+    key = 0
+    for card in cards:
+        key ^= CARD_KEYS[card.id][location]
+    return key
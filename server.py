@@ -0,0 +1,51 @@
+import sys
+import asyncio
+import argparse
+
+from gostop.core import profiling
+from gostop.core.server import GameServer, process_executor
+
+
+async def serve(args):
+    executor = None
+    if args.processes:
+        executor = process_executor(args.processes, args.profile)
+    server = GameServer(args.bot, executor, seed=args.seed)
+    await server.start(args.host, args.port)
+    print('Serving on {0}:{1}'.format(args.host, args.port))
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+        if executor is not None:
+            executor.shutdown()
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='Address to listen on')
+    parser.add_argument('-p', '--port', type=int, default=8765,
+                        help='Port to listen on')
+    parser.add_argument('-b', '--bot', default='random',
+                        help='Agent the players play against, e.g. random or ismcts')
+    parser.add_argument('-s', '--seed',
+                        help='Random seed of the decks and the bots of the tables')
+    parser.add_argument('-j', '--processes', type=int, default=0,
+                        help='Number of processes choosing bot actions, 0 for threads')
+    parser.add_argument('--profile', action='store_true',
+                        help='Count the calls and time of the engine in the server and its processes')
+
+    args = parser.parse_args(argv)
+    if args.profile:
+        profiling.enable()
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,30 @@
+import os
+import tempfile
+import unittest
+
+from gostop.core.benchmark import BenchmarkResult, BENCHMARKS, measure, \
+    compare, save_baseline, load_baseline, format_results
+
+
+class BenchmarkTest(unittest.TestCase):
+    def test_benchmarks_run(self):
+        for name, benchmark in BENCHMARKS.items():
+            if name != 'create_image':
+                benchmark()()
+
+    def test_measure(self):
+        result = measure('list', lambda: [0] * 1000, repeat=1)
+        self.assertGreater(result.ops_per_sec, 0)
+        self.assertGreaterEqual(result.peak_bytes, 8000)
+
+    def test_compare_with_baseline(self):
+        results = [BenchmarkResult('fast', 100.0, 0),
+                   BenchmarkResult('slow', 70.0, 0),
+                   BenchmarkResult('new', 1.0, 0)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'baseline.json')
+            save_baseline([BenchmarkResult('fast', 100.0, 0),
+                           BenchmarkResult('slow', 100.0, 0)], path)
+            baseline = load_baseline(path)
+        self.assertEqual(compare(results, baseline), ['slow'])
+        self.assertIn('-30.0%', format_results(results, baseline))
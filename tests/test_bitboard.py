@@ -0,0 +1,147 @@
+import random
+import unittest
+
+from gostop.core.card import *
+from gostop.core.deck import Deck
+from gostop.core.hand import CardList, Hand, TakenCards, TableCards
+from gostop.core.bitboard import BitCardList, BitHand, BitTakenCards, \
+    BitTableCards, BIT_CONTAINERS, card_bits
+from gostop.core.gamestate import GameState, action_id
+from gostop.core.mutablestate import MutableGameState
+
+
+class BitCardListTest(unittest.TestCase):
+    def test_add_and_pop(self):
+        cards = BitCardList()
+        cards += CRANE
+        self.assertEqual(len(cards), 1)
+        self.assertEqual(cards.bits, 1)
+
+        card = cards.pop()
+        self.assertEqual(card, CRANE)
+
+        self.assertRaises(IndexError, cards.pop)
+
+    def test_each_card_has_one_bit(self):
+        cards = BitCardList(PINE, PINE_B)
+        self.assertEqual(len(cards), 2)
+        self.assertRaises(ValueError, cards.__iadd__, PINE)
+
+        cards.remove(PINE)
+        self.assertEqual(list(cards), [PINE_B])
+        self.assertRaises(ValueError, cards.remove, PINE)
+
+    def test_iterates_in_deck_order(self):
+        cards = BitCardList(RAIN, CRANE, SWALLOW, CURTAIN)
+        self.assertEqual(list(cards), [CRANE, CURTAIN, RAIN, SWALLOW])
+
+    def test_equal_and_hash(self):
+        h1 = BitCardList(CRANE, PINE_RED_POEM, PINE, PINE_B)
+        h2 = BitCardList(PINE_RED_POEM, PINE, CRANE, PINE_B)
+        self.assertEqual(h1, h2)
+        self.assertEqual(hash(h1), hash(h2))
+        self.assertEqual(h1, CardList(PINE, CRANE, PINE_B, PINE_RED_POEM))
+        self.assertNotEqual(h1, BitCardList(CRANE, PINE_RED_POEM, PINE))
+
+    def test_add(self):
+        cards = BitCardList(CRANE) + BitCardList(MOON)
+        self.assertEqual(cards.bits, card_bits([CRANE, MOON]))
+        cards = BitCardList(CRANE) + [MOON]
+        self.assertEqual(list(cards), [CRANE, MOON])
+
+    def test_clear(self):
+        cards = BitCardList(CRANE, CURTAIN, MOON, PHOENIX, RAIN, SWALLOW)
+        cards.clear()
+
+        self.assertEqual(len(cards), 0)
+
+    def test_split_by_month(self):
+        cards = BitCardList(CRANE, CURTAIN, MOON, PHOENIX, RAIN, SWALLOW)
+        month_cards = cards.split_by_month()
+
+        self.assertEqual(month_cards[Month.JAN], [CRANE, ])
+        self.assertEqual(month_cards[Month.FEB], [])
+        self.assertEqual(month_cards[Month.DEC], [RAIN, SWALLOW])
+
+    def test_split_by_group(self):
+        cards = BitCardList(CRANE, CUCKOO, IRIS_RED, PAULOWNIA, WISTERIA, WILLOW_2)
+        group_cards = cards.split_by_group()
+
+        self.assertEqual(group_cards[Group.BRIGHT], [CRANE, ])
+        self.assertEqual(group_cards[Group.ANIMAL], [CUCKOO, ])
+        self.assertEqual(group_cards[Group.RIBBON], [IRIS_RED, ])
+        self.assertEqual(group_cards[Group.JUNK], [WISTERIA, PAULOWNIA])
+        self.assertEqual(group_cards[Group.JUNK_2], [WILLOW_2, ])
+
+
+class BitSubclassTest(unittest.TestCase):
+    def test_hand_score(self):
+        self.assertEqual(BitHand(CRANE, PINE_RED_POEM, PINE, PINE_B).score,
+                         Hand(CRANE, PINE_RED_POEM, PINE, PINE_B).score)
+
+    def test_taken_cards_score(self):
+        cards = (BUSH_WARBLER, CUCKOO, GEESE, CRANE, CURTAIN, RAIN,
+                 CUP, PINE, PINE_B, PLUM, PLUM_B, CHERRY, WILLOW_2)
+        self.assertEqual(BitTakenCards(*cards).score, TakenCards(*cards).score)
+
+    def test_table_paired_cards(self):
+        table = BitTableCards(PINE, CRANE, PLUM)
+        self.assertEqual(table.get_paired_cards(PINE), [CRANE, PINE])
+        self.assertEqual(table.get_paired_cards(CHERRY), [])
+        self.assertEqual(table, TableCards(PINE, CRANE, PLUM))
+        self.assertEqual(table.month_cards()[1], [CRANE, PINE])
+        self.assertEqual(table.month_cards()[2], [PLUM])
+        self.assertEqual(len(table.month_cards()), 13)
+
+
+class BitGameStateTest(unittest.TestCase):
+    def assertSameState(self, bit_state, state):
+        self.assertEqual(bit_state, state)
+        self.assertEqual(bit_state.zobrist_key(), state.zobrist_key())
+        for player in range(state.number_of_players):
+            self.assertEqual(bit_state.unseen_cards(player),
+                             state.unseen_cards(player))
+            self.assertEqual(bit_state.taken_cards[player].score,
+                             state.taken_cards[player].score)
+
+    def test_game_matches_list_containers(self):
+        rng = random.Random(0)
+        for game in range(5):
+            deck = Deck()
+            deck.shuffle(rng)
+            state = GameState.new_game(deck=deck)
+            bit_state = GameState.new_game(deck=deck,
+                                           containers=BIT_CONTAINERS)
+            self.assertIsInstance(bit_state.table_cards, BitTableCards)
+            while True:
+                self.assertSameState(bit_state, state)
+                # Bitboards list the cards in deck order, so the actions
+                # are compared in id order
+                actions = sorted(state.get_possible_actions(), key=action_id)
+                self.assertEqual(
+                    sorted(bit_state.get_possible_actions(), key=action_id),
+                    actions)
+                if not actions:
+                    break
+                action = rng.choice(actions)
+                state = state.generate_successor(action)
+                bit_state = bit_state.generate_successor(action)
+            self.assertEqual(bit_state.winner, state.winner)
+            self.assertIsInstance(bit_state.taken_cards[0], BitTakenCards)
+
+    def test_determinize_to_bitboards(self):
+        state = GameState.new_game(rng=random.Random(1))
+        state = state.generate_successor(state.get_possible_actions()[0])
+        copy = state.copy_and_randomise(0, random.Random(2))
+        bit_copy = state.copy_and_randomise(0, random.Random(2),
+                                            BIT_CONTAINERS)
+        self.assertIsInstance(bit_copy.player_hands[1], BitHand)
+        self.assertSameState(bit_copy, copy)
+        self.assertEqual(bit_copy.deck, copy.deck)
+
+        mutable = MutableGameState(state)
+        cards = list(copy.player_hands[1]) + list(copy.deck)
+        bit_mutable = mutable.determinize(0, cards, BIT_CONTAINERS)
+        self.assertIsInstance(bit_mutable.taken_cards[1], BitTakenCards)
+        self.assertSameState(bit_mutable.to_game_state(),
+                             mutable.determinize(0, cards).to_game_state())
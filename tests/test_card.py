@@ -14,3 +14,23 @@ class CardTest(unittest.TestCase):
         card1 = Card(u'Pine and Crane', Month.JAN, Group.BRIGHT)
         card2 = Card(u'Pine and Crane', Month.JAN, Group.BRIGHT)
         self.assertEqual(hash(card1), hash(card2))
+
+    def test_cards_are_interned(self):
+        self.assertIs(Card(u'Pine', Month.JAN, Group.JUNK, 2), PINE)
+        self.assertRaises(ValueError, Card, u'Pine', Month.JAN, Group.BRIGHT, 2)
+
+    def test_duplicate_cards_differ(self):
+        self.assertNotEqual(PINE, PINE_B)
+        self.assertEqual(len(set(ALL_CARDS)), 48)
+
+    def test_ids(self):
+        self.assertEqual([card.id for card in ALL_CARDS], list(range(48)))
+        for card in ALL_CARDS:
+            self.assertIs(Card.from_id(card.id), card)
+
+    def test_slots(self):
+        self.assertFalse(hasattr(CRANE, '__dict__'))
+
+    def test_pickle(self):
+        import pickle
+        self.assertIs(pickle.loads(pickle.dumps(CUP)), CUP)
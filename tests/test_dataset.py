@@ -0,0 +1,102 @@
+import os
+import random
+import tempfile
+import unittest
+
+import numpy as np
+
+from gostop.core.deck import Deck
+from gostop.core.hand import TakenCards
+from gostop.core.gamestate import GameState, action_id
+from gostop.core.records import record_game
+from gostop.core.dataset import ShardWriter, POSITION_DTYPE, export_records, \
+    load_shards, shard_paths
+
+
+def random_record(seed):
+    random.seed(seed)
+    deck = Deck()
+    deck.shuffle()
+    actions = []
+    state = GameState.new_game(deck=deck)
+    while state.get_possible_actions():
+        possible_actions = state.get_possible_actions()
+        action = random.choice(possible_actions)
+        actions.append(possible_actions.index(action))
+        state = state.generate_successor(action)
+    return record_game(seed, deck, actions)
+
+
+def card_flags(cards):
+    flags = [False] * 48
+    for card in cards:
+        flags[card.id] = True
+    return flags
+
+
+class ShardWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_rows_match_states(self):
+        random.seed(0)
+        state = GameState.new_game()
+        states = [state]
+        actions = []
+        while state.get_possible_actions():
+            action = random.choice(state.get_possible_actions())
+            actions.append(action)
+            state = state.generate_successor(action)
+            states.append(state)
+        with ShardWriter(self.path) as writer:
+            writer.write_game(states, actions)
+
+        rows, = load_shards(self.path)
+        self.assertEqual(rows.dtype, POSITION_DTYPE)
+        self.assertEqual(len(rows), len(actions))
+        for row, state, action in zip(rows, states, actions):
+            player = state.current_player
+            self.assertEqual(list(row['hand']), card_flags(state.player_hands[player]))
+            self.assertEqual(list(row['table']), card_flags(state.table_cards))
+            self.assertEqual(list(row['taken'][0]), card_flags(state.taken_cards[player]))
+            self.assertEqual(list(row['taken'][1]), card_flags(state.taken_cards[1 - player]))
+            self.assertEqual(row['deck_size'], len(state.deck))
+            self.assertEqual(row['player'], player)
+            for taken, counts, points in zip(
+                    [state.taken_cards[player], state.taken_cards[1 - player]],
+                    row['counts'], row['points']):
+                self.assertEqual(list(counts), [getattr(taken, counter)
+                                                for counter in TakenCards.COUNTERS])
+                self.assertEqual(points, sum(s for label, s in taken.score))
+            self.assertEqual(list(np.flatnonzero(row['legal'])),
+                             sorted(action_id(possible_action) for possible_action
+                                    in state.get_possible_actions()))
+            self.assertEqual(row['action'], action_id(action))
+            self.assertEqual(row['result'], states[-1].get_result(player))
+
+    def test_shards(self):
+        records = [random_record(seed) for seed in range(20)]
+        count = export_records(records, self.path, rows_per_shard=100)
+        self.assertEqual(count, sum(len(record.actions) for record in records))
+
+        shards = load_shards(self.path)
+        self.assertEqual(len(shards), (count + 99) // 100)
+        self.assertTrue(all(isinstance(shard, np.memmap) for shard in shards))
+        self.assertTrue(all(len(shard) == 100 for shard in shards[:-1]))
+        self.assertEqual(sum(len(shard) for shard in shards), count)
+        self.assertTrue(all(shard['legal'][np.arange(len(shard)), shard['action']].all()
+                            for shard in shards))
+
+        # Exporting more continues the numbering
+        export_records(records[:1], self.path, rows_per_shard=100)
+        self.assertEqual(len(shard_paths(self.path)), len(shards) + 1)
+        self.assertTrue(os.path.basename(shard_paths(self.path)[-1]).startswith(
+            'positions-{0:05d}'.format(len(shards))))
+
+    def test_rows_per_shard(self):
+        with self.assertRaises(ValueError):
+            ShardWriter(self.path, rows_per_shard=0)
@@ -0,0 +1,73 @@
+import random
+import unittest
+
+from gostop.core.gamestate import GameState
+from gostop.core.bitboard import card_bits
+from gostop.core.ismctsagent import ISMCTSAgent
+from gostop.core.endgame import EndgameSolver, cards_left, \
+    determinization_count, determinizations
+
+
+def endgame_states(count, cards, seed):
+    """Positions of random games with at most `cards` cards left."""
+    rng = random.Random(seed)
+    states = []
+    while len(states) < count:
+        random.seed(rng.getrandbits(64))
+        state = GameState.new_game()
+        while state.get_possible_actions():
+            if cards_left(state) <= cards and len(state.get_possible_actions()) > 1:
+                states.append(state)
+                break
+            state = state.generate_successor(rng.choice(state.get_possible_actions()))
+    return states
+
+
+def minimax(state, player):
+    possible_actions = state.get_possible_actions()
+    if not possible_actions:
+        return state.get_result(player)
+    values = [minimax(state.generate_successor(action), player)
+              for action in possible_actions]
+    return max(values) if state.current_player == player else min(values)
+
+
+class EndgameSolverTest(unittest.TestCase):
+    def test_matches_minimax(self):
+        solver = EndgameSolver()
+        for state in endgame_states(30, 8, 0):
+            for player in range(2):
+                self.assertEqual(solver.solve(state, player), minimax(state, player))
+            actions = state.get_possible_actions()
+            self.assertEqual(
+                solver.action_values(state, actions),
+                [minimax(state.generate_successor(action), state.current_player)
+                 for action in actions])
+
+    def test_determinizations(self):
+        for state in endgame_states(20, 6, 1):
+            observer = state.current_player
+            states = list(determinizations(state, observer))
+            self.assertEqual(len(states), determinization_count(state, observer))
+            self.assertEqual(len({tuple(card.id for card in s.deck) +
+                                  (card_bits(s.player_hands[1 - observer]),)
+                                  for s in states}), len(states))
+            for s in states:
+                self.assertEqual(list(s.player_hands[observer]),
+                                 list(state.player_hands[observer]))
+                self.assertEqual(s.unseen_cards(observer), state.unseen_cards(observer))
+                self.assertEqual(len(s.deck), len(state.deck))
+
+    def test_agent_plays_best_average_action(self):
+        agent = ISMCTSAgent('ISMCTS', iterations=1)
+        solver = EndgameSolver()
+        for state in endgame_states(20, 6, 2):
+            observer = state.current_player
+            actions = state.get_possible_actions()
+            totals = [0.0] * len(actions)
+            for determinization in determinizations(state, observer):
+                for i, action in enumerate(actions):
+                    totals[i] += minimax(determinization.generate_successor(action),
+                                         observer)
+            action = agent.get_action(state, actions)
+            self.assertEqual(totals[actions.index(action)], max(totals))
@@ -0,0 +1,113 @@
+import random
+import unittest
+
+import numpy as np
+
+from gostop.core.bitboard import iter_bits
+from gostop.core.gamestate import GameStateException, action_id, NUM_ACTIONS
+from gostop.core.randomagent import RandomAgent
+from gostop.core.env import GoStopEnv, VectorEnv, HAND, TABLE, TAKEN, \
+    OTHER_TAKEN, UNSEEN, DECK_SIZE, OTHER_HAND_SIZE, OBSERVATION_SIZE
+
+
+def card_ids(flags):
+    return list(np.flatnonzero(flags))
+
+
+def random_actions(masks, rng):
+    return (rng.random(masks.shape) * masks).argmax(axis=1)
+
+
+class GoStopEnvTest(unittest.TestCase):
+    def test_observation_hides_other_hand(self):
+        env = GoStopEnv()
+        observation, mask = env.reset(seed=1)
+        rng = np.random.default_rng(0)
+        done = False
+        while not done:
+            state = env.state
+            player = state.current_player
+            self.assertEqual(observation.shape, (OBSERVATION_SIZE,))
+            self.assertEqual(card_ids(observation[HAND]),
+                             sorted(card.id for card in state.player_hands[player]))
+            self.assertEqual(card_ids(observation[TABLE]),
+                             sorted(card.id for card in state.table_cards))
+            self.assertEqual(card_ids(observation[TAKEN]),
+                             sorted(card.id for card in state.taken_cards[player]))
+            self.assertEqual(card_ids(observation[OTHER_TAKEN]),
+                             sorted(card.id for card in state.taken_cards[1 - player]))
+            self.assertEqual(card_ids(observation[UNSEEN]),
+                             [card.id for card in iter_bits(state.unseen_cards(player))])
+            self.assertEqual(observation[DECK_SIZE], len(state.deck))
+            self.assertEqual(observation[OTHER_HAND_SIZE],
+                             len(state.player_hands[1 - player]))
+            self.assertEqual(card_ids(mask), sorted(
+                action_id(action) for action in state.get_possible_actions()))
+            observation, reward, done, mask = env.step(
+                int(random_actions(mask[None], rng)[0]))
+        self.assertFalse(mask.any())
+        with self.assertRaises(GameStateException):
+            env.step(0)
+
+    def test_reset_seed(self):
+        env = GoStopEnv()
+        first = env.reset(seed=3)[0].copy()
+        env.reset(seed=4)
+        self.assertTrue((env.reset(seed=3)[0] == first).all())
+
+    def test_illegal_action(self):
+        env = GoStopEnv()
+        observation, mask = env.reset(seed=5)
+        with self.assertRaises(ValueError):
+            env.step(int(np.flatnonzero(~mask)[0]))
+        with self.assertRaises(ValueError):
+            env.step(NUM_ACTIONS)
+        env.step(env.state.get_possible_actions()[0])
+
+    def test_opponent(self):
+        random.seed(6)
+        env = GoStopEnv(RandomAgent('random'), player=1)
+        rng = np.random.default_rng(1)
+        for game in range(10):
+            observation, mask = env.reset()
+            done = False
+            while not done:
+                self.assertEqual(env.state.current_player, 1)
+                observation, reward, done, mask = env.step(
+                    int(random_actions(mask[None], rng)[0]))
+            self.assertEqual(reward, env.state.get_result(1))
+
+
+class VectorEnvTest(unittest.TestCase):
+    def play(self, processes):
+        rewards = []
+        with VectorEnv(8, opponent='random', processes=processes) as env:
+            observations, masks = env.reset(seed=7)
+            rng = np.random.default_rng(2)
+            for i in range(100):
+                observations, reward, dones, masks = env.step(
+                    random_actions(masks, rng))
+                self.assertTrue(masks.any(axis=1).all())
+                rewards.append(reward.copy())
+            return observations.copy(), np.array(rewards)
+
+    def test_in_process(self):
+        observations, rewards = self.play(0)
+        self.assertEqual(observations.shape, (8, OBSERVATION_SIZE))
+        self.assertTrue(rewards.any())
+        other_observations, other_rewards = self.play(0)
+        self.assertTrue((observations == other_observations).all())
+        self.assertTrue((rewards == other_rewards).all())
+
+    def test_processes(self):
+        observations, rewards = self.play(2)
+        self.assertTrue(rewards.any())
+        other_observations, other_rewards = self.play(0)
+        self.assertTrue((observations == other_observations).all())
+        self.assertTrue((rewards == other_rewards).all())
+
+    def test_actions_shape(self):
+        with VectorEnv(2) as env:
+            env.reset(seed=0)
+            with self.assertRaises(ValueError):
+                env.step([0])
@@ -1,8 +1,17 @@
+import random
 import unittest
+from io import StringIO
+from contextlib import redirect_stdout
 
 from gostop.core.card import *
-from gostop.core.hand import TableCards, Hand
-from gostop.core.gamestate import GameStatePlay, GameActionPlayCard
+from gostop.core.deck import Deck
+from gostop.core.bitboard import card_bits
+from gostop.core.hand import TableCards, Hand, TakenCards
+from gostop.core.gamestate import GameState, GameStatePlay, \
+    GameStateCapture, GameActionPlayCard, GameActionGo, GameActionStop, \
+    ACTIONS, NUM_ACTIONS, GO_ACTION_ID, STOP_ACTION_ID, action_id, \
+    action_from_id, actions_from_mask, capture_order
+from gostop.core.mutablestate import MutableGameState
 
 
 class GameStatePlayTest(unittest.TestCase):
@@ -40,3 +49,276 @@ class GameStatePlayTest(unittest.TestCase):
         actions = self.state.get_possible_actions()
         self.assertIn(GameActionPlayCard(CHERRY), actions)
         self.assertEqual(1, len(actions))
+
+
+class GameStateSuccessorTest(unittest.TestCase):
+    def setUp(self):
+        self.state = GameStatePlay()
+        self.state.deck = Deck(cards=[MOON, CURTAIN])
+        self.state.table_cards = TableCards(CRANE, PLUM)
+        self.state.player_hands = [Hand(PINE, CHERRY), Hand(MAPLE)]
+        self.state.taken_cards = [TakenCards(), TakenCards(RAIN)]
+
+    def test_successor_shares_untouched_containers(self):
+        state = self.state.generate_successor(GameActionPlayCard(PINE, CRANE))
+
+        self.assertIsInstance(state, GameStateCapture)
+        self.assertIs(state.player_hands[1], self.state.player_hands[1])
+        self.assertIs(state.taken_cards[0], self.state.taken_cards[0])
+        self.assertIs(state.taken_cards[1], self.state.taken_cards[1])
+        self.assertIsNot(state.player_hands[0], self.state.player_hands[0])
+        self.assertIsNot(state.table_cards, self.state.table_cards)
+        self.assertIsNot(state.deck, self.state.deck)
+
+        self.assertEqual(state.player_hands[0], Hand(CHERRY))
+        self.assertEqual(state.table_cards, TableCards(PLUM))
+        self.assertEqual(state.top_card, CURTAIN)
+
+    def test_successor_leaves_previous_state_unchanged(self):
+        state = self.state.generate_successor(GameActionPlayCard(PINE, CRANE))
+        state.generate_successor(GameActionPlayCard(CURTAIN))
+
+        self.assertEqual(self.state.deck, [MOON, CURTAIN])
+        self.assertEqual(self.state.table_cards, TableCards(CRANE, PLUM))
+        self.assertEqual(self.state.player_hands[0], Hand(PINE, CHERRY))
+        self.assertEqual(self.state.taken_cards[0], TakenCards())
+        self.assertEqual(state.table_cards, TableCards(PLUM))
+        self.assertEqual(state.taken_cards[0], TakenCards())
+
+    def test_capture_copies_taken_cards_once(self):
+        state = self.state.generate_successor(GameActionPlayCard(PINE, CRANE))
+        state = state.generate_successor(GameActionPlayCard(CURTAIN))
+
+        self.assertEqual(state.taken_cards[0], TakenCards(PINE, CRANE))
+        self.assertEqual(state.table_cards, TableCards(PLUM, CURTAIN))
+        self.assertIs(state.taken_cards[1], self.state.taken_cards[1])
+        self.assertEqual(state.current_player, 1)
+
+
+class GameStateHeadlessTest(unittest.TestCase):
+    def test_game_writes_nothing(self):
+        random.seed(0)
+        out = StringIO()
+        with redirect_stdout(out):
+            state = GameState.new_game()
+            while state is not None and state.get_possible_actions():
+                state = state.generate_successor(
+                    random.choice(state.get_possible_actions()))
+        self.assertEqual(out.getvalue(), '')
+
+
+class GameStateRandomiseTest(unittest.TestCase):
+    def play(self, seed):
+        random.seed(seed)
+        state = GameState.new_game()
+        while state is not None and state.get_possible_actions():
+            yield state
+            state = state.generate_successor(
+                random.choice(state.get_possible_actions()))
+
+    def test_unseen_cards_follow_play(self):
+        for state in self.play(0):
+            unseen = [state.unseen_cards(player) for player in range(2)]
+            state._unseen = None
+            self.assertEqual(
+                unseen, [state.unseen_cards(player) for player in range(2)])
+            self.assertEqual(unseen[0],
+                             card_bits(list(state.player_hands[1]) + state.deck))
+
+    def test_unseen_cards_follow_assigned_containers(self):
+        state = GameState.new_game()
+        state.unseen_cards(1)
+        state.table_cards = TableCards(CRANE, PINE)
+        state.player_hands = [Hand(CURTAIN), Hand(MOON)]
+        state.taken_cards = [TakenCards(PINE_B), TakenCards()]
+        state.deck = Deck([PLUM])
+        self.assertEqual(state.unseen_cards(0), card_bits([MOON, PLUM]))
+        self.assertEqual(state.unseen_cards(1), card_bits([CURTAIN, PLUM]))
+
+    def test_unseen_cards_follow_changes_in_place(self):
+        random.seed(4)
+        state = GameState.new_game()
+        self.assertEqual(state.unseen_cards(1).bit_count(), 30)
+        card = state.player_hands[0].pop()
+        self.assertEqual(state.unseen_cards(1).bit_count(), 29)
+        state.table_cards += card
+        self.assertEqual(state.unseen_cards(1),
+                         card_bits(list(state.player_hands[0]) + state.deck))
+
+        # A successor of a state changed in place starts from its cards
+        state.player_hands[1].pop()
+        state = state.generate_successor(state.get_possible_actions()[0])
+        self.assertEqual(state.unseen_cards(0),
+                         card_bits(list(state.player_hands[1]) + state.deck))
+
+    def test_copy_and_randomise_keeps_observer_view(self):
+        for state in self.play(1):
+            observer = state.current_player
+            other = 1 - observer
+            copy = state.copy_and_randomise(observer)
+
+            self.assertIs(copy.__class__, state.__class__)
+            self.assertEqual(copy.player_hands[observer],
+                             state.player_hands[observer])
+            self.assertEqual(copy.table_cards, state.table_cards)
+            self.assertEqual(copy.taken_cards, state.taken_cards)
+            self.assertEqual(getattr(copy, 'top_card', None),
+                             getattr(state, 'top_card', None))
+            self.assertEqual(len(copy.player_hands[other]),
+                             len(state.player_hands[other]))
+            self.assertEqual(len(copy.deck), len(state.deck))
+            self.assertEqual(
+                card_bits(list(copy.player_hands[other]) + copy.deck),
+                card_bits(list(state.player_hands[other]) + state.deck))
+
+    def test_copy_and_randomise_batch(self):
+        random.seed(2)
+        state = GameState.new_game()
+        copies = state.copy_and_randomise_batch(0, 20)
+        self.assertEqual(len(copies), 20)
+        self.assertGreater(len(set(tuple(copy.deck) for copy in copies)), 1)
+        self.assertEqual(state, GameState.decode(state.encode()))
+        for copy in copies:
+            self.assertEqual(copy.player_hands[0], state.player_hands[0])
+            copy.generate_successor(copy.get_possible_actions()[0])
+        self.assertEqual(len(state.deck), 20)
+
+
+class GameStateZobristTest(unittest.TestCase):
+    def recomputed_key(self, state):
+        copy = GameState.decode(state.encode())
+        copy._cards_key = None
+        return copy.zobrist_key()
+
+    def test_incremental_key_matches_recomputed_key(self):
+        for seed in range(10):
+            random.seed(seed)
+            state = GameState.new_game()
+            while True:
+                self.assertEqual(state.zobrist_key(), self.recomputed_key(state))
+                self.assertEqual(hash(state), hash(state.zobrist_key()))
+                possible_actions = state.get_possible_actions()
+                if possible_actions == []:
+                    break
+                state = state.generate_successor(random.choice(possible_actions))
+
+    def test_same_cards_in_other_order_have_same_key(self):
+        first = GameStatePlay()
+        first.table_cards = TableCards(CRANE, PINE_RED_POEM, PLUM)
+        first.player_hands = [Hand(PINE, CHERRY), Hand(PLUM_B)]
+        second = GameStatePlay()
+        second.table_cards = TableCards(PLUM, CRANE, PINE_RED_POEM)
+        second.player_hands = [Hand(CHERRY, PINE), Hand(PLUM_B)]
+        self.assertEqual(hash(first), hash(second))
+        self.assertEqual(first, second)
+
+        second.current_player = 1
+        self.assertNotEqual(hash(first), hash(second))
+        second.current_player = 0
+        second.go_count = 1
+        self.assertNotEqual(hash(first), hash(second))
+        self.assertNotEqual(first, second)
+
+    def test_assigned_containers_recompute_key(self):
+        random.seed(3)
+        state = GameState.new_game()
+        key = state.zobrist_key()
+        state.table_cards = TableCards(CRANE, PINE)
+        self.assertNotEqual(state.zobrist_key(), key)
+        self.assertEqual(state.zobrist_key(), self.recomputed_key(state))
+        self.assertEqual(hash(state), hash(GameState.decode(state.encode())))
+
+    def test_changes_in_place_recompute_key(self):
+        random.seed(5)
+        state = GameState.new_game()
+        key = state.zobrist_key()
+        card = state.player_hands[0].pop()
+        state.table_cards.insert(0, card)
+        self.assertNotEqual(state.zobrist_key(), key)
+        self.assertEqual(state.zobrist_key(), self.recomputed_key(state))
+
+        state.taken_cards[1] += state.deck.pop()
+        state = state.generate_successor(state.get_possible_actions()[0])
+        self.assertEqual(state.zobrist_key(), self.recomputed_key(state))
+
+    def test_randomised_copy_recomputes_key(self):
+        random.seed(0)
+        state = GameState.new_game()
+        copy = state.copy_and_randomise(0)
+        self.assertEqual(copy.zobrist_key(), self.recomputed_key(copy))
+
+
+class ActionEncodingTest(unittest.TestCase):
+    def test_ids_round_trip(self):
+        self.assertEqual(len(ACTIONS), NUM_ACTIONS)
+        for i, action in enumerate(ACTIONS):
+            self.assertEqual(action_id(action), i)
+            self.assertIs(action_from_id(i), action)
+        self.assertEqual(action_id(GameActionPlayCard(PINE, CRANE)),
+                         action_id(GameActionPlayCard(PINE, CRANE)))
+        self.assertEqual(action_id(GameActionGo()), GO_ACTION_ID)
+        self.assertEqual(action_id(GameActionStop()), STOP_ACTION_ID)
+
+    def test_invalid_ids(self):
+        for invalid_id in [-1, NUM_ACTIONS]:
+            with self.assertRaises(ValueError):
+                action_from_id(invalid_id)
+        with self.assertRaises(ValueError):
+            action_id(None)
+
+    def test_legal_action_mask(self):
+        rng = random.Random(8)
+        for i in range(20):
+            random.seed(rng.getrandbits(64))
+            state = GameState.new_game()
+            while True:
+                possible_actions = state.get_possible_actions()
+                mask = state.legal_action_mask()
+                self.assertEqual(mask, sum(1 << action_id(action)
+                                           for action in possible_actions))
+                self.assertEqual(mask, MutableGameState(state).legal_action_mask())
+                self.assertEqual(actions_from_mask(mask),
+                                 sorted(possible_actions, key=action_id))
+                if not possible_actions:
+                    break
+                state = state.generate_successor(rng.choice(possible_actions))
+
+    def test_possible_actions_are_interned(self):
+        random.seed(9)
+        state = GameState.new_game()
+        for action in state.get_possible_actions():
+            self.assertIs(action, ACTIONS[action_id(action)])
+
+
+class LazyActionTest(unittest.TestCase):
+    def test_iter_and_sample_match_possible_actions(self):
+        rng = random.Random(10)
+        for i in range(20):
+            random.seed(rng.getrandbits(64))
+            state = GameState.new_game()
+            while True:
+                possible_actions = state.get_possible_actions()
+                mutable = MutableGameState(state)
+                self.assertEqual(list(state.iter_actions()), possible_actions)
+                self.assertEqual(list(mutable.iter_actions()), possible_actions)
+                seed = rng.getrandbits(32)
+                expected = random.Random(seed).choice(possible_actions) \
+                    if possible_actions else None
+                self.assertIs(state.sample_action(random.Random(seed)), expected)
+                self.assertIs(mutable.sample_action(random.Random(seed)), expected)
+                if not possible_actions:
+                    break
+                state = state.generate_successor(rng.choice(possible_actions))
+
+    def test_capture_order(self):
+        state = GameStatePlay()
+        state.table_cards = TableCards(BUSH_WARBLER, CRANE, CHERRY)
+        state.player_hands = [Hand(PLUM_RED_POEM, PINE, MAPLE), Hand()]
+        self.assertEqual(list(state.iter_actions(key=capture_order)), [
+            GameActionPlayCard(PINE, CRANE),
+            GameActionPlayCard(PLUM_RED_POEM, BUSH_WARBLER),
+            GameActionPlayCard(MAPLE)])
+        self.assertLess(capture_order(GameActionStop()),
+                        capture_order(GameActionPlayCard(PINE, CRANE)))
+        self.assertLess(capture_order(GameActionPlayCard(CHERRY, None)),
+                        capture_order(GameActionGo()))
@@ -1,8 +1,58 @@
+import random
 import unittest
 from itertools import combinations, chain
 
 from gostop.core.card import *
 from gostop.core.hand import CardList, Hand, TakenCards, TableCards
+from gostop.core.bitboard import BitTakenCards, BitTableCards
+
+
+def reference_score(cards):
+    """The score of `cards` computed from scratch, as TakenCards did before
+    keeping counts."""
+    scores = []
+    group_cards = CardList(*cards).split_by_group()
+
+    junk_cards = group_cards[Group.JUNK]
+    junk_2_cards = group_cards[Group.JUNK_2]
+    total_junk = len(junk_cards) + 2*len(junk_2_cards)
+    if CUP in group_cards[Group.ANIMAL] and total_junk >= 10:
+        group_cards[Group.ANIMAL].remove(CUP)
+    if total_junk >= 10:
+        scores.append((str(len(junk_cards)+len(junk_2_cards)) + ' junk cards',
+                       total_junk-9))
+
+    bright_cards = group_cards[Group.BRIGHT]
+    if len(bright_cards) == 5:
+        scores.append(('Five brights', 15))
+    elif len(bright_cards) == 4:
+        scores.append(('Four brights', 4))
+    elif len(bright_cards) == 3:
+        if RAIN in bright_cards:
+            scores.append(('Three brights with rain', 2))
+        else:
+            scores.append(('Three brights without rain', 3))
+
+    animal_cards = group_cards[Group.ANIMAL]
+    if len(animal_cards) >= 5:
+        scores.append((str(len(animal_cards)) + ' animals', len(animal_cards)-4))
+    if all(card in animal_cards for card in [BUSH_WARBLER, CUCKOO, GEESE]):
+        scores.append(('Godori', 5))
+
+    ribbon_cards = group_cards[Group.RIBBON]
+    if len(ribbon_cards) >= 5:
+        scores.append((str(len(ribbon_cards)) + ' ribbons', len(ribbon_cards)-4))
+    if all(card in ribbon_cards
+           for card in [PINE_RED_POEM, PLUM_RED_POEM, CHERRY_RED_POEM]):
+        scores.append(('Three red ribbons with poem', 3))
+    if all(card in ribbon_cards
+           for card in [PEONY_BLUE_POEM, CHRYSANTHEMUM_BLUE_PEOM, MAPLE_BLUE_POEM]):
+        scores.append(('Three blue ribbons with poem', 3))
+    if all(card in ribbon_cards
+           for card in [WISTERIA_RED, IRIS_RED, BUSH_CLOVER_RED]):
+        scores.append(('Three red ribbons', 3))
+
+    return scores
 
 
 class CardListTest(unittest.TestCase):
@@ -142,3 +192,106 @@ class TakenCardsTest(unittest.TestCase):
             # for cards in combinations(junk_cards, i):
             #     h = TakenCards(*cards)
             #     self.assertEqual(h.score, [('{0} junk cards'.format(i), i-9)])
+
+    def test_cup_counts_as_junk(self):
+        h = TakenCards(CUP, BUSH_WARBLER, CUCKOO, BRIDGE, BUTTERFLY,
+                       PINE, PINE_B, PLUM, PLUM_B, CHERRY, CHERRY_B, WILLOW_2)
+        self.assertEqual(h.score, [('8 junk cards', 1)])
+        h.remove(WILLOW_2)
+        self.assertEqual(h.score, [('5 animals', 1)])
+
+
+class TakenCardsEquivalenceTest(unittest.TestCase):
+    def test_score_matches_reference(self):
+        rng = random.Random(0)
+        for cls in (TakenCards, BitTakenCards):
+            for i in range(2000):
+                cards = rng.sample(ALL_CARDS, rng.randint(0, 48))
+                taken_cards = cls(*cards)
+                self.assertEqual(taken_cards.score, reference_score(cards))
+                self.assertEqual(taken_cards.points,
+                                 sum(points for label, points in reference_score(cards)))
+
+    def test_counts_follow_changes(self):
+        rng = random.Random(1)
+        for cls in (TakenCards, BitTakenCards):
+            taken_cards = cls()
+            cards = []
+            for i in range(2000):
+                if cards and rng.random() < 0.4:
+                    card = rng.choice(cards)
+                    cards.remove(card)
+                    taken_cards.remove(card)
+                elif len(cards) < len(ALL_CARDS):
+                    card = rng.choice([card for card in ALL_CARDS
+                                       if card not in cards])
+                    cards.append(card)
+                    taken_cards += card
+                self.assertEqual(taken_cards.score, reference_score(cards))
+                self.assertEqual(taken_cards.copy().score, reference_score(cards))
+
+            taken_cards.clear()
+            self.assertEqual(taken_cards.score, [])
+
+    def test_copy_is_independent(self):
+        for cls in (TakenCards, BitTakenCards):
+            taken_cards = cls(CRANE, CURTAIN)
+            copy = taken_cards.copy()
+            copy += MOON
+            self.assertEqual(list(taken_cards), [CRANE, CURTAIN])
+            self.assertEqual(taken_cards.score, [])
+            self.assertEqual(copy.score, reference_score([CRANE, CURTAIN, MOON]))
+
+
+class TableCardsTest(unittest.TestCase):
+    def test_paired_cards_follow_changes(self):
+        rng = random.Random(2)
+        for cls in (TableCards, BitTableCards):
+            table_cards = cls()
+            cards = []
+            for i in range(1000):
+                if cards and rng.random() < 0.4:
+                    card = rng.choice(cards)
+                    cards.remove(card)
+                    table_cards.remove(card)
+                elif cards and len(cards) < len(ALL_CARDS) and \
+                        rng.random() < 0.2:
+                    index = rng.randint(0, len(cards))
+                    card = rng.choice([card for card in ALL_CARDS
+                                       if card not in cards])
+                    cards.insert(index, card)
+                    table_cards.insert(index, card)
+                elif len(cards) < len(ALL_CARDS):
+                    card = rng.choice([card for card in ALL_CARDS
+                                       if card not in cards])
+                    cards.append(card)
+                    table_cards += card
+                for card in ALL_CARDS[::4]:
+                    paired_cards = [other for other in table_cards
+                                    if other.month == card.month]
+                    self.assertEqual(table_cards.get_paired_cards(card),
+                                     paired_cards)
+                    self.assertEqual(table_cards.month_count(card.month),
+                                     len(paired_cards))
+
+            table_cards.clear()
+            self.assertEqual(table_cards.get_paired_cards(PINE), [])
+
+    def test_copy_is_independent(self):
+        for cls in (TableCards, BitTableCards):
+            table_cards = cls(PINE, CRANE, PLUM)
+            copy = table_cards.copy()
+            copy.remove(CRANE)
+            copy += PINE_RED_POEM
+            self.assertEqual(set(table_cards.get_paired_cards(PINE)),
+                             {PINE, CRANE})
+            self.assertEqual(set(copy.get_paired_cards(PINE)),
+                             {PINE, PINE_RED_POEM})
+
+    def test_month_count(self):
+        table_cards = TableCards(PINE, CRANE, PINE_RED_POEM, PLUM)
+        self.assertEqual(table_cards.month_count(Month.JAN), 3)
+        self.assertEqual(table_cards.month_count(Month.FEB), 1)
+        self.assertEqual(table_cards.month_count(Month.MAR), 0)
+        table_cards += PINE_B
+        self.assertEqual(table_cards.month_count(Month.JAN), 4)
@@ -0,0 +1,89 @@
+import time
+import random
+import unittest
+
+from gostop.core.card import *
+from gostop.core.gamestate import GameState, GameStateCapture, \
+    GameActionPlayCard, GameActionGo, GameActionStop
+from gostop.core.ismctsagent import ISMCTSAgent
+from gostop.core.mutablestate import MutableGameState
+from gostop.core.randomagent import RandomAgent
+from gostop.core.tournament import play_game
+
+
+class ISMCTSAgentTest(unittest.TestCase):
+    def test_actions_are_hashable(self):
+        actions = {GameActionPlayCard(PINE, CRANE): 1, GameActionGo(): 2,
+                   GameActionStop(): 3}
+        self.assertEqual(actions[GameActionPlayCard(PINE, CRANE)], 1)
+        self.assertEqual(actions[GameActionGo()], 2)
+        self.assertNotIn(GameActionPlayCard(PINE), actions)
+
+    def test_plays_legal_actions(self):
+        random.seed(0)
+        agents = [ISMCTSAgent('ISMCTS', iterations=30, rollout_depth=4),
+                  RandomAgent('Random')]
+        winner, scores, plies = play_game(agents)
+        self.assertGreater(plies, 0)
+
+    def test_time_budget(self):
+        random.seed(0)
+        state = GameState.new_game()
+        agent = ISMCTSAgent('ISMCTS', time_budget=0.05)
+        start = time.perf_counter()
+        action = agent.get_action(state, state.get_possible_actions())
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertIn(action, state.get_possible_actions())
+
+    def test_no_iterations(self):
+        random.seed(0)
+        state = GameState.new_game()
+        possible_actions = state.get_possible_actions()
+        for agent in (ISMCTSAgent('ISMCTS', iterations=0),
+                      ISMCTSAgent('ISMCTS', time_budget=0)):
+            self.assertIn(agent.get_action(state, possible_actions),
+                          possible_actions)
+
+    def test_default_rollout(self):
+        # The default rollout plays the turn of the first player
+        random.seed(0)
+        mutable = MutableGameState(GameState.new_game())
+        ISMCTSAgent('ISMCTS').simulate(mutable)
+        self.assertEqual(len(mutable.player_hands[0]), 9)
+        self.assertEqual(mutable.current_player, 1)
+
+    def test_reuses_tree_for_capture(self):
+        random.seed(0)
+        state = GameState.new_game()
+        agent = ISMCTSAgent('ISMCTS', iterations=200)
+        action = agent.get_action(state, state.get_possible_actions())
+        subtree = agent._next_root
+        self.assertEqual(subtree.action, action)
+
+        state = state.generate_successor(action)
+        possible_actions = state.get_possible_actions()
+        self.assertGreater(len(possible_actions), 1)
+        visits = subtree.visits
+        agent.get_action(state, possible_actions)
+        self.assertEqual(subtree.visits, visits + 200)
+
+    def test_does_not_reuse_tree_of_other_game(self):
+        random.seed(1)
+        agent = ISMCTSAgent('ISMCTS', iterations=100, endgame_cards=0)
+        first = GameState.new_game()
+        agent.get_action(first, first.get_possible_actions())
+        subtree = agent._next_root
+
+        # A capture decision of the same player in another game
+        second = GameState.new_game()
+        while not isinstance(second, GameStateCapture) or \
+                second.current_player != subtree.player_just_moved or \
+                len(second.get_possible_actions()) < 2:
+            possible_actions = second.get_possible_actions()
+            if possible_actions:
+                second = second.generate_successor(random.choice(possible_actions))
+            else:
+                second = GameState.new_game()
+        visits = subtree.visits
+        agent.get_action(second, second.get_possible_actions())
+        self.assertEqual(subtree.visits, visits)
@@ -0,0 +1,82 @@
+import random
+import unittest
+
+from gostop.core.card import *
+from gostop.core.gamestate import GameState, GameStatePlay, \
+    GameStateException
+from gostop.core.mutablestate import MutableGameState, Phase
+from gostop.core.bitboard import iter_bits
+
+
+def snapshot(state):
+    return (state.phase, state.current_player, state.winner, state.go_count,
+            state.top_card, state.paired_cards, list(state.deck),
+            list(state.table_cards),
+            [list(cards) for cards in state.player_hands],
+            [list(cards) for cards in state.taken_cards])
+
+
+class MutableGameStateTest(unittest.TestCase):
+    def test_matches_generate_successor(self):
+        for seed in range(20):
+            random.seed(seed)
+            state = GameState.new_game()
+            mutable = MutableGameState(state)
+
+            while True:
+                self.assertEqual(mutable.to_game_state().__class__,
+                                 state.__class__)
+                self.assertEqual(mutable.to_game_state(), state)
+                possible_actions = state.get_possible_actions()
+                self.assertEqual(mutable.get_possible_actions(),
+                                 possible_actions)
+                if possible_actions == []:
+                    break
+
+                action = random.choice(possible_actions)
+                state = state.generate_successor(action)
+                mutable.make(action)
+                for player in range(state.number_of_players):
+                    self.assertEqual(mutable.get_result(player),
+                                     state.get_result(player))
+                if mutable.phase == Phase.END:
+                    break
+
+    def test_unmake_restores_state(self):
+        for seed in range(20):
+            random.seed(seed)
+            mutable = MutableGameState(GameState.new_game())
+            snapshots = []
+            tokens = []
+
+            while mutable.phase != Phase.END:
+                possible_actions = mutable.get_possible_actions()
+                if possible_actions == []:
+                    break
+                snapshots.append(snapshot(mutable))
+                tokens.append(mutable.make(random.choice(possible_actions)))
+
+            while tokens:
+                mutable.unmake(tokens.pop())
+                self.assertEqual(snapshot(mutable), snapshots.pop())
+
+    def test_determinize_matches_game_state(self):
+        for seed in range(20):
+            random.seed(seed)
+            state = GameState.new_game()
+            for i in range(random.randrange(20)):
+                state = state.generate_successor(
+                    random.choice(state.get_possible_actions()))
+            mutable = MutableGameState(state)
+            observer = state.current_player
+            cards = list(iter_bits(state.unseen_cards(observer)))
+            random.shuffle(cards)
+            determinization = mutable.determinize(observer, cards)
+            self.assertEqual(snapshot(determinization),
+                             snapshot(MutableGameState(
+                                 state.determinize(observer, cards))))
+            self.assertEqual(snapshot(mutable), snapshot(MutableGameState(state)))
+
+    def test_make_without_action(self):
+        mutable = MutableGameState(GameStatePlay())
+        self.assertRaises(GameStateException, mutable.make, None)
@@ -0,0 +1,55 @@
+import random
+import unittest
+
+from gostop.core.gamestate import GameState, GameStateCapture
+from gostop.core.ismctsagent import ISMCTSAgent
+from gostop.core.parallelagent import ParallelISMCTSAgent
+
+
+class EncodeTest(unittest.TestCase):
+    def test_encode_decode(self):
+        random.seed(0)
+        state = GameState.new_game()
+        while state is not None and state.get_possible_actions():
+            data = state.encode()
+            decoded = GameState.decode(data)
+            self.assertIs(decoded.__class__, state.__class__)
+            self.assertEqual(decoded, state)
+            self.assertEqual(decoded.encode(), data)
+            if isinstance(state, GameStateCapture):
+                self.assertEqual(decoded.top_card, state.top_card)
+                self.assertEqual(decoded.paired_cards, state.paired_cards)
+            state = state.generate_successor(
+                random.choice(state.get_possible_actions()))
+
+
+class ParallelISMCTSAgentTest(unittest.TestCase):
+    def test_root_parallel(self):
+        random.seed(0)
+        state = GameState.new_game()
+        agent = ParallelISMCTSAgent('Parallel', iterations=50, workers=2)
+        try:
+            action = agent.get_action(state, state.get_possible_actions())
+        finally:
+            agent.close()
+        self.assertIn(action, state.get_possible_actions())
+
+    def test_leaf_parallel(self):
+        random.seed(0)
+        state = GameState.new_game()
+        agent = ParallelISMCTSAgent('Parallel', iterations=40, workers=2,
+                                    mode='leaf', batch_size=8)
+        try:
+            action = agent.get_action(state, state.get_possible_actions())
+        finally:
+            agent.close()
+        self.assertIn(action, state.get_possible_actions())
+        self.assertEqual(agent._next_root.parent, None)
+
+    def test_unknown_mode(self):
+        self.assertRaises(ValueError, ParallelISMCTSAgent, 'Parallel',
+                          mode='tree')
+
+    def test_default_rollout_depth(self):
+        self.assertEqual(ParallelISMCTSAgent('Parallel').rollout_depth,
+                         ISMCTSAgent('ISMCTS').rollout_depth)
@@ -0,0 +1,78 @@
+import random
+import unittest
+import threading
+
+from gostop.core import profiling
+from gostop.core.hand import TakenCards
+from gostop.core.gamestate import GameStatePlay, GameStateCapture
+from gostop.core.randomagent import RandomAgent
+from gostop.core.tournament import play_game, run_tournament
+
+
+class ProfilingTest(unittest.TestCase):
+    def setUp(self):
+        profiling.reset()
+
+    def tearDown(self):
+        profiling.disable()
+        profiling.reset()
+
+    def test_disabled_runs_original_methods(self):
+        generate_successor = GameStatePlay.__dict__['generate_successor']
+        score = TakenCards.__dict__['score']
+        profiling.enable()
+        self.assertIsNot(GameStatePlay.__dict__['generate_successor'], generate_successor)
+        profiling.disable()
+        self.assertIs(GameStatePlay.__dict__['generate_successor'], generate_successor)
+        self.assertIs(TakenCards.__dict__['score'], score)
+        self.assertFalse(profiling.enabled())
+
+        random.seed(0)
+        play_game([RandomAgent('random'), RandomAgent('random')])
+        self.assertEqual(profiling.snapshot(), {})
+
+    def test_counts(self):
+        profiling.enable()
+        random.seed(1)
+        winner, scores, plies = play_game([RandomAgent('random'), RandomAgent('random')])
+        counters = profiling.snapshot()
+        self.assertEqual(counters['agent.RandomAgent.get_action']['calls'], plies)
+        self.assertEqual(sum(counters.get(phase + '.generate_successor', {'calls': 0})['calls']
+                             for phase in ['play', 'capture', 'go_stop']), plies)
+        self.assertGreater(counters['play.generate_successor']['ns'], 0)
+        self.assertEqual(counters['states']['ns'], 0)
+        self.assertGreater(counters['states']['calls'], plies)
+
+        text = profiling.prometheus()
+        self.assertIn('# TYPE gostop_calls_total counter\n', text)
+        self.assertIn('gostop_calls_total{{name="agent.RandomAgent.get_action"}} {0}\n'
+                      .format(plies), text)
+
+    def test_threads_count_separately(self):
+        profiling.enable()
+        state = GameStatePlay.new_game()
+
+        def count():
+            for i in range(2000):
+                state.get_possible_actions()
+        threads = [threading.Thread(target=count) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(profiling.snapshot()['play.get_possible_actions']['calls'], 8000)
+        profiling.reset()
+        self.assertEqual(profiling.snapshot(), {})
+
+    def test_merge(self):
+        merged = profiling.merge([{'a': {'calls': 1, 'ns': 10}},
+                                  {'a': {'calls': 2, 'ns': 5}, 'b': {'calls': 1, 'ns': 0}}])
+        self.assertEqual(merged, {'a': {'calls': 3, 'ns': 15}, 'b': {'calls': 1, 'ns': 0}})
+
+    def test_tournament_profile(self):
+        capture = GameStateCapture.__dict__['get_possible_actions']
+        result = run_tournament(['random', 'random'], 4, processes=0, profile=True)
+        self.assertEqual(result.profile['agent.RandomAgent.get_action']['calls'],
+                         sum(r.plies for r in result.results))
+        self.assertIs(GameStateCapture.__dict__['get_possible_actions'], capture)
+        self.assertIsNone(run_tournament(['random', 'random'], 2, processes=0).profile)
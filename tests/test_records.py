@@ -0,0 +1,88 @@
+import os
+import random
+import tempfile
+import unittest
+
+from gostop.core.deck import Deck
+from gostop.core.gamestate import GameState
+from gostop.core.records import GameRecord, RecordWriter, RecordError, \
+    MAGIC, read_records, iter_records, record_game, replay
+from gostop.core.tournament import run_tournament
+
+
+def random_game(seed):
+    random.seed(seed)
+    deck = Deck()
+    deck.shuffle()
+    actions = []
+    states = []
+    state = GameState.new_game(deck=deck)
+    while state.get_possible_actions():
+        states.append(state)
+        possible_actions = state.get_possible_actions()
+        action = random.choice(possible_actions)
+        actions.append(possible_actions.index(action))
+        state = state.generate_successor(action)
+    states.append(state)
+    return record_game(seed, deck, actions), states
+
+
+class RecordsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'games.rec')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_replay_reproduces_game(self):
+        for seed in range(10):
+            record, states = random_game(seed)
+            replayed = list(replay(record))
+            self.assertEqual([state.encode() for state in replayed],
+                             [state.encode() for state in states])
+
+    def test_write_and_read(self):
+        records = [random_game(seed)[0] for seed in range(20)]
+        with RecordWriter(self.path) as writer:
+            for record in records[:10]:
+                writer.write(record)
+        # Appending to an existing file
+        with RecordWriter(self.path) as writer:
+            for record in records[10:]:
+                writer.write(record)
+        self.assertEqual(list(read_records(self.path)), records)
+
+    def test_record_size(self):
+        record = random_game(0)[0]
+        with RecordWriter(self.path) as writer:
+            writer.write(record)
+        self.assertEqual(os.path.getsize(self.path),
+                         len(MAGIC) + 9 + 48 + len(record.actions))
+
+    def test_truncated_and_invalid_files(self):
+        record = random_game(0)[0]
+        with RecordWriter(self.path) as writer:
+            writer.write(record)
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        with self.assertRaises(RecordError):
+            list(iter_records(data[:-1]))
+        with self.assertRaises(RecordError):
+            list(iter_records(b'not a record file'))
+        with self.assertRaises(ValueError):
+            RecordWriter(self.path).write(GameRecord(0, b'', b''))
+
+    def test_tournament_records_games(self):
+        result = run_tournament(['random', 'random'], 6, processes=0,
+                                record_path=self.path)
+        records = sorted(read_records(self.path), key=lambda record: record.seed)
+        self.assertEqual(sorted(result.seed for result in result.results),
+                         [record.seed for record in records])
+        for record in records:
+            game = next(game for game in result.results if game.seed == record.seed)
+            self.assertEqual(len(record.actions), game.plies)
+            winner = list(replay(record))[-1].winner
+            if winner is not None and game.index % 2 == 1:
+                winner = 1 - winner
+            self.assertEqual(winner, game.winner)
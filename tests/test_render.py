@@ -0,0 +1,78 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from PIL import Image, ImageChops
+
+from gostop.core.card import *
+from gostop.core.gamestate import GameState
+from gostop.core.build_a_image import get_concat_h, add_number
+from gostop.core.render import SpriteAtlas, StateRenderer, render_state
+
+
+def chained_row(cards, number, overlap):
+    images = []
+    for i, card in enumerate(cards):
+        img = Image.open(f"images/{card.month-1:x}{card.order_in_month}.png")
+        if number:
+            img = add_number(img, i)
+        images.append(img)
+    dst_image = images.pop(0)
+    for img in images:
+        dst_image = get_concat_h(dst_image, img, overlap)
+    return dst_image
+
+
+class SpriteAtlasTest(unittest.TestCase):
+    def test_row_matches_chained_concatenation(self):
+        atlas = SpriteAtlas()
+        cards = [CRANE, PINE_B, CUP, PAULOWNIA_2, WILLOW_2]
+        for number in (False, True):
+            for overlap in (0, 50):
+                row = atlas.row(cards, number, overlap)
+                expected = chained_row(cards, number, overlap)
+                self.assertEqual(row.size, expected.size)
+                self.assertIsNone(ImageChops.difference(row, expected).getbbox())
+
+    def test_rows_are_cached(self):
+        atlas = SpriteAtlas(cache_size=2)
+        row = atlas.row([CRANE, MOON])
+        self.assertIs(atlas.row([CRANE, MOON]), row)
+        atlas.row([RAIN])
+        atlas.row([PINE])
+        self.assertIsNot(atlas.row([CRANE, MOON]), row)
+
+
+class RenderStateTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_render_state(self):
+        random.seed(0)
+        state = GameState.new_game()
+        render_state(state, self.directory)
+        self.assertEqual(
+            sorted(os.listdir(self.directory)),
+            ['hand0.png', 'hand1.png', 'table.png', 'taken0.png', 'taken1.png'])
+
+        state = state.generate_successor(state.get_possible_actions()[0])
+        render_state(state, self.directory)
+        self.assertIn('top_card.png', os.listdir(self.directory))
+
+    def test_unchanged_images_are_not_rewritten(self):
+        random.seed(0)
+        state = GameState.new_game()
+        renderer = StateRenderer(self.directory)
+        renderer.render(state)
+
+        os.remove(os.path.join(self.directory, 'taken0.png'))
+        os.remove(os.path.join(self.directory, 'hand0.png'))
+        state.player_hands[0].pop()
+        renderer.render(state)
+        self.assertIn('hand0.png', os.listdir(self.directory))
+        self.assertNotIn('taken0.png', os.listdir(self.directory))
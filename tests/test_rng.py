@@ -0,0 +1,65 @@
+import random
+import unittest
+
+import numpy as np
+
+from gostop.core.card import ALL_CARDS
+from gostop.core.gamestate import GameState
+from gostop.core.ismctsagent import ISMCTSAgent
+from gostop.core.randomagent import RandomAgent
+from gostop.core.tournament import play_game
+from gostop.core.rng import python_rng, numpy_rng, stream_seed, \
+    shuffled_decks, game_deck, DECK_BLOCK
+
+
+class StreamTest(unittest.TestCase):
+    def test_streams_are_named_by_seed_and_keys(self):
+        self.assertEqual(python_rng(1, 2, 3).getrandbits(64),
+                         python_rng(1, 2, 3).getrandbits(64))
+        self.assertNotEqual(python_rng(1, 2, 3).getrandbits(64),
+                            python_rng(1, 2, 4).getrandbits(64))
+        self.assertNotEqual(python_rng(1).getrandbits(64),
+                            python_rng(2).getrandbits(64))
+        self.assertEqual(python_rng('5').getrandbits(64),
+                         python_rng(5).getrandbits(64))
+        self.assertEqual(stream_seed('seed', 1), stream_seed('seed', 1))
+        self.assertEqual(stream_seed(-1, 2), stream_seed('-1', 2))
+        self.assertNotEqual(stream_seed(-1, 2), stream_seed(1, 2))
+        self.assertTrue((numpy_rng(1, 2).random(4) == numpy_rng(1, 2).random(4)).all())
+
+    def test_shuffled_decks(self):
+        decks = shuffled_decks(np.random.default_rng(0), 100)
+        self.assertEqual(decks.shape, (100, len(ALL_CARDS)))
+        self.assertTrue((np.sort(decks, axis=1) == np.arange(len(ALL_CARDS))).all())
+        self.assertGreater(len({deck.tobytes() for deck in decks}), 1)
+
+    def test_game_deck_depends_on_seed_and_index(self):
+        deck = game_deck(7, DECK_BLOCK + 3)
+        self.assertEqual(sorted(card.id for card in deck), list(range(len(ALL_CARDS))))
+        self.assertEqual(game_deck(7, DECK_BLOCK + 3), deck)
+        self.assertNotEqual(list(game_deck(7, 3)), list(deck))
+        self.assertNotEqual(list(game_deck(8, DECK_BLOCK + 3)), list(deck))
+
+
+class ExplicitRngTest(unittest.TestCase):
+    def play(self, seed):
+        rng = python_rng(seed, 0)
+        agents = [ISMCTSAgent('ISMCTS', iterations=20, rng=python_rng(seed, 1)),
+                  RandomAgent('Random', python_rng(seed, 2))]
+        actions = []
+        play_game(agents, GameState.new_game(rng=rng), actions)
+        return actions
+
+    def test_games_do_not_depend_on_random_module(self):
+        random.seed(0)
+        actions = self.play(3)
+        random.seed(1)
+        self.assertEqual(self.play(3), actions)
+
+    def test_copy_and_randomise(self):
+        state = GameState.new_game(rng=random.Random(4))
+        first = state.copy_and_randomise_batch(0, 5, random.Random(5))
+        second = state.copy_and_randomise_batch(0, 5, random.Random(5))
+        for a, b in zip(first, second):
+            self.assertEqual(list(a.deck), list(b.deck))
+            self.assertEqual(a.player_hands[1], b.player_hands[1])
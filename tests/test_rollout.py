@@ -0,0 +1,98 @@
+import random
+import unittest
+
+import numpy as np
+
+from gostop.core.card import ALL_CARDS
+from gostop.core.hand import TakenCards
+from gostop.core.gamestate import GameState
+from gostop.core.rollout import BatchRollout, action_id, reference_rollout, \
+    rollout_uniforms, score_bits, NUM_ACTIONS
+from gostop.core.bitboard import card_bits
+from gostop.core.zobrist import DECK, TABLE, hand
+from gostop.core.rng import shuffled_decks
+
+
+def random_states(count, seed):
+    """New games and games some random actions in, in every phase."""
+    rng = random.Random(seed)
+    states = []
+    for i in range(count):
+        random.seed(rng.getrandbits(64))
+        state = GameState.new_game()
+        for j in range(rng.randint(0, 50)):
+            possible_actions = state.get_possible_actions()
+            if possible_actions == []:
+                break
+            state = state.generate_successor(rng.choice(possible_actions))
+        states.append(state)
+    return states
+
+
+class BatchRolloutTest(unittest.TestCase):
+    def test_matches_reference_rollout(self):
+        states = random_states(300, 0)
+        uniforms = rollout_uniforms(len(states), 1)
+        result = BatchRollout(states).run(uniforms)
+        for g, state in enumerate(states):
+            winner, scores, plies = reference_rollout(state, uniforms[:, g])
+            self.assertEqual(result.winner[g], -1 if winner is None else winner)
+            self.assertEqual(list(result.scores[g]), scores)
+            self.assertEqual(result.plies[g], plies)
+
+    def test_new_games_match_dealt_states(self):
+        decks = shuffled_decks(np.random.default_rng(7), 50)
+        rollout = BatchRollout.new_games(decks)
+        states = BatchRollout([GameState.new_game(
+            deck=[ALL_CARDS[card] for card in deck]) for deck in decks])
+        np.testing.assert_array_equal(rollout.locations(), states.locations())
+        np.testing.assert_array_equal(rollout.deck, states.deck)
+        uniforms = rollout_uniforms(len(decks), 8)
+        result = rollout.run(uniforms)
+        expected = states.run(uniforms)
+        for field in result._fields:
+            np.testing.assert_array_equal(getattr(result, field),
+                                          getattr(expected, field))
+
+    def test_legal_actions(self):
+        states = random_states(100, 2)
+        legal = BatchRollout(states).legal_actions(np.arange(len(states)))
+        self.assertEqual(legal.shape, (len(states), NUM_ACTIONS))
+        for g, state in enumerate(states):
+            self.assertEqual(list(np.flatnonzero(legal[g])),
+                             sorted(action_id(action) for action
+                                    in state.get_possible_actions()))
+
+    def test_locations(self):
+        random.seed(6)
+        state = GameState.new_game()
+        location = BatchRollout([state]).locations()[0]
+        for card in state.table_cards:
+            self.assertEqual(location[card.id], TABLE)
+        for player, cards in enumerate(state.player_hands):
+            for card in cards:
+                self.assertEqual(location[card.id], hand(player))
+        for card in state.deck:
+            self.assertEqual(location[card.id], DECK)
+
+    def test_results(self):
+        states = random_states(50, 3)
+        rollout = BatchRollout(states)
+        uniforms = rollout_uniforms(len(states), 4)
+        result = rollout.run(uniforms)
+        results = rollout.results()
+        for g in range(len(states)):
+            if result.winner[g] == -1:
+                self.assertEqual(list(results[g]), [0.5, 0.5])
+            else:
+                self.assertEqual(results[g, result.winner[g]], 1)
+                self.assertEqual(results[g].sum(), 1)
+
+    def test_score_bits(self):
+        rng = random.Random(5)
+        hands = [rng.sample(ALL_CARDS, rng.randint(0, 48)) for i in range(500)]
+        bits = np.array([card_bits(cards) for cards in hands], dtype=np.uint64)
+        self.assertEqual(
+            list(score_bits(bits)),
+            [sum(s for label, s in TakenCards(*cards).score) for cards in hands])
+
@@ -0,0 +1,114 @@
+import json
+import random
+import asyncio
+import unittest
+import concurrent.futures
+
+from gostop.core import profiling
+from gostop.core.server import GameServer, process_executor
+
+
+async def send(writer, message):
+    writer.write(json.dumps(message).encode() + b'\n')
+    await writer.drain()
+
+
+async def receive(reader):
+    return json.loads(await reader.readline())
+
+
+class GameServerTest(unittest.TestCase):
+    def setUp(self):
+        self.executor = concurrent.futures.ThreadPoolExecutor(2)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_concurrent_bot_tables(self):
+        server = GameServer(executor=self.executor)
+
+        async def play():
+            return await asyncio.gather(*[server.play_bots(['random', 'random'])
+                                          for i in range(50)])
+        tables = asyncio.run(play())
+
+        self.assertEqual(len({table.id for table in tables}), 50)
+        self.assertEqual(server.tables, {})
+        metrics = server.metrics()
+        self.assertEqual(len(metrics), 50)
+        for table in tables:
+            self.assertIn(table.winner, [None, 0, 1])
+            table_metrics = metrics[str(table.id)]
+            self.assertTrue(table_metrics['finished'])
+            self.assertGreater(table_metrics['actions'], 0)
+            self.assertEqual(table_metrics['actions'], sum(table.metrics.decisions))
+
+    def test_seeded_bot_tables(self):
+        def play(seed):
+            server = GameServer(executor=self.executor, seed=seed)
+
+            async def play():
+                return await asyncio.gather(
+                    *[server.play_bots(['random', 'random']) for i in range(10)])
+            tables = asyncio.run(play())
+            return {table.id: (table.winner, table.scores,
+                               table.metrics.decisions) for table in tables}
+
+        results = play(7)
+        self.assertEqual(play(7), results)
+        self.assertNotEqual(play(8), results)
+
+    def test_remote_player(self):
+        random.seed(0)
+        server = GameServer(executor=self.executor)
+
+        async def play():
+            await server.start()
+            port = server.server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            await send(writer, {'type': 'play', 'seat': 1})
+            states = []
+            errors = 0
+            while True:
+                message = await receive(reader)
+                if message['type'] == 'end':
+                    break
+                if message['type'] == 'error':
+                    errors += 1
+                    await send(writer, {'action': 0})
+                    continue
+                states.append(message)
+                if len(states) == 1:
+                    await send(writer, {'action': len(message['actions'])})
+                else:
+                    await send(writer, {'action': 0})
+            await send(writer, {'type': 'metrics'})
+            metrics = await receive(reader)
+            writer.close()
+            await server.close()
+            return states, errors, message, metrics
+
+        states, errors, end, metrics = asyncio.run(play())
+        self.assertEqual(errors, 1)
+        self.assertTrue(all(state['player'] == 1 for state in states))
+        # Only the hand of the player is sent
+        self.assertEqual(set(states[0]), {'type', 'player', 'hand', 'table', 'taken',
+                                          'deck', 'top_card', 'actions'})
+        self.assertIn(end['winner'], [None, 0, 1])
+        self.assertEqual(len(end['scores']), 2)
+        table_metrics = metrics['tables'][str(end['table'])]
+        self.assertTrue(table_metrics['finished'])
+        self.assertEqual(len(table_metrics['mean_latency']), 2)
+
+    def test_worker_process_profile(self):
+        executor = process_executor(1, profile=True)
+        server = GameServer(executor=executor)
+        try:
+            table = asyncio.run(server.play_bots(['random', 'random']))
+        finally:
+            executor.shutdown()
+        self.assertFalse(profiling.enabled())
+        profile = server.profile()
+        self.assertEqual(profile['agent.RandomAgent.get_action']['calls'],
+                         table.metrics.actions)
+        self.assertIsNone(GameServer().profile())
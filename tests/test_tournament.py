@@ -0,0 +1,32 @@
+import unittest
+
+from gostop.core.randomagent import RandomAgent
+from gostop.core.tournament import load_agent_class, run_tournament, \
+    wilson_interval
+
+
+class TournamentTest(unittest.TestCase):
+    def test_load_agent_class(self):
+        self.assertIs(load_agent_class('random'), RandomAgent)
+        self.assertIs(load_agent_class('gostop.core.randomagent:RandomAgent'),
+                      RandomAgent)
+        self.assertIs(load_agent_class('gostop.core.randomagent.RandomAgent'),
+                      RandomAgent)
+        self.assertRaises(ValueError, load_agent_class, 'unknown')
+
+    def test_results_are_reproducible(self):
+        serial = run_tournament(['random', 'random'], 40, master_seed=3,
+                                processes=0)
+        parallel = run_tournament(['random', 'random'], 40, master_seed=3,
+                                  processes=2, chunksize=3)
+        self.assertEqual(serial.results, parallel.results)
+        self.assertEqual(serial.games,
+                         serial.wins(0) + serial.wins(1) + serial.draws)
+        self.assertIn('games/sec', str(serial))
+
+    def test_wilson_interval(self):
+        low, high = wilson_interval(50, 100)
+        self.assertLess(low, 0.5)
+        self.assertGreater(high, 0.5)
+        self.assertAlmostEqual(0.5 - low, high - 0.5)
+        self.assertEqual(wilson_interval(0, 0), (0.0, 1.0))
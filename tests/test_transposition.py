@@ -0,0 +1,40 @@
+import unittest
+
+from gostop.core.transposition import TranspositionTable, Bound
+
+
+class TranspositionTableTest(unittest.TestCase):
+    def setUp(self):
+        self.table = TranspositionTable(8)
+
+    def test_lookup_stored_entry(self):
+        self.assertIsNone(self.table.lookup(3))
+        self.table.store(3, 2, 0.5, Bound.LOWER, 'move')
+        entry = self.table.lookup(3)
+        self.assertEqual((entry.depth, entry.value, entry.flag, entry.move),
+                         (2, 0.5, Bound.LOWER, 'move'))
+        self.assertIn(3, self.table)
+        self.assertNotIn(11, self.table)
+        self.assertEqual((self.table.hits, self.table.misses), (1, 1))
+
+    def test_deeper_entry_is_kept_in_same_search(self):
+        self.table.store(3, 4, 1.0)
+        self.assertFalse(self.table.store(11, 2, 0.0))
+        self.assertIn(3, self.table)
+        self.assertTrue(self.table.store(11, 4, 0.0))
+        self.assertIn(11, self.table)
+        self.assertEqual(self.table.replacements, 1)
+
+    def test_same_key_is_always_replaced(self):
+        self.table.store(3, 4, 1.0)
+        self.assertTrue(self.table.store(3, 1, 0.0))
+        self.assertEqual(self.table.lookup(3).value, 0.0)
+
+    def test_older_search_is_replaced(self):
+        self.table.store(3, 4, 1.0)
+        self.table.new_search()
+        self.assertTrue(self.table.store(11, 1, 0.0))
+        self.assertEqual(len(self.table), 1)
+
+    def test_invalid_size(self):
+        self.assertRaises(ValueError, TranspositionTable, 0)
@@ -0,0 +1,34 @@
+import sys
+import argparse
+
+from gostop.core import profiling
+from gostop.core.tournament import run_tournament
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument('agents', nargs=2,
+                        help='Agents to play, e.g. random or gostop.core.randomagent:RandomAgent')
+    parser.add_argument('-n', '--games', type=int, default=1000,
+                        help='Number of games to play')
+    parser.add_argument('-s', '--seed', type=int, default=0,
+                        help='Master random seed of the tournament')
+    parser.add_argument('-j', '--processes', type=int, default=None,
+                        help='Number of worker processes, all cores by default, 0 to play in this process')
+    parser.add_argument('-r', '--record', default=None,
+                        help='Append the games to this game record file')
+    parser.add_argument('--profile', action='store_true',
+                        help='Count the calls and time of the engine and print them')
+
+    args = parser.parse_args(argv)
+
+    result = run_tournament(args.agents, args.games, args.seed, args.processes,
+                            record_path=args.record, profile=args.profile)
+    print(result)
+    if args.profile:
+        print(profiling.prometheus(result.profile), end='')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])